@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import UserHealthProfile
+from .models import DailyAssessmentRollup, PrecomputedAnswer, UserHealthProfile
 
 # Register your models here.
 
@@ -33,3 +33,18 @@ class UserHealthProfileAdmin(admin.ModelAdmin):
             'fields': ('created_at', 'updated_at')
         }),
     )
+
+
+@admin.register(DailyAssessmentRollup)
+class DailyAssessmentRollupAdmin(admin.ModelAdmin):
+    list_display = ['day', 'dimension', 'value', 'count']
+    list_filter = ['dimension', 'day']
+    readonly_fields = ['day', 'dimension', 'value', 'count']
+
+
+@admin.register(PrecomputedAnswer)
+class PrecomputedAnswerAdmin(admin.ModelAdmin):
+    list_display = ['question', 'lang', 'model_name', 'from_kb', 'updated_at']
+    list_filter = ['lang', 'model_name', 'from_kb']
+    search_fields = ['question', 'answer']
+    readonly_fields = ['question_hash', 'normalized_hash', 'created_at', 'updated_at']
@@ -0,0 +1,211 @@
+"""Daily assessment rollups: incremental maintenance, backfill and read helpers."""
+from collections import Counter, defaultdict
+from datetime import datetime, time, timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Min
+from django.utils import timezone
+
+from .models import DailyAssessmentRollup, UserHealthProfile
+
+# Stable codes for the check_eligibility messages that defer a donor.
+# Informational notes (e.g. medications) are not deferrals and are not counted.
+DEFERRAL_REASON_CODES = {
+    "You must be at least 18 years old to donate blood.": 'age_under_18',
+    "Maximum age for blood donation is 65 years.": 'age_over_65',
+    "Minimum weight requirement is 50 kg for blood donation.": 'weight_under_50kg',
+    "Individuals with uncontrolled diabetes are not eligible to donate.": 'diabetes',
+    "Individuals with anemia or low hemoglobin are not eligible.": 'anemia',
+    "Hemoglobin level should be at least 12.5 g/dL for females.": 'low_hemoglobin',
+    "Hemoglobin level should be at least 13.5 g/dL for males.": 'low_hemoglobin',
+    "Individuals with infectious diseases (HIV, Hepatitis, etc.) are not eligible.": 'infectious_disease',
+    "Pregnant women are not eligible to donate blood.": 'pregnancy',
+    "Breastfeeding women are not eligible to donate blood.": 'breastfeeding',
+    "You must wait at least 6 months after getting a tattoo or piercing before donating.": 'recent_tattoo_piercing',
+    "You must wait at least 6 months after surgery before donating blood.": 'recent_surgery',
+    "You must wait at least 28 days after recovery from COVID-19 before donating blood.": 'recent_covid',
+}
+
+
+def rollup_day(profile):
+    return timezone.localdate(profile.created_at)
+
+
+def result_contributions(blood_category, eligibility_status, eligibility_reasons):
+    """(dimension, value) pairs a completed assessment adds to its day"""
+    pairs = [
+        ('assessments', 'completed'),
+        ('eligibility', eligibility_status),
+        ('blood_category', blood_category or 'Unknown'),
+    ]
+    if eligibility_status != 'Eligible':
+        codes = {DEFERRAL_REASON_CODES[reason] for reason in eligibility_reasons.splitlines()
+                 if reason in DEFERRAL_REASON_CODES}
+        pairs.extend(('deferral_reason', code) for code in sorted(codes))
+    return pairs
+
+
+def _bump(day, dimension, value, delta=1):
+    rows = DailyAssessmentRollup.objects.filter(day=day, dimension=dimension, value=value)
+    if delta < 0:
+        # Never below zero (count is unsigned), e.g. after a partial backfill
+        if not rows.filter(count__gte=-delta).update(count=F('count') + delta):
+            rows.update(count=0)
+        return
+    if rows.update(count=F('count') + delta):
+        return
+    try:
+        with transaction.atomic():
+            DailyAssessmentRollup.objects.create(day=day, dimension=dimension, value=value, count=delta)
+    except IntegrityError:
+        # Another request created the row first
+        DailyAssessmentRollup.objects.filter(
+            day=day, dimension=dimension, value=value
+        ).update(count=F('count') + delta)
+
+
+def record_assessment_started(profile):
+    _bump(rollup_day(profile), 'assessments', 'started')
+
+
+def record_assessment_result(profile):
+    """
+    Count a completed assessment. Call before saving the new result, in the
+    same transaction as the save: if this profile was counted before, its
+    stored result is subtracted first.
+    """
+    if not profile.completed or not profile.eligibility_status:
+        return
+    day = rollup_day(profile)
+    with transaction.atomic():
+        if profile.in_rollups:
+            previous = UserHealthProfile.objects.select_for_update().filter(pk=profile.pk).values(
+                'blood_category', 'eligibility_status', 'eligibility_reasons'
+            ).first()
+            if previous and previous['eligibility_status']:
+                for dimension, value in result_contributions(**previous):
+                    _bump(day, dimension, value, -1)
+        for dimension, value in result_contributions(
+            profile.blood_category, profile.eligibility_status, profile.eligibility_reasons
+        ):
+            _bump(day, dimension, value)
+    profile.in_rollups = True
+
+
+def delete_assessments(profiles):
+    """
+    Delete profiles and take them back out of the rollups in the same
+    transaction, so the counts keep matching what rebuild_rollups would
+    compute from the remaining rows. Returns the number of profiles deleted.
+    """
+    with transaction.atomic():
+        rows = list(profiles.select_for_update().values_list(
+            'pk', 'created_at', 'in_rollups', 'blood_category', 'eligibility_status', 'eligibility_reasons'
+        ))
+        if not rows:
+            return 0
+        counts = Counter()
+        for _, created_at, in_rollups, blood_category, status, reasons in rows:
+            day = timezone.localdate(created_at)
+            counts[(day, 'assessments', 'started')] += 1
+            if in_rollups and status:
+                for dimension, value in result_contributions(blood_category, status, reasons):
+                    counts[(day, dimension, value)] += 1
+        for (day, dimension, value), count in counts.items():
+            _bump(day, dimension, value, -count)
+        deleted, _ = UserHealthProfile.objects.filter(pk__in=[row[0] for row in rows]).delete()
+    return deleted
+
+
+def rebuild_rollups(start=None, end=None, days_per_chunk=7, chunk_size=500):
+    """
+    Recompute rollups from the profile table, one window of days per transaction.
+    Yields (window_start, window_end, profiles_counted) as it goes.
+    """
+    if start is None:
+        first = UserHealthProfile.objects.aggregate(first=Min('created_at'))['first']
+        if first is None:
+            return
+        start = timezone.localdate(first)
+    if end is None:
+        end = timezone.localdate()
+
+    window_start = start
+    while window_start <= end:
+        window_end = min(window_start + timedelta(days=days_per_chunk - 1), end)
+        profiles = UserHealthProfile.objects.filter(
+            created_at__gte=timezone.make_aware(datetime.combine(window_start, time.min)),
+            created_at__lt=timezone.make_aware(datetime.combine(window_end + timedelta(days=1), time.min)),
+        )
+        counts = Counter()
+        counted = 0
+        rows = profiles.order_by('pk').values_list(
+            'created_at', 'completed', 'blood_category', 'eligibility_status', 'eligibility_reasons'
+        )
+        with transaction.atomic():
+            for created_at, completed, blood_category, status, reasons in rows.iterator(chunk_size=chunk_size):
+                day = timezone.localdate(created_at)
+                counts[(day, 'assessments', 'started')] += 1
+                if completed and status:
+                    for dimension, value in result_contributions(blood_category, status, reasons):
+                        counts[(day, dimension, value)] += 1
+                    counted += 1
+            DailyAssessmentRollup.objects.filter(day__gte=window_start, day__lte=window_end).delete()
+            DailyAssessmentRollup.objects.bulk_create([
+                DailyAssessmentRollup(day=day, dimension=dimension, value=value, count=count)
+                for (day, dimension, value), count in counts.items()
+            ])
+            profiles.filter(completed=True).exclude(eligibility_status='').update(in_rollups=True)
+        yield window_start, window_end, counted
+        window_start = window_end + timedelta(days=1)
+
+
+def summarize_rollups(start, end, top_reasons=5):
+    """Analytics for a date range, read from the rollup table only"""
+    days = defaultdict(lambda: {
+        'assessments_started': 0,
+        'assessments_completed': 0,
+        'eligible': 0,
+        'not_eligible': 0,
+        'blood_category': {},
+        'deferral_reasons': {},
+    })
+    totals = Counter()
+    blood_totals = Counter()
+    reason_totals = Counter()
+
+    rows = DailyAssessmentRollup.objects.filter(day__gte=start, day__lte=end)
+    for day, dimension, value, count in rows.values_list('day', 'dimension', 'value', 'count'):
+        entry = days[day.isoformat()]
+        if dimension == 'assessments':
+            entry[f"assessments_{value}"] = count
+            totals[f"assessments_{value}"] += count
+        elif dimension == 'eligibility':
+            key = 'eligible' if value == 'Eligible' else 'not_eligible'
+            entry[key] += count
+            totals[key] += count
+        elif dimension == 'blood_category':
+            entry['blood_category'][value] = count
+            blood_totals[value] += count
+        elif dimension == 'deferral_reason':
+            entry['deferral_reasons'][value] = count
+            reason_totals[value] += count
+
+    def with_rate(entry):
+        assessed = entry['eligible'] + entry['not_eligible']
+        entry['eligibility_rate'] = round(entry['eligible'] / assessed, 4) if assessed else None
+        return entry
+
+    return {
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'days': [dict(with_rate(entry), day=day) for day, entry in sorted(days.items())],
+        'totals': with_rate({
+            'assessments_started': totals['assessments_started'],
+            'assessments_completed': totals['assessments_completed'],
+            'eligible': totals['eligible'],
+            'not_eligible': totals['not_eligible'],
+            'blood_category': dict(blood_totals.most_common()),
+        }),
+        'top_deferral_reasons': reason_totals.most_common(top_reasons),
+    }
@@ -0,0 +1,62 @@
+"""
+Precomputed answer bank: answers and recommendations for a corpus of frequent
+questions, generated offline by `python manage.py build_answer_bank` with the
+same prompts as live chat. Chat serves a question from the bank when it matches
+an entry as asked or after normalization, before any model is loaded.
+"""
+import hashlib
+import unicodedata
+
+from django.conf import settings
+
+from .metrics import Counter
+from .models import PrecomputedAnswer
+
+ANSWER_BANK_LOOKUPS = Counter(
+    'assistant_answer_bank_lookups_total', 'Chat questions looked up in the precomputed answer bank, by match.',
+    ('match',),
+)
+
+
+def normalize_question(text):
+    """Lowercase, without punctuation (including ?, । and quotes) and with single spaces"""
+    text = ''.join(' ' if unicodedata.category(char).startswith('P') else char for char in text.lower())
+    return ' '.join(text.split())
+
+
+def _sha1(text):
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def question_hashes(question):
+    """(hash of the question as asked, hash of its normalized form)"""
+    return _sha1(question.strip()), _sha1(normalize_question(question))
+
+
+def match_answer(question, lang):
+    """(entry, 'exact' | 'normalized' | 'miss') for a question; exact matches are tried first"""
+    if not settings.ANSWER_BANK_ENABLED:
+        return None, 'miss'
+    exact_hash, normalized_hash = question_hashes(question)
+    entry = PrecomputedAnswer.objects.filter(lang=lang, question_hash=exact_hash).first()
+    if entry:
+        return entry, 'exact'
+    entry = PrecomputedAnswer.objects.filter(lang=lang, normalized_hash=normalized_hash).order_by('-updated_at').first()
+    return entry, 'normalized' if entry else 'miss'
+
+
+def find_answer(question, lang):
+    """The bank entry that answers a chat question, or None"""
+    entry, match = match_answer(question, lang)
+    ANSWER_BANK_LOOKUPS.inc(match=match)
+    return entry
+
+
+def store_answer(question, lang, answer, recommendations, model_name, from_kb=False):
+    """Save one answer to the bank, replacing an existing one for the same question"""
+    exact_hash, normalized_hash = question_hashes(question)
+    PrecomputedAnswer.objects.update_or_create(
+        lang=lang, question_hash=exact_hash,
+        defaults={'question': question.strip(), 'normalized_hash': normalized_hash, 'answer': answer,
+                  'recommendations': recommendations, 'model_name': model_name, 'from_kb': from_kb},
+    )
@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class AssistantConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'assistant'
+
+    def ready(self):
+        from django.conf import settings
+
+        if settings.THREAD_PLAN_ENABLED:
+            from .cpu_plan import apply_startup_plan
+            apply_startup_plan()
@@ -0,0 +1,312 @@
+"""Shared fixtures and helpers for the benchmark management commands."""
+import json
+import os
+import time
+
+# Answers for one complete assessment of an eligible female donor, in the order
+# report_api asks them (follow-ups after a "No" are skipped by the flow, and any
+# answers left over once the flow completes are simply not sent).
+SAMPLE_REPORT_ANSWERS = [
+    "Asha Patel", "29", "58", "Female", "B+", "No", "No", "13.2", "118/76", "No",
+    "Yes", "Dust", "Yes", "Vitamin D", "Yes", "March 2024", "Yes", "Mild asthma",
+    "No", "No", "No", "No", "No",
+]
+
+
+# Chat questions for the loadtest command, grouped by the path they take through
+# answer_chat: answered from the knowledge base, generated by the model, or routed
+# to search.
+LOADTEST_QUESTIONS = {
+    'kb': [
+        "What are the benefits of donating blood?",
+        "Are there any side effects or risks?",
+        "Who can donate blood, am I eligible?",
+        "What is the age limit for donation?",
+        "What is the minimum weight in kg?",
+        "What is the process for donating?",
+    ],
+    'explain': [
+        "What is hemoglobin?",
+        "Why is blood type important?",
+        "What is plasma used for?",
+        "Why do hospitals need platelets?",
+    ],
+    'search': [
+        "Blood banks in Surat",
+        "Find blood bank near me",
+        "Donation camps in Vadodara",
+        "Blood donation centers in Ahmedabad",
+    ],
+}
+
+
+def memory_usage_mb(pid='self'):
+    """
+    Resident (RSS) and proportional (PSS) memory of a process in MB. PSS splits
+    shared pages between the processes mapping them, so it can be summed across
+    workers. Linux only; returns None values elsewhere.
+    """
+    usage = {'rss_mb': None, 'pss_mb': None}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                if line.startswith('Rss:'):
+                    usage['rss_mb'] = round(int(line.split()[1]) / 1024, 1)
+                elif line.startswith('Pss:'):
+                    usage['pss_mb'] = round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return usage
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[rank]
+
+
+def latency_summary(seconds):
+    """p50/p95/p99/mean in milliseconds"""
+    if not seconds:
+        return {'count': 0}
+    return {
+        'count': len(seconds),
+        'mean_ms': round(sum(seconds) / len(seconds) * 1000, 1),
+        'p50_ms': round(percentile(seconds, 50) * 1000, 1),
+        'p95_ms': round(percentile(seconds, 95) * 1000, 1),
+        'p99_ms': round(percentile(seconds, 99) * 1000, 1),
+    }
+
+
+BENCHMARK_PROMPT = 'Answer this question about blood donation in English clearly and accurately.\n\nQuestion: "How long does it take to recover after donating blood?"\n\nAnswer in English:'
+
+
+def generation_worker(mode, model_name, socket_path, requests, ready, start, results):
+    """
+    Child process for benchmark_model_server: load a generator (in-process or
+    remote), report ready, then time `requests` greedy generations.
+    """
+    if mode == 'in-process':
+        from .model_store import load_pipeline
+        generator = load_pipeline(model_name)
+    else:
+        from .model_server import RemoteGenerator
+        generator = RemoteGenerator(model_name, socket_path, timeout=600)
+
+    generator(BENCHMARK_PROMPT, max_length=16, do_sample=False)
+    ready.put(os.getpid())
+    start.wait()
+
+    latencies = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        generator(BENCHMARK_PROMPT, max_length=64, do_sample=False)
+        latencies.append(time.perf_counter() - started)
+    results.put({'pid': os.getpid(), 'latencies': latencies, 'finished': time.time(), **memory_usage_mb()})
+
+
+# Fixed multilingual question set for benchmark_models
+BENCHMARK_QUESTIONS = {
+    'en': ["What is hemoglobin?", "Why is blood type important?"],
+    'hi': ["हीमोग्लोबिन क्या है?", "रक्त समूह क्यों महत्वपूर्ण है?"],
+    'gu': ["હીમોગ્લોબિન શું છે?", "રક્ત જૂથ શા માટે મહત્વપૂર્ણ છે?"],
+}
+
+
+def is_available_locally(model_name):
+    """True for a local model directory, a model in MODEL_PATHS or the model store, or one already in the Hugging Face cache"""
+    from .model_store import is_local
+
+    if os.path.isdir(model_name) or is_local(model_name):
+        return True
+    try:
+        from huggingface_hub import try_to_load_from_cache
+    except ImportError:
+        return False
+    return isinstance(try_to_load_from_cache(model_name, 'config.json'), str)
+
+
+def benchmark_prompts(kinds=('router', 'explain', 'recommendations')):
+    """The chat prompts exactly as the views build them, for every language"""
+    from .views import (
+        BLOOD_DONATION_KB, GENERATION_SETTINGS, build_explain_prompt, build_recommendation_prompt,
+        build_router_prompt,
+    )
+
+    builders = {'router': build_router_prompt, 'explain': build_explain_prompt}
+    prompts = []
+    for lang, questions in BENCHMARK_QUESTIONS.items():
+        for question in questions:
+            for kind in ('router', 'explain'):
+                if kind in kinds:
+                    prompts.append({'kind': kind, 'lang': lang, 'prompt': builders[kind](question, lang),
+                                    'settings': GENERATION_SETTINGS[kind]})
+        if 'recommendations' in kinds:
+            topic = BLOOD_DONATION_KB[lang]['benefits']
+            prompts.append({'kind': 'recommendations', 'lang': lang,
+                            'prompt': build_recommendation_prompt(topic, lang),
+                            'settings': GENERATION_SETTINGS['recommendations']})
+    return prompts
+
+
+def peak_rss_mb():
+    import resource  # Unix only
+
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def model_benchmark_worker(model_name, prompts, thread_counts, repeats, results):
+    """
+    Child process for benchmark_models: load one model from local files only,
+    then run every prompt `repeats` times at each torch thread count.
+    prompts is a list of {'kind', 'lang', 'prompt', 'settings'} dicts.
+    """
+    os.environ['HF_HUB_OFFLINE'] = '1'
+    import torch
+    from transformers import set_seed
+
+    from .model_store import load_pipeline
+
+    try:
+        started = time.perf_counter()
+        generator = load_pipeline(model_name)
+        load_seconds = time.perf_counter() - started
+    except Exception as e:
+        results.put({'error': f"Could not load {model_name}: {e}"})
+        return
+    after_load = memory_usage_mb()
+
+    runs = {}
+    for threads in thread_counts:
+        torch.set_num_threads(threads)
+        set_seed(0)
+        generator(prompts[0]['prompt'], max_length=8, do_sample=False)  # warm-up
+        samples = []
+        for _ in range(repeats):
+            for item in prompts:
+                started = time.perf_counter()
+                output = generator(item['prompt'], **item['settings'])
+                elapsed = time.perf_counter() - started
+                text = output[0]['generated_text']
+                tokens = len(generator.tokenizer(text, add_special_tokens=False)['input_ids'])
+                samples.append((f"{item['kind']}/{item['lang']}", elapsed, tokens))
+        runs[threads] = samples
+
+    results.put({
+        'load_seconds': load_seconds,
+        'rss_after_load_mb': after_load['rss_mb'],
+        'peak_rss_mb': peak_rss_mb(),
+        'runs': runs,
+    })
+
+
+def load_model_benchmarks(path):
+    """Per-model summary from the benchmark_models output file, or {} if there is none"""
+    try:
+        with open(path) as f:
+            return json.load(f).get('summary', {})
+    except (OSError, ValueError):
+        return {}
+
+
+def compiled_benchmark_worker(model_name, prompts, compiled, cache_dir, repeats, results):
+    """
+    Child process for benchmark_compiled: load one model, eager or compiled with
+    its inductor cache in cache_dir. The first pass over the prompt set measures
+    cold start (compiling, or reading compiled graphs from the cache); the next
+    `repeats` passes measure steady-state latency.
+    """
+    os.environ['HF_HUB_OFFLINE'] = '1'
+    if cache_dir:
+        os.environ['TORCHINDUCTOR_CACHE_DIR'] = cache_dir
+    from transformers import set_seed
+
+    from .generation import CompiledGenerator
+    from .model_store import load_pipeline
+
+    try:
+        started = time.perf_counter()
+        generator = load_pipeline(model_name)
+        if compiled:
+            generator = CompiledGenerator(generator, cache_dir=cache_dir)
+        load_seconds = time.perf_counter() - started
+    except Exception as e:
+        results.put({'error': f"Could not load {model_name}: {e}"})
+        return
+
+    def run(item):
+        set_seed(0)
+        started = time.perf_counter()
+        text = generator(item['prompt'], **item['settings'])[0]['generated_text']
+        elapsed = time.perf_counter() - started
+        return elapsed, len(generator.tokenizer(text, add_special_tokens=False)['input_ids'])
+
+    try:
+        started = time.perf_counter()
+        for item in prompts:
+            run(item)
+        first_pass_seconds = time.perf_counter() - started
+
+        samples = []
+        for _ in range(repeats):
+            for item in prompts:
+                samples.append((item['kind'], *run(item)))
+    except Exception as e:
+        results.put({'error': f"Generation failed for {model_name}: {e}"})
+        return
+    results.put({
+        'load_seconds': load_seconds,
+        'first_pass_seconds': first_pass_seconds,
+        'samples': samples,
+        'peak_rss_mb': peak_rss_mb(),
+    })
+
+
+def store_load_worker(model_name, source, ready, release):
+    """
+    Child process for benchmark_model_store: load model_name from the hub cache
+    or the model store, generate once so every weight page is touched, report
+    load time and memory, then stay alive until released so that PSS can be
+    measured with all workers mapping the weights at once.
+    """
+    if source == 'store':
+        # The store has to work without the hub
+        os.environ['HF_HUB_OFFLINE'] = '1'
+    # Imported before timing so that only the model load is measured
+    from transformers import pipeline
+
+    from .model_store import load_pipeline
+
+    def load(name):
+        if source == 'store':
+            return load_pipeline(name)
+        return pipeline("text2text-generation", model=name, max_length=512)
+
+    started = time.perf_counter()
+    try:
+        generator = load(model_name)
+    except Exception as e:
+        ready.put({'pid': os.getpid(), 'error': f"Could not load {model_name} from {source}: {e}"})
+        return
+    load_seconds = time.perf_counter() - started
+    generator(BENCHMARK_PROMPT, max_length=16, do_sample=False)
+    ready.put({'pid': os.getpid(), 'load_seconds': load_seconds, **memory_usage_mb()})
+    release.wait()
+
+
+def planned_generation_worker(model_name, plan, worker_index, requests, ready, start, results):
+    """
+    Child process for benchmark_thread_plans: apply a thread plan (None keeps
+    torch's defaults) before torch is imported, then run generation_worker.
+    """
+    if plan is None:
+        # Inherited from the parent's startup plan
+        for name in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS'):
+            os.environ.pop(name, None)
+    else:
+        from .cpu_plan import apply_thread_plan
+        apply_thread_plan(plan, worker_index)
+    generation_worker('in-process', model_name, None, requests, ready, start, results)
@@ -0,0 +1,68 @@
+"""
+Model selection for chat requests that leave the choice to the server.
+
+Simple questions start on the smallest tier and complex ones on the next; if
+the answer fails the quality check, answer_chat retries one tier up. While the
+inference queue is busy everything stays on the smallest tier, and once it is
+saturated chat answers come from the knowledge base only. Questions in a
+language that has its own model go to that model instead of the tiers.
+
+Queue depth is inference.queue_depth(), which counts the answers in progress
+in this process only. The load-based decisions therefore only take effect
+where one process serves concurrent requests: ASGI (the async endpoint) or
+gunicorn with threaded workers. Under sync workers each process handles one
+request at a time, the depth of other requests is always 0, and only the
+complexity-based routing and escalation apply.
+"""
+from django.conf import settings
+
+from . import inference
+from .metrics import Counter
+
+AUTO_MODEL = 'auto'
+
+CASCADE_DECISIONS = Counter(
+    'assistant_cascade_decisions_total', 'Model routing decisions for chat requests.', ('decision', 'model'),
+)
+CASCADE_ESCALATIONS = Counter(
+    'assistant_cascade_escalations_total', 'Answers regenerated with a larger model.', ('model',),
+)
+
+
+def busy_depth():
+    return settings.CASCADE_BUSY_DEPTH or inference.INFERENCE_WORKERS
+
+
+def saturated_depth():
+    # Below the async endpoint's hard limit, so it degrades before it rejects
+    return settings.CASCADE_SATURATED_DEPTH or inference.INFERENCE_WORKERS + inference.INFERENCE_QUEUE_LIMIT // 2
+
+
+def is_complex(question):
+    return len(question.split()) > settings.CASCADE_SIMPLE_MAX_WORDS or question.count('?') > 1
+
+
+def choose_route(question, requested=None, language_model=None):
+    """
+    Returns {'model', 'escalate_to', 'kb_only', 'decision'}. requested is a
+    valid model the client asked for, or None to let the cascade choose.
+    language_model is the model configured for the question's language, if any.
+    """
+    tiers = settings.MODEL_CASCADE
+    depth = inference.queue_depth() - 1  # other requests in this process, not this one
+    if depth >= saturated_depth():
+        route = {'model': None, 'escalate_to': None, 'kb_only': True, 'decision': 'saturated'}
+    elif requested:
+        route = {'model': requested, 'escalate_to': None, 'kb_only': False, 'decision': 'requested'}
+    elif language_model:
+        route = {'model': language_model, 'escalate_to': None, 'kb_only': False, 'decision': 'language'}
+    elif depth >= busy_depth():
+        route = {'model': tiers[0], 'escalate_to': None, 'kb_only': False, 'decision': 'busy'}
+    elif is_complex(question) and len(tiers) > 1:
+        route = {'model': tiers[1], 'escalate_to': tiers[2] if len(tiers) > 2 else None,
+                 'kb_only': False, 'decision': 'complex'}
+    else:
+        route = {'model': tiers[0], 'escalate_to': tiers[1] if len(tiers) > 1 else None,
+                 'kb_only': False, 'decision': 'simple'}
+    CASCADE_DECISIONS.inc(decision=route['decision'], model=route['model'] or '')
+    return route
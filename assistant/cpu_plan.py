@@ -0,0 +1,142 @@
+"""
+CPU thread planning for model inference. With several web workers on one host,
+each running PyTorch at its default of one intra-op thread per CPU, the threads
+fight over the cores and every generation gets slower as workers are added.
+The plan divides the usable physical cores between the workers, sizes torch's
+thread pools to each worker's share, and can pin each worker to its cores.
+"""
+import logging
+import os
+import sys
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+def usable_cpus():
+    """Logical CPUs this process may run on, in order"""
+    try:
+        return sorted(os.sched_getaffinity(0))
+    except AttributeError:
+        return list(range(os.cpu_count() or 1))
+
+
+def physical_cores(cpus):
+    """
+    Group logical CPUs into physical cores (hyperthread siblings together) using
+    the Linux sysfs topology; elsewhere every logical CPU counts as a core.
+    """
+    cores = {}
+    for cpu in cpus:
+        topology = f"/sys/devices/system/cpu/cpu{cpu}/topology"
+        try:
+            with open(f"{topology}/physical_package_id") as f:
+                package = f.read().strip()
+            with open(f"{topology}/core_id") as f:
+                core = f.read().strip()
+        except OSError:
+            package, core = None, cpu
+        cores.setdefault((package, core), []).append(cpu)
+    return list(cores.values())
+
+
+def inference_concurrency(workers=None, cores=None):
+    """
+    Generations one web worker runs at once: the size of its inference executor
+    and the concurrency its thread plan is sized for. INFERENCE_WORKERS, or by
+    default one per 4 of the worker's physical cores.
+    """
+    if settings.INFERENCE_WORKERS:
+        return settings.INFERENCE_WORKERS
+    workers = max(1, workers or settings.WEB_WORKERS)
+    if cores is None:
+        cores = len(physical_cores(usable_cpus()))
+    return max(1, cores // workers // 4)
+
+
+def plan_threads(workers=None, concurrency=None, cpus=None):
+    """
+    Thread plan for `workers` processes each running up to `concurrency`
+    generations at once. Physical cores are dealt out to the workers in
+    contiguous blocks; each generation gets an equal share of its worker's
+    cores as torch intra-op threads (at least one). Hyperthread siblings stay
+    with their core but are not counted as extra threads.
+    """
+    workers = max(1, workers or settings.WEB_WORKERS)
+    cores = physical_cores(cpus if cpus is not None else usable_cpus())
+    concurrency = max(1, concurrency or inference_concurrency(workers, len(cores)))
+
+    core_sets = []
+    if len(cores) >= workers:
+        per_worker, extra = divmod(len(cores), workers)
+        start = 0
+        for index in range(workers):
+            count = per_worker + (1 if index < extra else 0)
+            core_sets.append(sorted(cpu for core in cores[start:start + count] for cpu in core))
+            start += count
+    else:
+        # More workers than cores: workers share cores round-robin
+        core_sets = [sorted(cores[index % len(cores)]) for index in range(workers)]
+
+    worker_cores = min(len(cores), max(1, len(cores) // workers))
+    return {
+        'cpus': sum(len(core) for core in cores),
+        'physical_cores': len(cores),
+        'workers': workers,
+        'concurrency': concurrency,
+        'intra_op_threads': max(1, worker_cores // concurrency),
+        'inter_op_threads': 1,
+        'pin': settings.THREAD_PLAN_PIN,
+        'core_sets': core_sets,
+    }
+
+
+def apply_thread_plan(plan, worker_index=None):
+    """
+    Apply a plan to this process. The OpenMP/MKL variables only take effect if
+    torch has not been imported yet (true at startup, since models load
+    lazily); torch's own setters are used as well when it already has been.
+    With pinning on and a worker_index, the process is bound to its core set.
+    """
+    threads = str(plan['intra_op_threads'])
+    for name in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS'):
+        os.environ[name] = threads
+    if 'torch' in sys.modules:
+        import torch
+
+        torch.set_num_threads(plan['intra_op_threads'])
+        try:
+            torch.set_num_interop_threads(plan['inter_op_threads'])
+        except RuntimeError:
+            pass  # fixed once torch has run parallel work
+    if plan['pin'] and worker_index is not None and hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, plan['core_sets'][worker_index % len(plan['core_sets'])])
+
+
+def describe_plan(plan, worker_index=None):
+    """One-line summary for the startup log"""
+    text = (f"Thread plan: {plan['workers']} worker(s) x {plan['concurrency']} generation(s) on "
+            f"{plan['physical_cores']} cores ({plan['cpus']} CPUs), {plan['intra_op_threads']} intra-op / "
+            f"{plan['inter_op_threads']} inter-op thread(s)")
+    if plan['pin'] and worker_index is not None:
+        cores = plan['core_sets'][worker_index % len(plan['core_sets'])]
+        text += f", worker {worker_index} pinned to CPUs {','.join(map(str, cores))}"
+    return text
+
+
+_applied = None
+
+
+def apply_startup_plan(worker_index=None):
+    """
+    Plan and apply once per process at startup (AppConfig.ready). The gunicorn
+    post_fork hook calls this first with the worker's slot, which pins it, and
+    writes the plan to gunicorn's log; elsewhere it is only logged at INFO.
+    """
+    global _applied
+    if _applied is None or worker_index is not None:
+        _applied = plan_threads()
+        apply_thread_plan(_applied, worker_index)
+        logger.info(describe_plan(_applied, worker_index))
+    return _applied
@@ -0,0 +1,120 @@
+"""Streaming bulk export of health profiles and rendered reports."""
+import csv
+import json
+import zipfile
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .models import UserHealthProfile
+from .reports import render_report_html
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'jsonl': ('application/x-ndjson', 'jsonl'),
+    'zip': ('application/zip', 'zip'),
+}
+
+# session_id and the legacy question_* columns are intentionally left out
+EXPORT_FIELDS = [
+    'id', 'name', 'age', 'weight', 'gender', 'blood_category',
+    'has_diabetes', 'has_anemia', 'hemoglobin_level', 'blood_pressure', 'had_corona',
+    'has_allergies', 'allergies_details', 'taking_medications', 'medications_details',
+    'donated_before', 'last_donation_date', 'has_chronic_diseases', 'chronic_diseases_details',
+    'has_infectious_disease', 'infectious_disease_details', 'has_tattoo_piercing',
+    'tattoo_piercing_date', 'is_pregnant', 'is_breastfeeding', 'has_surgery_recently',
+    'surgery_details', 'eligibility_status', 'eligibility_reasons', 'completed',
+    'created_at', 'updated_at',
+]
+
+
+def _day_start(value):
+    return timezone.make_aware(datetime.combine(value, time.min))
+
+
+def filter_profiles(start=None, end=None, completed=None, eligibility_status=None):
+    """
+    Profiles created between the start and end dates (inclusive, 'YYYY-MM-DD').
+    Raises ValueError for malformed dates.
+    """
+    queryset = UserHealthProfile.objects.all()
+    if start:
+        start_date = parse_date(start)
+        if start_date is None:
+            raise ValueError(f"Invalid start date: {start}")
+        queryset = queryset.filter(created_at__gte=_day_start(start_date))
+    if end:
+        end_date = parse_date(end)
+        if end_date is None:
+            raise ValueError(f"Invalid end date: {end}")
+        queryset = queryset.filter(created_at__lt=_day_start(end_date + timedelta(days=1)))
+    if completed is not None:
+        queryset = queryset.filter(completed=completed)
+    if eligibility_status:
+        queryset = queryset.filter(eligibility_status=eligibility_status)
+    # Primary-key order keeps chunked iteration cheap and stable
+    return queryset.order_by('pk')
+
+
+def _export_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+class _Echo:
+    """File-like object that hands back whatever is written to it"""
+    def write(self, value):
+        return value
+
+
+class _ChunkBuffer:
+    """Write-only, unseekable buffer that zipfile streams into"""
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def iter_csv(queryset, chunk_size=None):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in queryset.values_list(*EXPORT_FIELDS).iterator(chunk_size=chunk_size or settings.EXPORT_CHUNK_SIZE):
+        yield writer.writerow([_export_value(value) for value in row])
+
+
+def iter_jsonl(queryset, chunk_size=None):
+    for row in queryset.values(*EXPORT_FIELDS).iterator(chunk_size=chunk_size or settings.EXPORT_CHUNK_SIZE):
+        yield json.dumps({key: _export_value(value) for key, value in row.items()}, ensure_ascii=False) + '\n'
+
+
+def iter_zip(queryset, chunk_size=None):
+    """One rendered HTML report per profile, compressed as it streams"""
+    buffer = _ChunkBuffer()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for profile in queryset.iterator(chunk_size=chunk_size or settings.EXPORT_CHUNK_SIZE):
+            archive.writestr(
+                f"eligibility_report_{profile.pk}_{profile.updated_at:%Y%m%d}.html",
+                render_report_html(profile, store=False),
+            )
+            yield buffer.drain()
+    yield buffer.drain()
+
+
+def iter_export(queryset, export_format, chunk_size=None):
+    exporters = {'csv': iter_csv, 'jsonl': iter_jsonl, 'zip': iter_zip}
+    return exporters[export_format](queryset, chunk_size)
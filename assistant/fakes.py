@@ -0,0 +1,76 @@
+"""
+Deterministic stand-ins for the model and search backends, used for load
+testing (BLOOD_ASSISTANT_LOADTEST=1). They answer from the prompt alone, so a
+run is repeatable, and sleep for a configurable time to mimic backend latency.
+"""
+import time
+
+from django.conf import settings
+
+SEARCH_WORDS = ('bank', 'camp', 'near', 'find', 'location', 'center', 'hospital')
+
+
+def _question_in(prompt):
+    """The quoted question inside a router or explain prompt"""
+    start = prompt.find('"', prompt.find('Question'))
+    end = prompt.find('"', start + 1)
+    return prompt[start + 1:end] if start != -1 and end != -1 else prompt
+
+
+class FakeGenerator:
+    """
+    Same call interface as a text2text pipeline. Like max_time in transformers,
+    a max_time shorter than the latency cuts the output short.
+    """
+    batched = False
+
+    def __init__(self, model_name, latency=None):
+        self.model_name = model_name
+        self.latency = settings.FAKE_GENERATION_SECONDS if latency is None else latency
+
+    def __call__(self, inputs, max_time=None, **kwargs):
+        latency = self.latency if max_time is None else min(self.latency, max_time)
+        if latency:
+            time.sleep(latency)
+        if 'Classify user intent' in inputs:
+            question = _question_in(inputs).lower()
+            text = 'SEARCH' if any(word in question for word in SEARCH_WORDS) else 'EXPLAIN'
+        elif 'Q1? Q2? Q3?' in inputs:
+            text = ("How long does recovery take after donating? What should I eat before donating? "
+                    "How often can I donate whole blood?")
+        else:
+            text = (f"This is a placeholder answer about blood donation for: {_question_in(inputs)}. "
+                    "Please ask a doctor or your nearest blood bank for medical advice.")
+        if latency < self.latency:
+            text = text[:int(len(text) * latency / self.latency)]
+        return [{'generated_text': text}]
+
+
+class FakeSearchClient:
+    """Returns a fixed set of Tavily-shaped results for any query"""
+    def __init__(self, latency=None):
+        self.latency = settings.FAKE_SEARCH_SECONDS if latency is None else latency
+
+    def search(self, query, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+        results = [
+            {'title': 'City Civil Hospital Blood Bank', 'url': 'https://example.org/civil-blood-bank',
+             'content': f"Licensed blood bank open 24 hours. Result for: {query}"},
+            {'title': 'Red Cross Blood Center', 'url': 'https://example.org/red-cross-center',
+             'content': 'Voluntary donation center with walk-in donations from 9 am to 5 pm.'},
+            {'title': 'Weekend Blood Donation Camp', 'url': 'https://example.org/weekend-camp',
+             'content': 'Community donation camp held every Sunday at the town hall.'},
+        ]
+        return {'query': query, 'results': results[:kwargs.get('max_results', len(results))]}
+
+
+class FakeTranslator:
+    """Same call interface as a transformers translation pipeline; tags instead of translating"""
+    def __init__(self, latency=None):
+        self.latency = settings.FAKE_GENERATION_SECONDS if latency is None else latency
+
+    def __call__(self, texts, src_lang=None, tgt_lang=None, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+        return [{'translation_text': f"[{tgt_lang}] {text}"} for text in texts]
@@ -0,0 +1,191 @@
+"""Wrappers around text2text pipelines that change how they generate."""
+import os
+import time
+
+from django.conf import settings
+
+from .metrics import Counter
+
+DEADLINE_HITS = Counter(
+    'assistant_deadline_hits_total',
+    'Generator calls stopped (truncated) or not started (skipped) because the request deadline ran out.',
+    ('stage', 'outcome'),
+)
+
+# A call that ran this close to its max_time is taken to have been cut short
+TRUNCATION_TOLERANCE_SECONDS = 0.05
+
+
+class AssistedGenerator:
+    """
+    Assisted (speculative) decoding: a smaller draft model with the same tokenizer
+    proposes tokens and the main model verifies them in one forward pass, so the
+    large model runs fewer decoding steps. Greedy outputs are unchanged. Called
+    like the wrapped pipeline; other attributes (tokenizer, model) pass through.
+    """
+    batched = False  # assisted generation takes one input at a time
+
+    def __init__(self, generator, draft):
+        self.generator = generator
+        self.draft = draft
+
+    def __call__(self, inputs, **kwargs):
+        return self.generator(inputs, assistant_model=self.draft.model, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.generator, name)
+
+
+def cpu_compile_config(**kwargs):
+    """
+    A transformers CompileConfig that also compiles on CPU. generate() only
+    compiles automatically on GPU; the one switch for other devices is the
+    private _compile_all_devices flag (transformers 4.49 and later), so it is
+    checked here rather than set blindly.
+    """
+    from transformers import CompileConfig
+
+    if not hasattr(CompileConfig, '_compile_all_devices'):
+        raise RuntimeError("Compiled generation on CPU needs transformers>=4.49 (CompileConfig._compile_all_devices)")
+    config = CompileConfig(**kwargs)
+    config._compile_all_devices = True
+    return config
+
+
+class CompiledGenerator:
+    """
+    Generation through a torch.compile'd decoder step with a static KV cache.
+    Inputs are padded up to the nearest of `buckets` token lengths so only a few
+    shapes are ever compiled, and inductor keeps its compiled graphs in
+    `cache_dir`, so a restarted worker reuses them instead of compiling again.
+    The first call for each (bucket, max_length, sampling mode) compiles.
+    """
+    batched = False
+
+    def __init__(self, generator, buckets=None, cache_dir=None):
+        # Read by inductor when it compiles, so it only has to be set before the first call
+        os.environ.setdefault('TORCHINDUCTOR_CACHE_DIR', str(cache_dir or settings.COMPILE_CACHE_DIR))
+        self.generator = generator
+        self.buckets = sorted(buckets or settings.COMPILE_INPUT_BUCKETS)
+        config = generator.model.generation_config
+        config.cache_implementation = 'static'
+        config.compile_config = cpu_compile_config(fullgraph=True, dynamic=False)
+
+    def bucket_for(self, length):
+        return next((bucket for bucket in self.buckets if bucket >= length), self.buckets[-1])
+
+    def __call__(self, inputs, **kwargs):
+        import torch
+
+        tokenizer = self.generator.tokenizer
+        length = len(tokenizer(inputs, truncation=True, max_length=self.buckets[-1])['input_ids'])
+        encoded = tokenizer([inputs], padding='max_length', truncation=True, return_tensors='pt',
+                            max_length=self.bucket_for(length))
+        kwargs.setdefault('max_length', 512)  # the pipeline default
+        with torch.inference_mode():
+            output = self.generator.model.generate(**encoded, **kwargs)
+        return [{'generated_text': tokenizer.decode(output[0], skip_special_tokens=True)}]
+
+    def __getattr__(self, name):
+        return getattr(self.generator, name)
+
+
+class DeadlineExceeded(Exception):
+    """Raised by a generator whose share of the deadline ran out before it could start"""
+
+
+class Deadline:
+    """The time budget of one chat request, shared by all of its generator calls"""
+    def __init__(self, seconds=None):
+        self.expires_at = time.monotonic() + (settings.CHAT_DEADLINE_SECONDS if seconds is None else seconds)
+
+    def remaining(self):
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self):
+        return self.remaining() < settings.DEADLINE_MIN_GENERATION_SECONDS
+
+
+def generate_within(deadline, stage, generator, inputs, **kwargs):
+    """
+    Call generator with max_time set to what is left of the deadline, so decoding
+    stops there (transformers' MaxTimeCriteria) and returns the tokens so far.
+    Returns (results, hit): results is None when the call was skipped because
+    too little time was left; hit is True when it was skipped or cut short.
+    """
+    if deadline.expired():
+        DEADLINE_HITS.inc(stage=stage, outcome='skipped')
+        return None, True
+    max_time = deadline.remaining()
+    started = time.monotonic()
+    try:
+        results = generator(inputs, max_time=max_time, **kwargs)
+    except DeadlineExceeded:
+        # e.g. the model server spent the budget queueing the call
+        DEADLINE_HITS.inc(stage=stage, outcome='skipped')
+        return None, True
+    # A call MaxTimeCriteria stopped ran for about max_time, give or take a decoding step
+    hit = time.monotonic() - started >= max_time - TRUNCATION_TOLERANCE_SECONDS
+    if hit:
+        DEADLINE_HITS.inc(stage=stage, outcome='truncated')
+    return results, hit
+
+
+def generated_texts(outputs):
+    """Texts from a pipeline call on a list of inputs (one result, or a list of one, per input)"""
+    return [(output[0] if isinstance(output, list) else output)['generated_text'].strip() for output in outputs]
+
+
+def generate_many(deadline, stage, generator, prompts, batch_size=None, **kwargs):
+    """
+    generate_within for several prompts, batch_size per padded batch call (one
+    per call for generators that take a single input, batched = False). Each
+    call gets what is left of the deadline. Returns (texts, hit); a text is
+    None if its call was skipped.
+    """
+    batched = getattr(generator, 'batched', True)
+    size = (batch_size or settings.CHAT_BATCH_GENERATION_SIZE) if batched else 1
+    texts, hit = [], False
+    for start in range(0, len(prompts), size):
+        chunk = prompts[start:start + size]
+        if batched:
+            results, chunk_hit = generate_within(deadline, stage, generator, chunk, batch_size=len(chunk), **kwargs)
+            texts += generated_texts(results) if results else [None] * len(chunk)
+        else:
+            results, chunk_hit = generate_within(deadline, stage, generator, chunk[0], **kwargs)
+            texts.append(results[0]['generated_text'].strip() if results else None)
+        hit = hit or chunk_hit
+    return texts, hit
+
+
+# Set in each build_answer_bank pool process by init_batch_worker
+_batch_model = None
+_batch_generator = None
+
+
+def init_batch_worker(model_name, plan, slots):
+    """
+    Pool initializer for offline batch generation: take the next worker slot and
+    apply its share of the thread plan before torch is imported. The model loads
+    on the first batch, so a load error reaches the parent instead of killing
+    the initializer over and over.
+    """
+    global _batch_model
+    with slots.get_lock():
+        worker_index = slots.value
+        slots.value += 1
+    from .cpu_plan import apply_thread_plan
+    apply_thread_plan(plan, worker_index)
+    _batch_model = model_name
+
+
+def generate_batch(prompts, batch_size, generation_settings):
+    """Generate for a list of prompts, batch_size at a time (padded); returns the texts in order"""
+    global _batch_generator
+    from transformers import set_seed
+
+    if _batch_generator is None:
+        from .model_store import load_pipeline
+        _batch_generator = load_pipeline(_batch_model)
+    set_seed(0)
+    return generated_texts(_batch_generator(prompts, batch_size=batch_size, **generation_settings))
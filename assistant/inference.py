@@ -0,0 +1,118 @@
+"""Bounded executor for model inference with fail-fast admission control."""
+import asyncio
+import functools
+import math
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from .cpu_plan import inference_concurrency
+from .metrics import Counter, Gauge
+
+
+class InferenceQueueFull(Exception):
+    """Raised when the inference queue is at its limit; carries a Retry-After hint in seconds"""
+    def __init__(self, retry_after):
+        super().__init__(f"Inference queue full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+def available_cpus():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+# The same number the startup thread plan sizes torch's thread pools for
+INFERENCE_WORKERS = inference_concurrency()
+INFERENCE_QUEUE_LIMIT = settings.INFERENCE_QUEUE_LIMIT
+
+_executor = None
+_lock = threading.Lock()
+_in_flight = 0           # running + waiting for a worker thread
+_sync_active = 0         # chat answers computed on web worker threads (sync endpoint)
+_avg_seconds = 2.0       # moving average of task duration, for Retry-After
+
+
+INFERENCE_REJECTED = Counter(
+    'assistant_inference_rejected_total', 'Requests refused because the inference queue was full.',
+)
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=INFERENCE_WORKERS, thread_name_prefix='inference')
+    return _executor
+
+
+def queue_depth():
+    """Chat answers admitted but not yet finished (running + queued), from both endpoints"""
+    return _in_flight + _sync_active
+
+
+@contextmanager
+def sync_generation():
+    """Count an answer computed outside the executor (sync endpoint) in queue_depth()"""
+    global _sync_active
+    with _lock:
+        _sync_active += 1
+    try:
+        yield
+    finally:
+        with _lock:
+            _sync_active -= 1
+
+
+def queue_capacity():
+    return INFERENCE_WORKERS + INFERENCE_QUEUE_LIMIT
+
+
+def _retry_after():
+    waiting = max(_in_flight - INFERENCE_WORKERS + 1, 1)
+    return max(1, math.ceil(waiting * _avg_seconds / INFERENCE_WORKERS))
+
+
+def _run_tracked(func, args, kwargs):
+    global _in_flight, _avg_seconds
+    started = time.monotonic()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        # Pool threads outlive requests, so release their DB connections here
+        close_old_connections()
+        elapsed = time.monotonic() - started
+        with _lock:
+            _in_flight -= 1
+            _avg_seconds = 0.8 * _avg_seconds + 0.2 * elapsed
+
+
+async def run_inference(func, *args, **kwargs):
+    """
+    Run func on the inference pool. Raises InferenceQueueFull instead of queueing
+    past INFERENCE_QUEUE_LIMIT. The slot is released when func finishes, even if
+    the client has gone away, so the count always reflects real work.
+    """
+    global _in_flight
+    with _lock:
+        if _in_flight >= queue_capacity():
+            INFERENCE_REJECTED.inc()
+            raise InferenceQueueFull(_retry_after())
+        _in_flight += 1
+    loop = asyncio.get_running_loop()
+    try:
+        future = loop.run_in_executor(_get_executor(), functools.partial(_run_tracked, func, args, kwargs))
+    except BaseException:
+        with _lock:
+            _in_flight -= 1
+        raise
+    return await future
+
+
+Gauge('assistant_inference_queue_depth', 'Inference requests running or waiting.', queue_depth)
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from assistant.analytics import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild DailyAssessmentRollup rows from the profile table, a window of days "
+        "at a time. Existing rollups in the range are replaced."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help='First day to rebuild (YYYY-MM-DD, default: oldest profile).')
+        parser.add_argument('--end', help='Last day to rebuild (YYYY-MM-DD, default: today).')
+        parser.add_argument('--days-per-chunk', type=int, default=7, help='Days rebuilt per transaction.')
+        parser.add_argument('--chunk-size', type=int, default=500, help='Profiles fetched per round trip.')
+
+    def handle(self, *args, **options):
+        dates = {}
+        for key in ('start', 'end'):
+            try:
+                dates[key] = parse_date(options[key]) if options[key] else None
+            except ValueError:
+                dates[key] = None
+            if options[key] and dates[key] is None:
+                raise CommandError(f"Invalid {key} date: {options[key]}")
+
+        total = 0
+        for window_start, window_end, counted in rebuild_rollups(
+            dates['start'], dates['end'],
+            days_per_chunk=max(1, options['days_per_chunk']),
+            chunk_size=options['chunk_size'],
+        ):
+            total += counted
+            self.stdout.write(f"{window_start} .. {window_end}: {counted} completed assessments")
+        self.stdout.write(self.style.SUCCESS(f"Rollups rebuilt from {total} completed assessments."))
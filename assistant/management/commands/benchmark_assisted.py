@@ -0,0 +1,123 @@
+import json
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from assistant.benchmarks import benchmark_prompts, is_available_locally, latency_summary
+from assistant.views import AVAILABLE_MODELS
+
+
+def draft_acceptance(target, draft, prompt, max_length):
+    """
+    Teacher-forced agreement between the draft and the target's greedy output:
+    (draft tokens that match, target tokens). For greedy assisted decoding this is
+    the share of drafted tokens the target model accepts.
+    """
+    import torch
+
+    inputs = target.tokenizer(prompt, return_tensors='pt')
+    with torch.no_grad():
+        output = target.model.generate(**inputs, max_length=max_length, do_sample=False)
+        logits = draft.model(**inputs, decoder_input_ids=output[:, :-1]).logits
+    labels = output[:, 1:]  # without the decoder start token
+    mask = labels != target.tokenizer.pad_token_id
+    matches = (logits.argmax(-1) == labels) & mask
+    return int(matches.sum()), int(mask.sum())
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare EXPLAIN generation with and without the model's draft_model (assisted "
+        "decoding) on the benchmark prompt set: latency and speedup for greedy and for "
+        "the production sampling settings, the draft acceptance rate, and whether greedy "
+        "outputs are identical."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', nargs='+', help='Target models (default: those with a draft_model).')
+        parser.add_argument('--draft', help='Draft model to use instead of the configured one.')
+        parser.add_argument('--repeats', type=int, default=2)
+        parser.add_argument('--threads', type=int, help='torch thread count (default: torch default).')
+        parser.add_argument('--output', '-o', help='Write the JSON results here as well as to stdout.')
+
+    def handle(self, *args, **options):
+        targets = options['model'] or [name for name, config in AVAILABLE_MODELS.items() if config.get('draft_model')]
+        pairs = []
+        for name in targets:
+            draft = options['draft'] or AVAILABLE_MODELS.get(name, {}).get('draft_model')
+            if not draft:
+                raise CommandError(f"No draft model for {name}; pass --draft.")
+            pairs.append((name, draft))
+        missing = sorted({name for pair in pairs for name in pair if not is_available_locally(name)})
+        if missing:
+            raise CommandError(f"Not available locally: {', '.join(missing)}")
+
+        os.environ['HF_HUB_OFFLINE'] = '1'
+        import torch
+        from transformers import set_seed
+
+        from assistant.model_store import load_pipeline
+
+        if options['threads']:
+            torch.set_num_threads(options['threads'])
+        prompts = benchmark_prompts(kinds=('explain',))
+        sampled_settings = prompts[0]['settings']
+        greedy_settings = {key: value for key, value in sampled_settings.items() if key not in ('temperature', 'top_p')}
+        greedy_settings['do_sample'] = False
+
+        loaded = {}
+
+        def load(name):
+            if name not in loaded:
+                self.stderr.write(f"Loading {name}...")
+                loaded[name] = load_pipeline(name)
+            return loaded[name]
+
+        def timed(generator, prompt, settings, **extra):
+            set_seed(0)
+            started = time.perf_counter()
+            text = generator(prompt, **settings, **extra)[0]['generated_text']
+            return time.perf_counter() - started, text
+
+        results = {'threads': torch.get_num_threads(), 'prompts': len(prompts),
+                   'repeats': options['repeats'], 'models': {}}
+        for name, draft_name in pairs:
+            target, draft = load(name), load(draft_name)
+            timed(target, prompts[0]['prompt'], greedy_settings)
+            timed(target, prompts[0]['prompt'], greedy_settings, assistant_model=draft.model)
+
+            times = {mode: [] for mode in ('greedy', 'greedy_assisted', 'sampled', 'sampled_assisted')}
+            identical = 0
+            accepted = proposed = 0
+            for item in prompts:
+                for _ in range(options['repeats']):
+                    seconds, plain_text = timed(target, item['prompt'], greedy_settings)
+                    times['greedy'].append(seconds)
+                    seconds, assisted_text = timed(target, item['prompt'], greedy_settings, assistant_model=draft.model)
+                    times['greedy_assisted'].append(seconds)
+                    times['sampled'].append(timed(target, item['prompt'], sampled_settings)[0])
+                    times['sampled_assisted'].append(
+                        timed(target, item['prompt'], sampled_settings, assistant_model=draft.model)[0])
+                identical += plain_text == assisted_text
+                matched, total = draft_acceptance(target, draft, item['prompt'], greedy_settings['max_length'])
+                accepted += matched
+                proposed += total
+
+            def speedup(base, assisted):
+                return round(sum(times[base]) / sum(times[assisted]), 3) if sum(times[assisted]) else None
+
+            results['models'][name] = {
+                'draft_model': draft_name,
+                'acceptance_rate': round(accepted / proposed, 4) if proposed else None,
+                'greedy_speedup': speedup('greedy', 'greedy_assisted'),
+                'sampled_speedup': speedup('sampled', 'sampled_assisted'),
+                'greedy_outputs_identical': f"{identical}/{len(prompts)}",
+                'latency': {mode: latency_summary(seconds) for mode, seconds in times.items()},
+            }
+
+        output = json.dumps(results, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output)
+        self.stdout.write(output)
@@ -0,0 +1,90 @@
+import json
+import multiprocessing
+import shutil
+import tempfile
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+
+from assistant.benchmarks import (
+    benchmark_prompts, compiled_benchmark_worker, is_available_locally, latency_summary,
+)
+from assistant.views import AVAILABLE_MODELS
+
+
+def summarize_samples(samples):
+    by_kind = defaultdict(list)
+    for kind, seconds, _ in samples:
+        by_kind[kind].append(seconds)
+    total_seconds = sum(seconds for _, seconds, _ in samples)
+    total_tokens = sum(tokens for _, _, tokens in samples)
+    return {
+        'tokens_per_second': round(total_tokens / total_seconds, 2) if total_seconds else None,
+        'latency': latency_summary([seconds for _, seconds, _ in samples]),
+        'by_kind': {kind: latency_summary(seconds) for kind, seconds in sorted(by_kind.items())},
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare eager and compiled (COMPILED_GENERATION) generation on the chat prompt "
+        "set. Each mode runs in a fresh process: eager, compiled with an empty compile "
+        "cache (cold start) and compiled again with the cache the cold run filled (a "
+        "worker restart). Reports load time, first-pass time and steady-state latency."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--models', nargs='+', help='Models to benchmark (default: all cached locally).')
+        parser.add_argument('--repeats', type=int, default=3, help='Steady-state runs of the full prompt set.')
+        parser.add_argument('--output', '-o', help='Write the JSON results here as well as to stdout.')
+
+    def handle(self, *args, **options):
+        models = options['models'] or [name for name in AVAILABLE_MODELS if is_available_locally(name)]
+        missing = [name for name in models if not is_available_locally(name)]
+        if missing:
+            raise CommandError(f"Not available locally: {', '.join(missing)}")
+        if not models:
+            raise CommandError("No models from AVAILABLE_MODELS are in the local cache; pass --models.")
+
+        prompts = benchmark_prompts()
+        context = multiprocessing.get_context('spawn')
+        results = {'prompts': len(prompts), 'repeats': options['repeats'], 'models': {}}
+
+        for model_name in models:
+            cache_dir = tempfile.mkdtemp(prefix='compile-cache-')
+            runs = {}
+            try:
+                for mode, compiled in (('eager', False), ('compiled_cold', True), ('compiled_warm', True)):
+                    self.stderr.write(f"Benchmarking {model_name} ({mode})...")
+                    queue = context.Queue()
+                    process = context.Process(target=compiled_benchmark_worker, args=(
+                        model_name, prompts, compiled, cache_dir if compiled else None, options['repeats'], queue,
+                    ))
+                    process.start()
+                    outcome = queue.get()
+                    process.join()
+                    if 'error' in outcome:
+                        raise CommandError(outcome['error'])
+                    runs[mode] = {
+                        'load_seconds': round(outcome['load_seconds'], 2),
+                        'first_pass_seconds': round(outcome['first_pass_seconds'], 2),
+                        'peak_rss_mb': outcome['peak_rss_mb'],
+                        **summarize_samples(outcome['samples']),
+                    }
+            finally:
+                shutil.rmtree(cache_dir, ignore_errors=True)
+
+            eager, compiled = runs['eager'], runs['compiled_warm']
+            results['models'][model_name] = {
+                'steady_state_speedup': round(eager['latency']['mean_ms'] / compiled['latency']['mean_ms'], 3),
+                'cold_start_overhead_seconds': round(
+                    runs['compiled_cold']['first_pass_seconds'] - eager['first_pass_seconds'], 2),
+                'warm_start_overhead_seconds': round(compiled['first_pass_seconds'] - eager['first_pass_seconds'], 2),
+                'runs': runs,
+            }
+
+        output = json.dumps(results, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output)
+        self.stdout.write(output)
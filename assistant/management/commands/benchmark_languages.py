@@ -0,0 +1,86 @@
+import json
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from assistant.benchmarks import BENCHMARK_QUESTIONS, benchmark_prompts, is_available_locally, latency_summary
+from assistant.views import AVAILABLE_MODELS
+
+
+def tokenizer_cost(tokenizer, texts):
+    """Tokens per character and the share of tokens that are <unk>, over texts"""
+    ids = [tokenizer(text, add_special_tokens=False)['input_ids'] for text in texts]
+    tokens = sum(len(token_ids) for token_ids in ids)
+    characters = sum(len(text) for text in texts)
+    unknown = sum(token_ids.count(tokenizer.unk_token_id) for token_ids in ids) if tokenizer.unk_token_id is not None else 0
+    return {
+        'tokens_per_char': round(tokens / characters, 3) if characters else None,
+        'unk_rate': round(unknown / tokens, 3) if tokens else None,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "For each model and language (en, hi, gu): tokenizer cost of the benchmark "
+        "questions and chat prompts (tokens per character, <unk> rate) and latency of "
+        "the explain and recommendation prompts. Use it to decide which models get "
+        "`languages` in AVAILABLE_MODELS."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--models', nargs='+', help='Models to compare (default: all available locally).')
+        parser.add_argument('--repeats', type=int, default=2)
+        parser.add_argument('--tokenizer-only', action='store_true', help='Skip generation.')
+        parser.add_argument('--output', '-o', help='Write the JSON results here as well as to stdout.')
+
+    def handle(self, *args, **options):
+        models = options['models'] or [name for name in AVAILABLE_MODELS if is_available_locally(name)]
+        missing = [name for name in models if not is_available_locally(name)]
+        if missing:
+            raise CommandError(f"Not available locally: {', '.join(missing)}")
+        if not models:
+            raise CommandError("No models from AVAILABLE_MODELS are available locally; pass --models.")
+
+        os.environ['HF_HUB_OFFLINE'] = '1'
+        from transformers import AutoTokenizer, set_seed
+
+        from assistant.model_store import load_pipeline, model_source
+
+        prompts = benchmark_prompts(kinds=('explain', 'recommendations'))
+        results = {'repeats': options['repeats'], 'models': {}}
+        for model_name in models:
+            self.stderr.write(f"Benchmarking {model_name}...")
+            if options['tokenizer_only']:
+                generator, tokenizer = None, AutoTokenizer.from_pretrained(model_source(model_name))
+            else:
+                generator = load_pipeline(model_name)
+                tokenizer = generator.tokenizer
+                generator(prompts[0]['prompt'], max_length=8, do_sample=False)  # warm-up
+
+            languages = {}
+            for lang, questions in BENCHMARK_QUESTIONS.items():
+                lang_prompts = [item for item in prompts if item['lang'] == lang]
+                entry = {
+                    'questions': tokenizer_cost(tokenizer, questions),
+                    'prompts': tokenizer_cost(tokenizer, [item['prompt'] for item in lang_prompts]),
+                }
+                if generator is not None:
+                    seconds, outputs = [], []
+                    for _ in range(options['repeats']):
+                        for item in lang_prompts:
+                            set_seed(0)
+                            started = time.perf_counter()
+                            outputs.append(generator(item['prompt'], **item['settings'])[0]['generated_text'])
+                            seconds.append(time.perf_counter() - started)
+                    entry['latency'] = latency_summary(seconds)
+                    entry['outputs'] = tokenizer_cost(tokenizer, [text for text in outputs if text])
+                    entry['sample_output'] = outputs[0][:200] if outputs else ''
+                languages[lang] = entry
+            results['models'][model_name] = languages
+
+        output = json.dumps(results, indent=2, ensure_ascii=False)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output)
+        self.stdout.write(output)
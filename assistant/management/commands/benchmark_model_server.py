@@ -0,0 +1,98 @@
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from assistant.benchmarks import generation_worker, latency_summary, memory_usage_mb
+from assistant.views import AVAILABLE_MODELS
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare N worker processes that each load the model in-process against N thin "
+        "clients sharing one model server: total memory (RSS/PSS) and throughput."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', default='google/flan-t5-base', choices=list(AVAILABLE_MODELS))
+        parser.add_argument('--workers', type=int, default=4, help='Simulated web worker processes.')
+        parser.add_argument('--requests', type=int, default=10, help='Generations per worker.')
+        parser.add_argument('--modes', nargs='+', default=['in-process', 'server'], choices=['in-process', 'server'])
+        parser.add_argument('--output', '-o', help='Write the JSON results here as well as to stdout.')
+
+    def handle(self, *args, **options):
+        results = {'model': options['model'], 'workers': options['workers'],
+                   'requests_per_worker': options['requests'], 'modes': {}}
+        for mode in options['modes']:
+            self.stderr.write(f"Running {mode} benchmark...")
+            if mode == 'server':
+                results['modes'][mode] = self._run_with_server(options)
+            else:
+                results['modes'][mode] = self._run_workers(mode, options, None)
+
+        output = json.dumps(results, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output)
+        self.stdout.write(output)
+
+    def _run_with_server(self, options):
+        socket_path = os.path.join(tempfile.mkdtemp(prefix='model-server-'), 'model.sock')
+        server = subprocess.Popen([
+            sys.executable, os.path.join(settings.BASE_DIR, 'manage.py'), 'run_model_server',
+            '--socket', socket_path, '--preload', options['model'],
+        ])
+        try:
+            deadline = time.monotonic() + 600
+            while not os.path.exists(socket_path):
+                if server.poll() is not None:
+                    raise CommandError("Model server exited before it was ready.")
+                if time.monotonic() > deadline:
+                    raise CommandError("Model server did not start within 10 minutes.")
+                time.sleep(0.5)
+            result = self._run_workers('server', options, socket_path)
+            result['server_memory'] = memory_usage_mb(server.pid)
+            server_pss = result['server_memory']['pss_mb'] or 0
+            result['total_pss_mb'] = round(result['total_pss_mb'] + server_pss, 1)
+            return result
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+    def _run_workers(self, mode, options, socket_path):
+        context = multiprocessing.get_context('spawn')
+        ready, results, start = context.Queue(), context.Queue(), context.Event()
+        processes = [
+            context.Process(target=generation_worker, args=(
+                mode, options['model'], socket_path, options['requests'], ready, start, results,
+            ))
+            for _ in range(options['workers'])
+        ]
+        load_started = time.monotonic()
+        for process in processes:
+            process.start()
+        for _ in processes:
+            ready.get(timeout=1800)
+        load_seconds = time.monotonic() - load_started
+
+        started = time.time()
+        start.set()
+        workers = [results.get(timeout=3600) for _ in processes]
+        elapsed = max(worker['finished'] for worker in workers) - started
+        for process in processes:
+            process.join()
+
+        latencies = [latency for worker in workers for latency in worker['latencies']]
+        return {
+            'startup_seconds': round(load_seconds, 2),
+            'throughput_rps': round(len(latencies) / elapsed, 3) if elapsed > 0 else None,
+            'latency': latency_summary(latencies),
+            'worker_memory': [{'rss_mb': w['rss_mb'], 'pss_mb': w['pss_mb']} for w in workers],
+            'total_pss_mb': round(sum(w['pss_mb'] or 0 for w in workers), 1),
+        }
@@ -0,0 +1,65 @@
+import json
+import multiprocessing
+
+from django.core.management.base import BaseCommand, CommandError
+
+from assistant.benchmarks import memory_usage_mb, store_load_worker
+from assistant.model_store import is_stored
+
+
+class Command(BaseCommand):
+    help = (
+        "Start N worker processes that each load a model, first from the Hugging Face "
+        "cache and then from the model store (offline, memory-mapped safetensors), and "
+        "report per-worker load time and RSS/PSS plus the total PSS with all of them alive."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', default='google/flan-t5-base')
+        parser.add_argument('--workers', type=int, default=4, help='Worker processes per source.')
+        parser.add_argument('--sources', nargs='+', default=['hub', 'store'], choices=['hub', 'store'])
+        parser.add_argument('--output', '-o', help='Write the JSON results here as well as to stdout.')
+
+    def handle(self, *args, **options):
+        if 'store' in options['sources'] and not is_stored(options['model']):
+            raise CommandError(f"{options['model']} is not in the model store; run build_model_store first.")
+
+        results = {'model': options['model'], 'workers': options['workers'], 'sources': {}}
+        for source in options['sources']:
+            self.stderr.write(f"Loading {options['workers']} workers from {source}...")
+            results['sources'][source] = self._run_workers(source, options)
+
+        output = json.dumps(results, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output)
+        self.stdout.write(output)
+
+    def _run_workers(self, source, options):
+        context = multiprocessing.get_context('spawn')
+        ready, release = context.Queue(), context.Event()
+        processes = [
+            context.Process(target=store_load_worker, args=(options['model'], source, ready, release))
+            for _ in range(options['workers'])
+        ]
+        for process in processes:
+            process.start()
+        try:
+            workers = [ready.get(timeout=1800) for _ in processes]
+            errors = [worker['error'] for worker in workers if 'error' in worker]
+            if errors:
+                raise CommandError(errors[0])
+            # Measured while every worker is still mapping the weights
+            shared = [memory_usage_mb(worker['pid']) for worker in workers]
+        finally:
+            release.set()
+            for process in processes:
+                process.join()
+
+        return {
+            'load_seconds': [round(worker['load_seconds'], 2) for worker in workers],
+            'worker_memory': [
+                {'rss_mb': memory['rss_mb'], 'pss_mb': memory['pss_mb']} for memory in shared
+            ],
+            'total_pss_mb': round(sum(memory['pss_mb'] or 0 for memory in shared), 1),
+        }
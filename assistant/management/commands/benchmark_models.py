@@ -0,0 +1,102 @@
+import json
+import multiprocessing
+from collections import defaultdict
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from assistant.benchmarks import (
+    benchmark_prompts, is_available_locally, latency_summary, model_benchmark_worker,
+)
+from assistant.inference import available_cpus
+from assistant.views import AVAILABLE_MODELS
+
+
+def summarize_run(threads, samples):
+    by_prompt = defaultdict(list)
+    for label, seconds, _ in samples:
+        by_prompt[label].append(seconds)
+    total_seconds = sum(seconds for _, seconds, _ in samples)
+    total_tokens = sum(tokens for _, _, tokens in samples)
+    return {
+        'threads': threads,
+        'tokens_per_second': round(total_tokens / total_seconds, 2) if total_seconds else None,
+        'latency': latency_summary([seconds for _, seconds, _ in samples]),
+        'by_prompt': {label: latency_summary(seconds) for label, seconds in sorted(by_prompt.items())},
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark each locally available model on the chat prompt templates (router, "
+        "explain, recommendations) in English, Hindi and Gujarati: load time, peak RSS, "
+        "tokens/sec, latency per prompt and thread-count sensitivity. Results are written "
+        "to MODEL_BENCHMARK_FILE and shown by /api/models/."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--models', nargs='+', help='Models to benchmark (default: all cached locally).')
+        parser.add_argument('--threads', nargs='+', type=int,
+                            help='Torch thread counts to compare (default: 1, half and all usable CPUs).')
+        parser.add_argument('--repeats', type=int, default=3, help='Runs of the full prompt set per thread count.')
+        parser.add_argument('--output', '-o', default=str(settings.MODEL_BENCHMARK_FILE))
+
+    def handle(self, *args, **options):
+        models = options['models'] or [name for name in AVAILABLE_MODELS if is_available_locally(name)]
+        missing = [name for name in models if not is_available_locally(name)]
+        if missing:
+            raise CommandError(f"Not available locally: {', '.join(missing)}")
+        if not models:
+            raise CommandError("No models from AVAILABLE_MODELS are in the local cache; pass --models.")
+
+        cpus = available_cpus()
+        thread_counts = sorted(set(options['threads'] or [1, max(1, cpus // 2), cpus]))
+        prompts = benchmark_prompts()
+        context = multiprocessing.get_context('spawn')
+
+        results = {
+            'generated_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'cpus': cpus,
+            'thread_counts': thread_counts,
+            'repeats': options['repeats'],
+            'prompts': len(prompts),
+            'models': {},
+            'summary': {},
+        }
+        for model_name in models:
+            self.stderr.write(f"Benchmarking {model_name}...")
+            queue = context.Queue()
+            # A fresh process per model, so load time and peak RSS are its own
+            process = context.Process(target=model_benchmark_worker, args=(
+                model_name, prompts, thread_counts, options['repeats'], queue,
+            ))
+            process.start()
+            outcome = queue.get()
+            process.join()
+            if 'error' in outcome:
+                self.stderr.write(outcome['error'])
+                results['models'][model_name] = {'error': outcome['error']}
+                continue
+
+            runs = [summarize_run(threads, outcome['runs'][threads]) for threads in thread_counts]
+            best = max(runs, key=lambda run: run['tokens_per_second'] or 0)
+            results['models'][model_name] = {
+                'load_seconds': round(outcome['load_seconds'], 2),
+                'rss_after_load_mb': outcome['rss_after_load_mb'],
+                'peak_rss_mb': outcome['peak_rss_mb'],
+                'runs': runs,
+            }
+            explain = [s for label, s, _ in outcome['runs'][best['threads']] if label.startswith('explain/')]
+            results['summary'][model_name] = {
+                'load_seconds': round(outcome['load_seconds'], 2),
+                'peak_rss_mb': outcome['peak_rss_mb'],
+                'best_threads': best['threads'],
+                'tokens_per_second': best['tokens_per_second'],
+                'explain_latency': latency_summary(explain),
+            }
+
+        output = json.dumps(results, indent=2, ensure_ascii=False)
+        with open(options['output'], 'w') as f:
+            f.write(output)
+        self.stdout.write(output)
@@ -0,0 +1,51 @@
+import json
+import statistics
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from assistant.benchmarks import SAMPLE_REPORT_ANSWERS
+
+
+class Command(BaseCommand):
+    help = (
+        "Walk one full /api/report/ assessment in-process and print the number of "
+        "database queries per request. All writes are rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--json', action='store_true', help='Print machine-readable output.')
+
+    def handle(self, *args, **options):
+        client = Client(SERVER_NAME='localhost')
+        url = reverse('report_api')
+        counts = []
+
+        with transaction.atomic():
+            for answer in [''] + SAMPLE_REPORT_ANSWERS:
+                with CaptureQueriesContext(connection) as queries:
+                    response = client.post(url, json.dumps({'answer': answer}), content_type='application/json')
+                data = response.json()
+                counts.append(len(queries))
+                if data.get('completed') or 'error' in data:
+                    break
+            transaction.set_rollback(True)
+
+        answers = counts[1:]
+        result = {
+            'start_queries': counts[0],
+            'answers': len(answers),
+            'queries_per_answer': answers,
+            'mean_queries_per_answer': round(statistics.mean(answers), 2) if answers else 0,
+            'completed': bool(data.get('completed')),
+        }
+        if options['json']:
+            self.stdout.write(json.dumps(result))
+            return
+        self.stdout.write(f"Start request: {result['start_queries']} queries")
+        self.stdout.write(f"Answers: {result['answers']} (completed: {result['completed']})")
+        self.stdout.write(f"Queries per answer: {answers}")
+        self.stdout.write(f"Mean queries per answer: {result['mean_queries_per_answer']}")
@@ -0,0 +1,68 @@
+import json
+import multiprocessing
+import time
+
+from django.core.management.base import BaseCommand
+
+from assistant.benchmarks import latency_summary, planned_generation_worker
+from assistant.cpu_plan import plan_threads
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare generation throughput of N worker processes under torch's default "
+        "threading, the thread plan, and the thread plan with pinned core sets, for "
+        "several worker counts."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', default='google/flan-t5-base')
+        parser.add_argument('--workers', nargs='+', type=int, default=[1, 2, 4], help='Worker counts to try.')
+        parser.add_argument('--plans', nargs='+', default=['default', 'planned', 'pinned'],
+                            choices=['default', 'planned', 'pinned'])
+        parser.add_argument('--requests', type=int, default=10, help='Generations per worker.')
+        parser.add_argument('--output', '-o', help='Write the JSON results here as well as to stdout.')
+
+    def handle(self, *args, **options):
+        results = {'model': options['model'], 'requests_per_worker': options['requests'], 'runs': []}
+        for workers in options['workers']:
+            for name in options['plans']:
+                plan = None if name == 'default' else dict(plan_threads(workers, concurrency=1), pin=name == 'pinned')
+                self.stderr.write(f"Running {workers} worker(s) with the {name} plan...")
+                run = self._run_workers(workers, plan, options)
+                run.update({'workers': workers, 'plan': name,
+                            'intra_op_threads': plan['intra_op_threads'] if plan else None})
+                results['runs'].append(run)
+
+        output = json.dumps(results, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output)
+        self.stdout.write(output)
+
+    def _run_workers(self, workers, plan, options):
+        context = multiprocessing.get_context('spawn')
+        ready, results, start = context.Queue(), context.Queue(), context.Event()
+        processes = [
+            context.Process(target=planned_generation_worker, args=(
+                options['model'], plan, index, options['requests'], ready, start, results,
+            ))
+            for index in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        for _ in processes:
+            ready.get(timeout=1800)
+
+        started = time.time()
+        start.set()
+        outcomes = [results.get(timeout=3600) for _ in processes]
+        elapsed = max(outcome['finished'] for outcome in outcomes) - started
+        for process in processes:
+            process.join()
+
+        latencies = [latency for outcome in outcomes for latency in outcome['latencies']]
+        return {
+            'throughput_rps': round(len(latencies) / elapsed, 3) if elapsed > 0 else None,
+            'latency': latency_summary(latencies),
+        }
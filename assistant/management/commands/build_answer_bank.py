@@ -0,0 +1,180 @@
+import multiprocessing
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from assistant.answer_bank import question_hashes, store_answer
+from assistant.benchmarks import is_available_locally
+from assistant.cpu_plan import describe_plan, physical_cores, plan_threads, usable_cpus
+from assistant.generation import generate_batch, init_batch_worker
+from assistant.models import PrecomputedAnswer
+from assistant.translation import translate, translate_many
+from assistant.views import (
+    DEFAULT_MODEL, GENERATION_SETTINGS, build_explain_prompt, build_recommendation_prompt,
+    build_router_prompt, clean_generated_answer, detect_language, get_knowledge_base_answer, is_concept_question,
+    is_contextless_question, is_poor_answer, language_model, parse_recommendations,
+)
+
+LANGUAGES = ('en', 'hi', 'gu')
+
+
+def read_corpus(path):
+    """
+    (lang, question) pairs from a file with one question per line, optionally as
+    `lang<TAB>question`; otherwise the language is detected. Blank lines and
+    lines starting with # are skipped, as are repeated questions.
+    """
+    items = []
+    with open(path, encoding='utf-8') as f:
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            if '\t' in line:
+                lang, question = (part.strip() for part in line.split('\t', 1))
+                if lang not in LANGUAGES:
+                    raise CommandError(f"{path}:{number}: unsupported language {lang!r}")
+            else:
+                lang, question = detect_language(line), line
+            items.append((lang, question))
+    return list(dict.fromkeys(items))
+
+
+class BatchPool:
+    """Worker processes for one model, each with its share of the cores from the thread plan"""
+    def __init__(self, model_name, plan, batch_size):
+        context = multiprocessing.get_context('spawn')
+        self.batch_size = batch_size
+        self.pool = context.Pool(plan['workers'], initializer=init_batch_worker,
+                                 initargs=(model_name, plan, context.Value('i', 0)))
+
+    def generate(self, prompts, kind):
+        """Texts for prompts in order; similar lengths are batched together to cut padding"""
+        order = sorted(range(len(prompts)), key=lambda index: len(prompts[index]))
+        chunks = [order[start:start + self.batch_size] for start in range(0, len(order), self.batch_size)]
+        texts = [None] * len(prompts)
+        results = self.pool.starmap(generate_batch, [
+            ([prompts[index] for index in chunk], self.batch_size, GENERATION_SETTINGS[kind]) for chunk in chunks
+        ])
+        for chunk, outputs in zip(chunks, results):
+            for index, text in zip(chunk, outputs):
+                texts[index] = text
+        return texts
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
+
+
+class Command(BaseCommand):
+    help = (
+        "Build the precomputed answer bank served by chat: read a question corpus "
+        "(English, Hindi, Gujarati), answer it with the production chat prompts in "
+        "batches across worker processes, and store the answers and recommendations. "
+        "Questions the router sends to search and answers that fail the quality check "
+        "are left to live chat."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('corpus', help='Questions, one per line, optionally as "lang<TAB>question".')
+        parser.add_argument('--model', help='Model for every question (default: the language model for '
+                                            'Hindi/Gujarati when local, otherwise DEFAULT_MODEL).')
+        parser.add_argument('--workers', type=int,
+                            help='Generation processes (default: one per 4 physical cores).')
+        parser.add_argument('--batch-size', type=int, default=8)
+        parser.add_argument('--pin', action='store_true', help='Pin each worker to its cores.')
+        parser.add_argument('--force', action='store_true', help='Regenerate questions already in the bank.')
+
+    def handle(self, *args, **options):
+        items = read_corpus(options['corpus'])
+        if not options['force']:
+            stored = {(lang, question_hash) for lang, question_hash in
+                      PrecomputedAnswer.objects.values_list('lang', 'question_hash')}
+            items = [(lang, question) for lang, question in items
+                     if (lang, question_hashes(question)[0]) not in stored]
+        contextless = [item for item in items if is_contextless_question(item[1], item[0])]
+        items = [item for item in items if item not in contextless]
+
+        by_model = {}
+        for lang, question in items:
+            model_name = options['model'] or language_model(lang) or DEFAULT_MODEL
+            by_model.setdefault(model_name, []).append((lang, question))
+        missing = [name for name in by_model if not is_available_locally(name)]
+        if missing:
+            raise CommandError(f"Not available locally: {', '.join(missing)}")
+
+        workers = options['workers'] or max(1, len(physical_cores(usable_cpus())) // 4)
+        plan = plan_threads(workers=workers, concurrency=1)
+        plan['pin'] = plan['pin'] or options['pin']
+        self.stderr.write(describe_plan(plan))
+        os.environ['HF_HUB_OFFLINE'] = '1'  # inherited by the workers
+
+        self.stdout.write(f"{len(items)} question(s) to answer, {len(contextless)} contextless skipped")
+        for model_name, model_items in by_model.items():
+            started = time.perf_counter()
+            pool = BatchPool(model_name, plan, options['batch_size'])
+            try:
+                counts = self.answer(pool, model_name, model_items)
+            finally:
+                pool.close()
+            self.stdout.write(
+                f"{model_name}: stored {counts['stored']} ({counts['kb']} from the knowledge base), "
+                f"skipped {counts['search']} search and {counts['poor']} poor answers "
+                f"in {time.perf_counter() - started:.1f}s")
+
+    def answer(self, pool, model_name, items):
+        """Route, answer and recommend for one model's questions the way answer_chat does"""
+        # Pivot mode answers Hindi/Gujarati in English unless the model speaks the language
+        native = model_name in {language_model(lang) for lang in ('hi', 'gu')}
+        entries = []
+        for lang, question in items:
+            pivot = settings.PIVOT_TRANSLATION and lang != 'en' and not native
+            entries.append({
+                'lang': lang, 'question': question, 'answer_lang': 'en' if pivot else lang,
+                'prompt_question': translate(question, lang, 'en') if pivot else question,
+            })
+        counts = {'stored': 0, 'kb': 0, 'search': 0, 'poor': 0}
+
+        # Router, for questions without concept keywords
+        unsure = [entry for entry in entries if not is_concept_question(entry['question'], entry['lang'])]
+        intents = pool.generate([build_router_prompt(entry['prompt_question'], entry['answer_lang'])
+                                 for entry in unsure], 'router')
+        search = {id(entry) for entry, intent in zip(unsure, intents) if 'SEARCH' in intent.upper()}
+        counts['search'] = len(search)
+        entries = [entry for entry in entries if id(entry) not in search]
+
+        # Answers: the knowledge base first, then generation
+        generate = []
+        for entry in entries:
+            entry['kb_answer'] = get_knowledge_base_answer(entry['question'], entry['lang'])
+            if entry['kb_answer']:
+                entry['topic'] = entry['kb_answer']
+                if entry['answer_lang'] != entry['lang']:
+                    entry['topic'] = translate(entry['kb_answer'], entry['lang'], 'en')
+            else:
+                generate.append(entry)
+        texts = pool.generate([build_explain_prompt(entry['prompt_question'], entry['answer_lang'])
+                               for entry in generate], 'explain')
+        for entry, text in zip(generate, texts):
+            entry['topic'] = clean_generated_answer(text, entry['answer_lang'])
+        poor = {id(entry) for entry in generate if is_poor_answer(entry['topic'])}
+        counts['poor'] = len(poor)
+        entries = [entry for entry in entries if id(entry) not in poor]
+
+        texts = pool.generate([build_recommendation_prompt(entry['topic'], entry['answer_lang'])
+                               for entry in entries], 'recommendations')
+        for entry, text in zip(entries, texts):
+            recommendations = parse_recommendations(text, entry['answer_lang'])
+            answer = entry['kb_answer'] or entry['topic']
+            if entry['answer_lang'] != entry['lang']:
+                if entry['kb_answer']:
+                    recommendations = translate_many(recommendations, 'en', entry['lang'])
+                else:
+                    answer, *recommendations = translate_many([answer, *recommendations], 'en', entry['lang'])
+            store_answer(entry['question'], entry['lang'], answer, recommendations, model_name,
+                         from_kb=bool(entry['kb_answer']))
+            counts['stored'] += 1
+            counts['kb'] += bool(entry['kb_answer'])
+        return counts
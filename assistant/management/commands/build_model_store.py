@@ -0,0 +1,55 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from assistant.model_store import build_store_entry, is_stored, store_path
+from assistant.views import AVAILABLE_MODELS
+
+
+def directory_size_mb(path):
+    return round(sum(f.stat().st_size for f in path.rglob('*') if f.is_file()) / 1024 / 1024, 1)
+
+
+class Command(BaseCommand):
+    help = (
+        "Lay out the AVAILABLE_MODELS weights in the local model store (MODEL_STORE_DIR) "
+        "as safetensors, with their tokenizers, so workers load them memory-mapped "
+        "and offline. Models already in the store are skipped unless --force."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--models', nargs='+', help='Models to store (default: all of AVAILABLE_MODELS).')
+        parser.add_argument('--store-dir', default=str(settings.MODEL_STORE_DIR))
+        parser.add_argument('--force', action='store_true', help='Rebuild models that are already stored.')
+        parser.add_argument('--list', action='store_true', help='Only show what is in the store.')
+
+    def handle(self, *args, **options):
+        models = options['models'] or list(AVAILABLE_MODELS)
+        store_dir = options['store_dir']
+
+        if options['list']:
+            for model_name in models:
+                path = store_path(model_name, store_dir)
+                status = f"{directory_size_mb(path)} MB" if is_stored(model_name, store_dir) else 'missing'
+                self.stdout.write(f"{model_name:<32} {status:>12}  {path}")
+            return
+
+        failed = []
+        for model_name in models:
+            if is_stored(model_name, store_dir) and not options['force']:
+                self.stdout.write(f"{model_name}: already stored")
+                continue
+            self.stderr.write(f"Storing {model_name}...")
+            started = time.perf_counter()
+            try:
+                path = build_store_entry(model_name, store_dir)
+            except Exception as e:
+                self.stderr.write(f"Could not store {model_name}: {e}")
+                failed.append(model_name)
+                continue
+            self.stdout.write(self.style.SUCCESS(
+                f"{model_name}: {directory_size_mb(path)} MB in {time.perf_counter() - started:.1f}s -> {path}"
+            ))
+        if failed:
+            raise CommandError(f"Failed to store: {', '.join(failed)}")
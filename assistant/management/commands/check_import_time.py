@@ -0,0 +1,82 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# What every web worker and management command imports before serving anything
+STARTUP_CODE = "import django; django.setup(); import blood_assistant.urls"
+
+
+def measure_imports():
+    """
+    Import the URLconf in a fresh interpreter under -X importtime.
+    Returns {module: (self_us, cumulative_us)}.
+    """
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', 'blood_assistant.settings'))
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', STARTUP_CODE],
+        cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+    )
+    if completed.returncode != 0:
+        raise CommandError(f"Startup import failed:\n{completed.stderr[-2000:]}")
+    modules = {}
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the cold import time of the project (django.setup() plus the URLconf) "
+        "with -X importtime, and fail if it exceeds IMPORT_TIME_BUDGET_MS or pulls in "
+        "any of IMPORT_FORBIDDEN_MODULES (the model and search stacks)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=3, help='Runs to take the fastest of.')
+        parser.add_argument('--budget-ms', type=float, default=settings.IMPORT_TIME_BUDGET_MS)
+        parser.add_argument('--top', type=int, default=10, help='Slowest top-level packages to list.')
+        parser.add_argument('--json', action='store_true', help='Print machine-readable output.')
+
+    def handle(self, *args, **options):
+        runs = [measure_imports() for _ in range(max(1, options['repeat']))]
+        total_ms = [sum(self_us for self_us, _ in run.values()) / 1000 for run in runs]
+        fastest = runs[total_ms.index(min(total_ms))]
+
+        packages = {}
+        for name, (self_us, _) in fastest.items():
+            package = name.split('.')[0]
+            packages[package] = packages.get(package, 0) + self_us
+        forbidden = sorted(
+            name for name in settings.IMPORT_FORBIDDEN_MODULES
+            if any(module == name or module.startswith(name + '.') for module in fastest)
+        )
+        result = {
+            'total_ms': round(min(total_ms), 1),
+            'budget_ms': options['budget_ms'],
+            'modules': len(fastest),
+            'forbidden_imported': forbidden,
+            'slowest_packages': [
+                {'package': package, 'ms': round(us / 1000, 1)}
+                for package, us in sorted(packages.items(), key=lambda item: -item[1])[:options['top']]
+            ],
+        }
+
+        if options['json']:
+            self.stdout.write(json.dumps(result, indent=2))
+        else:
+            self.stdout.write(f"Startup imports: {result['total_ms']} ms "
+                              f"(budget {result['budget_ms']} ms, {result['modules']} modules)")
+            for entry in result['slowest_packages']:
+                self.stdout.write(f"  {entry['ms']:>8} ms  {entry['package']}")
+
+        if forbidden:
+            raise CommandError(f"Heavy modules imported at startup: {', '.join(forbidden)}")
+        if result['total_ms'] > options['budget_ms']:
+            raise CommandError(f"Startup imports took {result['total_ms']} ms, over the {options['budget_ms']} ms budget")
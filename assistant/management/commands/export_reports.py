@@ -0,0 +1,43 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from assistant.exports import EXPORT_FORMATS, filter_profiles, iter_export
+
+
+class Command(BaseCommand):
+    help = "Export profiles as CSV/JSONL, or rendered reports as a ZIP, for a date range."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help='First creation date to include (YYYY-MM-DD).')
+        parser.add_argument('--end', help='Last creation date to include (YYYY-MM-DD).')
+        parser.add_argument('--format', choices=list(EXPORT_FORMATS), default='csv')
+        parser.add_argument('--status', help='Only this eligibility status, e.g. "Eligible".')
+        parser.add_argument('--completed-only', action='store_true', help='Skip unfinished assessments.')
+        parser.add_argument('--chunk-size', type=int, help='Rows fetched per database round trip.')
+        parser.add_argument('--output', '-o', help='Output file (default: stdout).')
+
+    def handle(self, *args, **options):
+        try:
+            queryset = filter_profiles(
+                options['start'], options['end'],
+                True if options['completed_only'] else None,
+                options['status'],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        chunks = iter_export(queryset, options['format'], options['chunk_size'])
+        if options['output']:
+            mode = 'wb' if options['format'] == 'zip' else 'w'
+            encoding = None if mode == 'wb' else 'utf-8'
+            with open(options['output'], mode, encoding=encoding, newline='' if encoding else None) as out:
+                for chunk in chunks:
+                    out.write(chunk)
+            self.stderr.write(self.style.SUCCESS(f"Wrote {options['output']}"))
+        elif options['format'] == 'zip':
+            for chunk in chunks:
+                sys.stdout.buffer.write(chunk)
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
@@ -0,0 +1,191 @@
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from http.cookiejar import CookieJar
+
+from django.core.management.base import BaseCommand, CommandError
+
+from assistant.benchmarks import LOADTEST_QUESTIONS, SAMPLE_REPORT_ANSWERS, latency_summary
+
+DEFAULT_MIX = 'kb=4,explain=3,search=1,report=2'
+
+
+def parse_mix(value):
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in LOADTEST_QUESTIONS and name != 'report':
+            raise CommandError(f"Unknown scenario '{name}' in --mix.")
+        try:
+            mix[name] = float(weight or 1)
+        except ValueError:
+            raise CommandError(f"Invalid weight for '{name}' in --mix.")
+    if not any(mix.values()):
+        raise CommandError("--mix needs at least one scenario with a positive weight.")
+    return mix
+
+
+class VirtualUser:
+    """One browser: its own cookie jar, so each report scenario is a real session"""
+    def __init__(self, base_url, timeout):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(CookieJar()))
+
+    def post(self, path, payload):
+        request = urllib.request.Request(
+            self.base_url + path, data=json.dumps(payload).encode('utf-8'),
+            headers={'Content-Type': 'application/json'}, method='POST',
+        )
+        started = time.perf_counter()
+        try:
+            with self.opener.open(request, timeout=self.timeout) as response:
+                status, headers, body = response.status, response.headers, response.read()
+        except urllib.error.HTTPError as e:
+            status, headers, body = e.code, e.headers, e.read()
+        except (urllib.error.URLError, OSError):
+            status, headers, body = 0, {}, b''
+        elapsed = time.perf_counter() - started
+        queries = headers.get('X-DB-Queries') if headers else None
+        try:
+            data = json.loads(body) if body else {}
+        except ValueError:
+            data = {}
+        return status, elapsed, int(queries) if queries is not None else None, data
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive a running server with a weighted mix of chat questions (KB hits, EXPLAIN, "
+        "SEARCH) and complete /api/report/ assessments, then print throughput, latency "
+        "percentiles and DB queries per request as JSON. Start the server with "
+        "BLOOD_ASSISTANT_LOADTEST=1 to use the fake model and search backends."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help='Base URL of the server under test.')
+        parser.add_argument('--concurrency', type=int, default=8, help='Simultaneous virtual users.')
+        parser.add_argument('--duration', type=float, default=30, help='Seconds to generate load for.')
+        parser.add_argument('--mix', default=DEFAULT_MIX, help=f"Scenario weights (default: {DEFAULT_MIX}).")
+        parser.add_argument('--chat-path', default='/api/chat/', help='Chat endpoint, e.g. /api/chat/async/.')
+        parser.add_argument('--timeout', type=float, default=60, help='Per-request timeout in seconds.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', '-o', help='Write the JSON results here as well as to stdout.')
+
+    def handle(self, *args, **options):
+        mix = parse_mix(options['mix'])
+        self.options = options
+        self.samples = defaultdict(list)     # request label -> [(status, seconds, queries)]
+        self.scenarios = defaultdict(list)   # scenario -> [(ok, seconds)]
+        self.lock = threading.Lock()
+
+        deadline = time.monotonic() + options['duration']
+        threads = [
+            threading.Thread(target=self._user_loop, args=(mix, random.Random(options['seed'] + i), deadline))
+            for i in range(options['concurrency'])
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        results = self._summarize(mix, elapsed)
+        if results['requests']['with_query_count'] == 0:
+            self.stderr.write("No X-DB-Queries headers seen: is the server running with BLOOD_ASSISTANT_LOADTEST=1?")
+        output = json.dumps(results, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output)
+        self.stdout.write(output)
+
+    def _user_loop(self, mix, rng, deadline):
+        names, weights = list(mix), list(mix.values())
+        while time.monotonic() < deadline:
+            scenario = rng.choices(names, weights)[0]
+            user = VirtualUser(self.options['url'], self.options['timeout'])
+            started = time.perf_counter()
+            if scenario == 'report':
+                ok = self._run_report(user)
+            else:
+                ok = self._run_chat(user, scenario, rng)
+            with self.lock:
+                self.scenarios[scenario].append((ok, time.perf_counter() - started))
+
+    def _record(self, label, status, seconds, queries):
+        with self.lock:
+            self.samples[label].append((status, seconds, queries))
+
+    def _run_chat(self, user, scenario, rng):
+        question = rng.choice(LOADTEST_QUESTIONS[scenario])
+        status, seconds, queries, _ = user.post(self.options['chat_path'], {'question': question})
+        self._record(f"chat_{scenario}", status, seconds, queries)
+        return status == 200
+
+    def _run_report(self, user):
+        """Start an assessment and answer until the report is ready"""
+        status, seconds, queries, data = user.post('/api/report/', {'answer': ''})
+        self._record('report_start', status, seconds, queries)
+        if status != 200:
+            return False
+        for answer in SAMPLE_REPORT_ANSWERS:
+            status, seconds, queries, data = user.post('/api/report/', {'answer': answer})
+            self._record('report_answer', status, seconds, queries)
+            if status != 200:
+                return False
+            if data.get('completed'):
+                return True
+        return False
+
+    def _summarize(self, mix, elapsed):
+        total = sum(len(samples) for samples in self.samples.values())
+        counted = 0
+        endpoints = {}
+        for label, samples in sorted(self.samples.items()):
+            statuses = defaultdict(int)
+            for status, _, _ in samples:
+                statuses[str(status)] += 1
+            queries = [q for _, _, q in samples if q is not None]
+            counted += len(queries)
+            endpoints[label] = {
+                'requests': len(samples),
+                'throughput_rps': round(len(samples) / elapsed, 2),
+                'errors': sum(1 for status, _, _ in samples if status != 200),
+                'status_counts': dict(statuses),
+                'latency': latency_summary([seconds for status, seconds, _ in samples if status == 200]),
+                'db_queries': {
+                    'mean': round(sum(queries) / len(queries), 2),
+                    'max': max(queries),
+                } if queries else None,
+            }
+        return {
+            'config': {
+                'url': self.options['url'],
+                'chat_path': self.options['chat_path'],
+                'concurrency': self.options['concurrency'],
+                'duration_seconds': self.options['duration'],
+                'mix': mix,
+                'seed': self.options['seed'],
+            },
+            'elapsed_seconds': round(elapsed, 2),
+            'requests': {
+                'total': total,
+                'throughput_rps': round(total / elapsed, 2) if elapsed else None,
+                'with_query_count': counted,
+            },
+            'endpoints': endpoints,
+            'scenarios': {
+                name: {
+                    'runs': len(runs),
+                    'failed': sum(1 for ok, _ in runs if not ok),
+                    'latency': latency_summary([seconds for ok, seconds in runs if ok]),
+                }
+                for name, runs in sorted(self.scenarios.items())
+            },
+        }
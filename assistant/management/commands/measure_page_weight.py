@@ -0,0 +1,101 @@
+import json
+import re
+import urllib.error
+import urllib.request
+from urllib.parse import urljoin, urlparse
+
+from django.core.management.base import BaseCommand, CommandError
+
+ASSET_PATTERN = re.compile(r'<(?:script[^>]+src|link[^>]+href)="([^"]+)"')
+
+
+def fetch(url, headers):
+    request = urllib.request.Request(url, headers=headers)
+    try:
+        with urllib.request.urlopen(request, timeout=30) as response:
+            return response.status, response.headers, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers, e.read()
+
+
+def is_cacheable(headers):
+    """True if the browser can reuse the response without asking the server again"""
+    cache_control = (headers.get('Cache-Control') or '').lower()
+    if 'no-cache' in cache_control or 'no-store' in cache_control:
+        return False
+    match = re.search(r'max-age=(\d+)', cache_control)
+    return bool(match and int(match.group(1)) > 0)
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure bytes transferred for a first and a repeat visit to a page on a running "
+        "server, the way a browser with an HTTP cache would load it (compressed, with "
+        "conditional requests). Third-party assets are listed but not fetched."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000/', help='Page to measure.')
+        parser.add_argument('--encoding', default='br, gzip', help='Accept-Encoding to send.')
+        parser.add_argument('--json', action='store_true', help='Print machine-readable output.')
+
+    def handle(self, *args, **options):
+        page_url = options['url']
+        base = urlparse(page_url)
+        headers = {'Accept-Encoding': options['encoding']}
+
+        try:
+            status, page_headers, body = fetch(page_url, headers)
+        except urllib.error.URLError as e:
+            raise CommandError(f"Could not fetch {page_url}: {e}")
+        if status != 200:
+            raise CommandError(f"{page_url} returned {status}")
+
+        # Asset references are read from the uncompressed page
+        plain = fetch(page_url, {})[2].decode('utf-8', 'replace')
+        local, external = [], []
+        for ref in dict.fromkeys(ASSET_PATTERN.findall(plain)):
+            url = urljoin(page_url, ref)
+            (local if urlparse(url).netloc == base.netloc else external).append(url)
+
+        resources = [{'url': page_url, 'bytes': len(body), 'headers': page_headers}]
+        for url in local:
+            _, asset_headers, asset_body = fetch(url, headers)
+            resources.append({'url': url, 'bytes': len(asset_body), 'headers': asset_headers})
+
+        first = sum(resource['bytes'] for resource in resources)
+        repeat = 0
+        for resource in resources:
+            if is_cacheable(resource['headers']):
+                continue
+            validators = {}
+            if resource['headers'].get('ETag'):
+                validators['If-None-Match'] = resource['headers']['ETag']
+            if resource['headers'].get('Last-Modified'):
+                validators['If-Modified-Since'] = resource['headers']['Last-Modified']
+            repeat += len(fetch(resource['url'], dict(headers, **validators))[2])
+
+        result = {
+            'url': page_url,
+            'first_visit_bytes': first,
+            'repeat_visit_bytes': repeat,
+            'resources': [
+                {
+                    'url': resource['url'],
+                    'bytes': resource['bytes'],
+                    'content_encoding': resource['headers'].get('Content-Encoding'),
+                    'cache_control': resource['headers'].get('Cache-Control'),
+                }
+                for resource in resources
+            ],
+            'external_not_measured': external,
+        }
+        if options['json']:
+            self.stdout.write(json.dumps(result, indent=2))
+            return
+        self.stdout.write(f"First visit: {first} bytes, repeat visit: {repeat} bytes")
+        for entry in result['resources']:
+            self.stdout.write(f"  {entry['bytes']:>8}  {entry['content_encoding'] or 'identity':<8}  "
+                              f"{entry['cache_control'] or '-':<40}  {entry['url']}")
+        for url in external:
+            self.stdout.write(f"  (external) {url}")
@@ -0,0 +1,30 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from assistant.cpu_plan import describe_plan, plan_threads
+
+
+class Command(BaseCommand):
+    help = (
+        "Show the CPU thread plan for a deployment: torch intra/inter-op threads per "
+        "generation and the core set each worker would be pinned to."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, help='Web worker processes (default: WEB_WORKERS).')
+        parser.add_argument('--concurrency', type=int,
+                            help='Generations at once per worker (default: INFERENCE_WORKERS, '
+                                 'or one per 4 of its physical cores).')
+        parser.add_argument('--json', action='store_true', help='Print machine-readable output.')
+
+    def handle(self, *args, **options):
+        plan = plan_threads(workers=options['workers'], concurrency=options['concurrency'])
+        if options['json']:
+            self.stdout.write(json.dumps(plan, indent=2))
+            return
+        self.stdout.write(describe_plan(plan))
+        for index, cpus in enumerate(plan['core_sets']):
+            self.stdout.write(f"  worker {index}: CPUs {','.join(map(str, cpus))}")
+        if not plan['pin']:
+            self.stdout.write("  (pinning is off; set THREAD_PLAN_PIN=1 to bind workers to these sets)")
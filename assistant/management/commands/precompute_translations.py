@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from assistant.models import Translation
+from assistant.translation import machine_translate, store_translation, text_hash
+from assistant.views import BLOOD_DONATION_KB, get_language_response_templates
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the Translation table used by pivot mode (PIVOT_TRANSLATION) ahead of time: "
+        "the hand-written knowledge-base and template pairs in both directions, and "
+        "frequent English answers from a file, translated with TRANSLATION_MODEL."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--file', help='English texts to translate, one per line (e.g. frequent answers).')
+        parser.add_argument('--langs', nargs='+', default=['hi', 'gu'])
+        parser.add_argument('--batch-size', type=int, default=16)
+        parser.add_argument('--force', action='store_true', help='Re-translate texts already in the table.')
+
+    def handle(self, *args, **options):
+        for lang in options['langs']:
+            if lang not in BLOOD_DONATION_KB:
+                raise CommandError(f"Unsupported language: {lang}")
+
+        # The knowledge base and templates are already written in every language
+        pairs = 0
+        english_templates = get_language_response_templates('en')
+        for lang in options['langs']:
+            entries = [(BLOOD_DONATION_KB['en'][key], text) for key, text in BLOOD_DONATION_KB[lang].items()]
+            entries += zip(english_templates['recommendations'], get_language_response_templates(lang)['recommendations'])
+            for english, translated in entries:
+                store_translation(english, translated, 'en', lang, 'kb')
+                store_translation(translated, english, lang, 'en', 'kb')
+                pairs += 2
+        self.stdout.write(f"Stored {pairs} knowledge-base translations")
+
+        if not options['file']:
+            return
+        with open(options['file'], encoding='utf-8') as f:
+            texts = list(dict.fromkeys(line.strip() for line in f if line.strip()))
+        for lang in options['langs']:
+            todo = texts
+            if not options['force']:
+                done = set(Translation.objects.filter(
+                    source_lang='en', target_lang=lang, source_hash__in=[text_hash(text) for text in texts],
+                ).values_list('source_hash', flat=True))
+                todo = [text for text in texts if text_hash(text) not in done]
+            for start in range(0, len(todo), options['batch_size']):
+                batch = todo[start:start + options['batch_size']]
+                for english, translated in zip(batch, machine_translate(batch, 'en', lang)):
+                    store_translation(english, translated, 'en', lang, 'precomputed')
+            self.stdout.write(f"{lang}: translated {len(todo)} of {len(texts)} texts")
@@ -0,0 +1,128 @@
+import time
+from datetime import timedelta
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from assistant.analytics import delete_assessments
+from assistant.models import UserHealthProfile
+from assistant.reports import delete_report_pdfs
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete abandoned (incomplete) anonymous assessments older than the retention "
+        "age and the expired sessions that pointed at them, in small batches, along "
+        "with their cached PDF reports. Assessments of registered users are kept."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=settings.ASSESSMENT_RETENTION_DAYS,
+            help='Delete incomplete anonymous profiles not updated for this many days.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.ASSESSMENT_PURGE_BATCH_SIZE,
+            help='Rows deleted per transaction. Keep small so locks stay short.',
+        )
+        parser.add_argument(
+            '--sleep', type=float, default=0.0,
+            help='Seconds to pause between batches to leave room for live traffic.',
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Only count what would be deleted.',
+        )
+
+    def handle(self, *args, **options):
+        self.verbosity = options['verbosity']
+        batch_size = max(1, options['batch_size'])
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        stale = UserHealthProfile.objects.filter(completed=False, user__isnull=True, updated_at__lt=cutoff)
+
+        if options['dry_run']:
+            self.stdout.write(f"Would delete {stale.count()} incomplete anonymous profiles older than {cutoff:%Y-%m-%d %H:%M}.")
+            if self._sessions_in_db():
+                expired = Session.objects.filter(expire_date__lt=timezone.now()).count()
+                self.stdout.write(f"Would delete {expired} expired sessions.")
+            return
+
+        deleted, elapsed = self._purge_profiles(stale, batch_size, options['sleep'])
+        self._report('profiles', deleted, elapsed)
+
+        if self._sessions_in_db():
+            sessions, profiles, elapsed = self._purge_expired_sessions(batch_size, options['sleep'])
+            self._report('expired sessions', sessions, elapsed)
+            self._report('profiles of expired sessions', profiles, elapsed)
+
+    def _purge_profiles(self, queryset, batch_size, pause):
+        """Delete matching profiles by primary key, one short transaction per batch."""
+        deleted = 0
+        started = time.monotonic()
+        while True:
+            ids = list(queryset.order_by('pk').values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                break
+            count = delete_assessments(UserHealthProfile.objects.filter(pk__in=ids))
+            delete_report_pdfs(ids)
+            deleted += count
+            self._progress('profiles', deleted, started)
+            if pause:
+                time.sleep(pause)
+        return deleted, time.monotonic() - started
+
+    def _purge_expired_sessions(self, batch_size, pause):
+        """
+        Delete expired sessions and any incomplete anonymous profile they were holding.
+        The profile key lives inside the encoded session data, so each batch is decoded.
+        """
+        store = import_module(settings.SESSION_ENGINE).SessionStore()
+        sessions_deleted = 0
+        profiles_deleted = 0
+        started = time.monotonic()
+        while True:
+            batch = list(
+                Session.objects.filter(expire_date__lt=timezone.now())
+                .order_by('expire_date')
+                .values_list('session_key', 'session_data')[:batch_size]
+            )
+            if not batch:
+                break
+            keys = [key for key, _ in batch]
+            profile_ids = [
+                profile_id for profile_id in (store.decode(data).get('health_profile_id') for _, data in batch)
+                if profile_id
+            ]
+            pks = []
+            with transaction.atomic():
+                if profile_ids:
+                    profiles = UserHealthProfile.objects.filter(
+                        session_id__in=profile_ids, completed=False, user__isnull=True
+                    )
+                    pks = list(profiles.values_list('pk', flat=True))
+                    profiles_deleted += delete_assessments(UserHealthProfile.objects.filter(pk__in=pks))
+                count, _ = Session.objects.filter(session_key__in=keys).delete()
+                sessions_deleted += count
+            delete_report_pdfs(pks)
+            self._progress('expired sessions', sessions_deleted, started)
+            if pause:
+                time.sleep(pause)
+        return sessions_deleted, profiles_deleted, time.monotonic() - started
+
+    def _sessions_in_db(self):
+        return settings.SESSION_ENGINE.rsplit('.', 1)[-1] in ('db', 'cached_db')
+
+    def _progress(self, label, count, started):
+        if self.verbosity >= 2:
+            elapsed = time.monotonic() - started
+            self.stdout.write(f"  {label}: {count} deleted ({count / elapsed if elapsed else 0:.0f} rows/s)")
+
+    def _report(self, label, count, elapsed):
+        rate = count / elapsed if elapsed > 0 else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {count} {label} in {elapsed:.2f}s ({rate:.0f} rows/s)"
+        ))
@@ -0,0 +1,49 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from assistant.cpu_plan import apply_thread_plan, describe_plan, plan_threads
+from assistant.model_server import ModelServer
+from assistant.views import AVAILABLE_MODELS, DEFAULT_MODEL
+
+
+class Command(BaseCommand):
+    help = (
+        "Serve text generation for all web workers from one process over a Unix socket. "
+        "Point workers at it with MODEL_SERVER_SOCKET."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--socket', default=settings.MODEL_SERVER_SOCKET,
+                            help='Unix socket path (default: MODEL_SERVER_SOCKET).')
+        parser.add_argument('--preload', nargs='*', default=[DEFAULT_MODEL],
+                            help='Models to load before accepting requests.')
+        parser.add_argument('--concurrency', type=int, default=settings.MODEL_SERVER_CONCURRENCY,
+                            help='Concurrent generations per model.')
+
+    def handle(self, *args, **options):
+        socket_path = options['socket']
+        if not socket_path:
+            raise CommandError("Pass --socket or set MODEL_SERVER_SOCKET.")
+        unknown = [name for name in options['preload'] if name not in AVAILABLE_MODELS]
+        if unknown:
+            raise CommandError(f"Unknown models: {', '.join(unknown)}")
+        if settings.THREAD_PLAN_ENABLED:
+            # This is the only process generating, `concurrency` generations per model
+            plan = plan_threads(workers=1, concurrency=options['concurrency'])
+            apply_thread_plan(plan)
+            self.stdout.write(describe_plan(plan))
+
+        drafts = {
+            name: config['draft_model'] for name, config in AVAILABLE_MODELS.items()
+            if config.get('draft_model') and settings.ASSISTED_DECODING
+        }
+        server = ModelServer(socket_path, AVAILABLE_MODELS, concurrency=max(1, options['concurrency']), drafts=drafts)
+        for model_name in options['preload']:
+            server.registry.get(model_name)
+        self.stdout.write(self.style.SUCCESS(f"Model server listening on {socket_path}"))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
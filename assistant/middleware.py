@@ -0,0 +1,23 @@
+from django.db import connection
+
+
+class QueryCountMiddleware:
+    """
+    Adds an X-DB-Queries header with the number of SQL queries the request ran
+    (including session saves). Enabled in load-test mode only.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        count = 0
+
+        def counter(execute, sql, params, many, context):
+            nonlocal count
+            count += 1
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(counter):
+            response = self.get_response(request)
+        response['X-DB-Queries'] = str(count)
+        return response
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:23
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assistant', '0002_userhealthprofile_allergies_details_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='userhealthprofile',
+            index=models.Index(fields=['completed', 'updated_at'], name='profile_completed_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:26
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assistant', '0003_userhealthprofile_purge_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='userhealthprofile',
+            index=models.Index(fields=['created_at'], name='profile_created_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assistant', '0004_userhealthprofile_created_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userhealthprofile',
+            name='in_rollups',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.CreateModel(
+            name='DailyAssessmentRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('dimension', models.CharField(max_length=30)),
+                ('value', models.CharField(max_length=50)),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['day', 'dimension', 'value'],
+                'constraints': [models.UniqueConstraint(fields=('day', 'dimension', 'value'), name='unique_daily_rollup')],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assistant', '0005_daily_assessment_rollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Translation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_lang', models.CharField(max_length=5)),
+                ('target_lang', models.CharField(max_length=5)),
+                ('source_hash', models.CharField(max_length=40)),
+                ('source_text', models.TextField()),
+                ('text', models.TextField()),
+                ('origin', models.CharField(choices=[('kb', 'Knowledge base'), ('precomputed', 'Precomputed'), ('runtime', 'Runtime')], default='runtime', max_length=12)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('source_lang', 'target_lang', 'source_hash'), name='unique_translation')],
+            },
+        ),
+    ]
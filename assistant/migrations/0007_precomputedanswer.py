@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assistant', '0006_translation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PrecomputedAnswer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('lang', models.CharField(max_length=5)),
+                ('question', models.TextField()),
+                ('question_hash', models.CharField(max_length=40)),
+                ('normalized_hash', models.CharField(max_length=40)),
+                ('answer', models.TextField()),
+                ('recommendations', models.JSONField(default=list)),
+                ('model_name', models.CharField(max_length=100)),
+                ('from_kb', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['lang', 'normalized_hash'], name='answer_bank_normalized_idx')],
+                'constraints': [models.UniqueConstraint(fields=('lang', 'question_hash'), name='unique_precomputed_answer')],
+            },
+        ),
+    ]
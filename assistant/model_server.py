@@ -0,0 +1,154 @@
+"""
+Optional out-of-process model server.
+
+One process holds a single copy of each model and serves generation requests
+over a Unix domain socket; web workers use RemoteGenerator, which has the same
+call interface as a transformers text2text pipeline.
+
+Wire format: 4-byte big-endian length followed by a UTF-8 JSON document, both ways.
+A request carries the wall-clock time it was sent, so a max_time budget also
+covers the time it waits for a free slot on the server.
+"""
+import json
+import os
+import socket
+import socketserver
+import struct
+import threading
+import time
+
+from django.conf import settings
+
+from .generation import AssistedGenerator, CompiledGenerator, DeadlineExceeded
+from .model_store import load_pipeline
+
+_HEADER = struct.Struct('>I')
+
+
+def _recv_exact(sock, size):
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("Model server connection closed")
+        data.extend(chunk)
+    return bytes(data)
+
+
+def send_message(sock, payload):
+    data = json.dumps(payload).encode('utf-8')
+    sock.sendall(_HEADER.pack(len(data)) + data)
+
+
+def recv_message(sock):
+    (size,) = _HEADER.unpack(_recv_exact(sock, _HEADER.size))
+    return json.loads(_recv_exact(sock, size).decode('utf-8'))
+
+
+class RemoteGenerator:
+    """Drop-in replacement for a local pipeline that forwards calls to the model server"""
+    batched = False
+
+    def __init__(self, model_name, socket_path=None, timeout=None):
+        self.model_name = model_name
+        self.socket_path = socket_path or settings.MODEL_SERVER_SOCKET
+        self.timeout = timeout or settings.MODEL_SERVER_TIMEOUT
+
+    def __call__(self, inputs, **kwargs):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(self.timeout)
+            sock.connect(self.socket_path)
+            send_message(sock, {'model': self.model_name, 'inputs': inputs, 'kwargs': kwargs,
+                                'sent_at': time.time()})
+            response = recv_message(sock)
+        if response.get('deadline_exceeded'):
+            raise DeadlineExceeded(response['error'])
+        if 'error' in response:
+            raise RuntimeError(f"Model server error: {response['error']}")
+        return response['result']
+
+
+class ModelRegistry:
+    """
+    Loads each model once and limits concurrent generations per model.
+    drafts maps a model to the draft model used for its assisted decoding.
+    Each model loads under its own lock, so a slow load never blocks requests
+    for models that are already loaded.
+    """
+    def __init__(self, concurrency=1, drafts=None):
+        self.concurrency = concurrency
+        self.drafts = drafts or {}
+        self.models = {}
+        self.slots = {}
+        self.loading = {}
+        self.lock = threading.Lock()
+
+    def get(self, model_name):
+        with self.lock:
+            loading = self.loading.setdefault(model_name, threading.Lock())
+        with loading:
+            if model_name not in self.models:
+                print(f"Model server loading: {model_name}...")
+                generator = load_pipeline(model_name)
+                if settings.COMPILED_GENERATION:
+                    generator = CompiledGenerator(generator)
+                elif model_name in self.drafts:
+                    draft, _ = self.get(self.drafts[model_name])
+                    generator = AssistedGenerator(generator, draft)
+                self.slots[model_name] = threading.Semaphore(self.concurrency)
+                self.models[model_name] = generator
+        return self.models[model_name], self.slots[model_name]
+
+    def generate(self, model_name, inputs, kwargs, sent_at=None):
+        """
+        Run one generation. max_time is the client's budget as of sent_at, so the
+        time spent loading and waiting for a slot is taken off it first.
+        """
+        generator, slot = self.get(model_name)
+        with slot:
+            if sent_at is not None and kwargs.get('max_time') is not None:
+                max_time = kwargs['max_time'] - max(0.0, time.time() - sent_at)
+                if max_time < settings.DEADLINE_MIN_GENERATION_SECONDS:
+                    raise DeadlineExceeded("Deadline passed while waiting for the model")
+                kwargs = dict(kwargs, max_time=max_time)
+            return generator(inputs, **kwargs)
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        try:
+            request = recv_message(self.request)
+        except (ConnectionError, ValueError):
+            return
+        model_name = request.get('model')
+        if model_name not in self.server.allowed_models:
+            send_message(self.request, {'error': f"Unknown model: {model_name}"})
+            return
+        try:
+            result = self.server.registry.generate(
+                model_name, request['inputs'], request.get('kwargs', {}), request.get('sent_at')
+            )
+            send_message(self.request, {'result': result})
+        except DeadlineExceeded as e:
+            send_message(self.request, {'error': str(e), 'deadline_exceeded': True})
+        except Exception as e:
+            print(f"Model server generation error: {e}")
+            send_message(self.request, {'error': str(e)})
+
+
+class ModelServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path, allowed_models, concurrency=1, drafts=None):
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        super().__init__(socket_path, _Handler)
+        os.chmod(socket_path, 0o660)
+        self.socket_path = socket_path
+        self.allowed_models = set(allowed_models)
+        self.registry = ModelRegistry(concurrency, drafts)
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
@@ -0,0 +1,72 @@
+"""
+Local model store: one directory per AVAILABLE_MODELS entry under MODEL_STORE_DIR
+with the weights as safetensors plus the tokenizer and configs (built by
+`python manage.py build_model_store`).
+
+Loading from the store needs no network and no hub cache lookups, and safetensors
+weights are memory-mapped rather than read into each process: every worker on
+the host maps the same page-cache pages, so the weights are held in memory once.
+"""
+import os
+import shutil
+from pathlib import Path
+
+from django.conf import settings
+
+
+def store_path(model_name, store_dir=None):
+    """google/flan-t5-base -> <MODEL_STORE_DIR>/google--flan-t5-base"""
+    return Path(store_dir or settings.MODEL_STORE_DIR) / model_name.replace('/', '--')
+
+
+def is_stored(model_name, store_dir=None):
+    path = store_path(model_name, store_dir)
+    return (path / 'config.json').exists() and any(path.glob('*.safetensors'))
+
+
+def is_local(model_name):
+    """True if model_name loads from local files: a MODEL_PATHS directory or the store"""
+    path = settings.MODEL_PATHS.get(model_name)
+    return bool(path and os.path.isdir(path)) or is_stored(model_name)
+
+
+def model_source(model_name):
+    """
+    Where to load model_name from: its MODEL_PATHS directory, else its store
+    directory when built, else the name itself (hub cache)
+    """
+    if settings.MODEL_PATHS.get(model_name):
+        return settings.MODEL_PATHS[model_name]
+    if settings.MODEL_STORE_DIR and is_stored(model_name):
+        return str(store_path(model_name))
+    if settings.MODEL_STORE_REQUIRED:
+        raise FileNotFoundError(f"{model_name} is not in the model store; run `python manage.py build_model_store`.")
+    return model_name
+
+
+def load_pipeline(model_name):
+    """The text2text pipeline the app generates with, loaded from the model store when possible"""
+    # Imported here so that startup, admin and management commands don't load torch
+    from transformers import pipeline
+
+    return pipeline("text2text-generation", model=model_source(model_name), max_length=512)
+
+
+def build_store_entry(model_name, store_dir=None):
+    """
+    Copy one model (from the hub cache, downloading it if needed) into the store
+    as safetensors. Written to a temporary directory and renamed into place, so
+    a worker never sees a half-written model. Returns the store path.
+    """
+    from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
+
+    target = store_path(model_name, store_dir)
+    staging = target.with_name(target.name + '.partial')
+    shutil.rmtree(staging, ignore_errors=True)
+    model = AutoModelForSeq2SeqLM.from_pretrained(model_name)
+    model.save_pretrained(staging, safe_serialization=True)
+    AutoTokenizer.from_pretrained(model_name).save_pretrained(staging)
+    if target.exists():
+        shutil.rmtree(target)
+    os.replace(staging, target)
+    return target
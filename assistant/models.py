@@ -41,8 +41,83 @@ class UserHealthProfile(models.Model):
     question_9 = models.TextField(blank=True)
     question_10 = models.TextField(blank=True)
     completed = models.BooleanField(default=False)
+    in_rollups = models.BooleanField(default=False)  # result counted in DailyAssessmentRollup
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Used by the purge_assessments retention job
+            models.Index(fields=['completed', 'updated_at'], name='profile_completed_updated_idx'),
+            # Date-range exports
+            models.Index(fields=['created_at'], name='profile_created_idx'),
+        ]
+
+
+class DailyAssessmentRollup(models.Model):
+    """Per-day assessment counters, maintained incrementally by assistant.analytics"""
+    day = models.DateField()
+    dimension = models.CharField(max_length=30)  # assessments, eligibility, blood_category, deferral_reason
+    value = models.CharField(max_length=50)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['day', 'dimension', 'value']
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'dimension', 'value'], name='unique_daily_rollup'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.dimension}={self.value}: {self.count}"
+
+
+class Translation(models.Model):
+    """Cached translation of one text for the pivot chat mode (see assistant.translation)"""
+    ORIGIN_CHOICES = [
+        ('kb', 'Knowledge base'),           # hand-written BLOOD_DONATION_KB pairs
+        ('precomputed', 'Precomputed'),     # precompute_translations command
+        ('runtime', 'Runtime'),             # translated while answering a chat request
+    ]
+
+    source_lang = models.CharField(max_length=5)
+    target_lang = models.CharField(max_length=5)
+    source_hash = models.CharField(max_length=40)  # sha1 of the normalized source text
+    source_text = models.TextField()
+    text = models.TextField()
+    origin = models.CharField(max_length=12, choices=ORIGIN_CHOICES, default='runtime')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['source_lang', 'target_lang', 'source_hash'], name='unique_translation'),
+        ]
+
+    def __str__(self):
+        return f"{self.source_lang}->{self.target_lang}: {self.source_text[:40]}"
+
+
+class PrecomputedAnswer(models.Model):
+    """Answer to a frequent chat question, generated offline by build_answer_bank (see assistant.answer_bank)"""
+    lang = models.CharField(max_length=5)
+    question = models.TextField()
+    question_hash = models.CharField(max_length=40)    # sha1 of the question as asked
+    normalized_hash = models.CharField(max_length=40)  # sha1 of the normalized question
+    answer = models.TextField()
+    recommendations = models.JSONField(default=list)
+    model_name = models.CharField(max_length=100)
+    from_kb = models.BooleanField(default=False)       # answer text from BLOOD_DONATION_KB
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['lang', 'question_hash'], name='unique_precomputed_answer'),
+        ]
+        indexes = [
+            # Normalized-match lookups from chat
+            models.Index(fields=['lang', 'normalized_hash'], name='answer_bank_normalized_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.lang}: {self.question[:60]}"
@@ -0,0 +1,306 @@
+"""Eligibility report rendering shared by download_report and the export tools."""
+import hashlib
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever check_eligibility rules or the report layout change, so
+# cached reports and client ETags are invalidated.
+REPORT_RULES_VERSION = '1'
+
+
+def report_version(profile):
+    """Stable identifier for the current state of a profile's report"""
+    raw = f"{profile.pk}:{profile.updated_at.isoformat()}:{REPORT_RULES_VERSION}"
+    return hashlib.sha1(raw.encode()).hexdigest()[:20]
+
+
+def report_etag(profile, extension='html'):
+    return f'"{report_version(profile)}-{extension}"'
+
+
+def report_filename(profile, extension='html'):
+    return f"eligibility_report_{profile.name or 'user'}_{profile.updated_at:%Y%m%d}.{extension}"
+
+
+def build_report_context(profile):
+    """Values shown on the report, in display order"""
+    def yes_no(value):
+        return 'Yes' if value else 'No'
+
+    return {
+        'profile': profile,
+        # The report describes the assessment, so it is dated by the last answer
+        # rather than by the download; this keeps the output cacheable.
+        'generated_at': profile.updated_at,
+        'personal_info': [
+            ('Name', profile.name or 'Not provided'),
+            ('Age', f"{profile.age or 'Not provided'} years"),
+            ('Weight', f"{profile.weight or 'Not provided'} kg"),
+            ('Gender', profile.gender or 'Not provided'),
+            ('Blood Group', profile.blood_category or 'Not provided'),
+        ],
+        'health_info': [
+            ('Blood Pressure', profile.blood_pressure or 'Not provided'),
+            ('Hemoglobin Level', profile.hemoglobin_level or 'Not provided'),
+            ('Diabetes', yes_no(profile.has_diabetes)),
+            ('Anemia', yes_no(profile.has_anemia)),
+            ('Previous COVID-19', yes_no(profile.had_corona)),
+        ],
+        'reasons': [reason for reason in profile.eligibility_reasons.splitlines() if reason],
+    }
+
+
+def render_report_html(profile, store=True):
+    """
+    Render the HTML report, reusing the cached output for an unchanged profile.
+    Bulk callers pass store=False so they do not flood the cache.
+    """
+    cache_key = f"report-html:{report_version(profile)}"
+    html = cache.get(cache_key)
+    if html is None:
+        html = render_to_string('assistant/report.html', build_report_context(profile))
+        if store:
+            cache.set(cache_key, html, settings.REPORT_CACHE_TIMEOUT)
+    return html
+
+
+# --- PDF reports ---
+# PDFs are rendered by a small process pool so a render never holds a web
+# worker, and stored on disk keyed by profile version. A lock file next to the
+# artifact makes concurrent requests (from any worker process) share one render;
+# a .failed file counts failed renders, and after REPORT_PDF_MAX_ATTEMPTS of
+# them the report is reported as failed instead of being rendered again.
+
+
+class ReportRenderFailed(Exception):
+    """The PDF for this profile version failed REPORT_PDF_MAX_ATTEMPTS times"""
+
+
+_PDF_EXECUTOR = None
+
+
+def _get_pdf_executor():
+    global _PDF_EXECUTOR
+    if _PDF_EXECUTOR is None:
+        _PDF_EXECUTOR = ProcessPoolExecutor(
+            max_workers=settings.REPORT_PDF_WORKERS,
+            mp_context=multiprocessing.get_context('spawn'),
+        )
+    return _PDF_EXECUTOR
+
+
+def report_pdf_path(profile):
+    return Path(settings.REPORT_PDF_CACHE_DIR) / f"{profile.pk}-{report_version(profile)}.pdf"
+
+
+def build_pdf_payload(profile):
+    """Plain, picklable report data for the render worker"""
+    context = build_report_context(profile)
+    return {
+        'title': 'Blood Donation Eligibility Report',
+        'generated_at': f"{context['generated_at']:%B %d, %Y at %I:%M %p}",
+        'sections': [
+            ('Personal Information', context['personal_info']),
+            ('Health Information', context['health_info']),
+        ],
+        'status': profile.eligibility_status or 'Pending Assessment',
+        'eligible': profile.eligibility_status == 'Eligible',
+        'reasons': context['reasons'],
+        'year': f"{context['generated_at']:%Y}",
+        'font_path': settings.REPORT_PDF_FONT,
+    }
+
+
+def render_report_pdf(payload, path, lock_path):
+    """Render a report PDF with fpdf2 (pure Python). Runs in a pool worker process."""
+    from fpdf import FPDF
+
+    try:
+        pdf = FPDF()
+        pdf.set_auto_page_break(auto=True, margin=20)
+        pdf.add_page()
+        if payload['font_path']:
+            pdf.add_font('Report', '', payload['font_path'])
+            pdf.add_font('Report', 'B', payload['font_path'])
+            family = 'Report'
+
+            def text(value):
+                return str(value)
+        else:
+            # Core PDF fonts only cover Latin-1
+            family = 'Helvetica'
+
+            def text(value):
+                return str(value).encode('latin-1', 'replace').decode('latin-1')
+
+        pdf.set_font(family, 'B', 18)
+        pdf.set_text_color(220, 38, 38)
+        pdf.cell(0, 12, text(payload['title']), align='C', new_x='LMARGIN', new_y='NEXT')
+        pdf.set_font(family, '', 10)
+        pdf.set_text_color(102, 102, 102)
+        pdf.cell(0, 8, text(f"Generated on {payload['generated_at']}"), align='C', new_x='LMARGIN', new_y='NEXT')
+        pdf.ln(6)
+
+        for heading, rows in payload['sections']:
+            pdf.set_font(family, 'B', 13)
+            pdf.set_text_color(51, 51, 51)
+            pdf.cell(0, 10, text(heading), new_x='LMARGIN', new_y='NEXT')
+            pdf.set_font(family, '', 11)
+            for label, value in rows:
+                pdf.set_text_color(102, 102, 102)
+                pdf.cell(60, 8, text(f"{label}:"))
+                pdf.set_text_color(0, 0, 0)
+                pdf.cell(0, 8, text(value), new_x='LMARGIN', new_y='NEXT')
+            pdf.ln(4)
+
+        pdf.set_font(family, 'B', 13)
+        pdf.set_text_color(51, 51, 51)
+        pdf.cell(0, 10, 'Eligibility Status', new_x='LMARGIN', new_y='NEXT')
+        if payload['eligible']:
+            pdf.set_text_color(6, 95, 70)
+        else:
+            pdf.set_text_color(153, 27, 27)
+        pdf.set_font(family, 'B', 14)
+        pdf.cell(0, 10, text(payload['status']), align='C', new_x='LMARGIN', new_y='NEXT')
+        pdf.set_text_color(0, 0, 0)
+        pdf.set_font(family, '', 11)
+        for reason in payload['reasons']:
+            pdf.multi_cell(0, 7, text(f"- {reason}"), new_x='LMARGIN', new_y='NEXT')
+
+        pdf.ln(8)
+        pdf.set_font(family, '', 9)
+        pdf.set_text_color(102, 102, 102)
+        for line in (
+            'This report is generated for informational purposes only.',
+            'Please consult with a medical professional before donating blood.',
+            f"Blood Assistant AI - {payload['year']}",
+        ):
+            pdf.cell(0, 6, text(line), align='C', new_x='LMARGIN', new_y='NEXT')
+
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        pdf.output(tmp_path)
+        os.replace(tmp_path, path)
+        return path
+    finally:
+        try:
+            os.remove(lock_path)
+        except FileNotFoundError:
+            pass
+
+
+def failed_attempts(path):
+    """Failed renders recorded for a PDF path"""
+    try:
+        return int(path.with_suffix('.failed').read_text() or 0)
+    except (FileNotFoundError, ValueError):
+        return 0
+
+
+def _pdf_render_done(path, lock_path, future):
+    """
+    Record a failed render (including a worker that died) so polling stops
+    retrying forever; after a successful one, prune the profile's older versions.
+    """
+    error = future.exception()
+    if error is None:
+        prune_report_pdfs(path)
+        return
+    logger.error("PDF render failed for %s: %s", path.name, error)
+    path.with_suffix('.failed').write_text(str(failed_attempts(path) + 1))
+    try:
+        os.remove(lock_path)
+    except FileNotFoundError:
+        pass
+
+
+def _remove_cached_files(directory, matches):
+    """Remove the files in directory whose name matches; returns PDFs removed"""
+    if not directory.is_dir():
+        return 0
+    removed = 0
+    for entry in os.scandir(directory):
+        if matches(entry.name):
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                continue
+            removed += entry.name.endswith('.pdf')
+    return removed
+
+
+def delete_report_pdfs(profile_ids):
+    """Remove the cached PDFs (and lock/failure files) of deleted profiles; returns PDFs removed"""
+    prefixes = {str(pk) for pk in profile_ids}
+    if not prefixes:
+        return 0
+    return _remove_cached_files(Path(settings.REPORT_PDF_CACHE_DIR),
+                                lambda name: name.split('-', 1)[0] in prefixes)
+
+
+def prune_report_pdfs(path):
+    """
+    Remove the PDFs and failure files of the profile's other versions once `path`
+    is rendered. Lock and temporary files are left to the renders that own them.
+    """
+    prefix = path.name.split('-', 1)[0]
+    return _remove_cached_files(path.parent, lambda name: (
+        name.split('-', 1)[0] == prefix and not name.startswith(f"{path.stem}.")
+        and name.endswith(('.pdf', '.failed'))
+    ))
+
+
+def get_report_pdf(profile):
+    """
+    Return the path of the rendered PDF, or None while it is being rendered.
+    The first caller for a profile version schedules the render; everyone else waits for it.
+    Raises ReportRenderFailed once the render has failed REPORT_PDF_MAX_ATTEMPTS times.
+    """
+    path = report_pdf_path(profile)
+    if path.exists():
+        return path
+    if failed_attempts(path) >= settings.REPORT_PDF_MAX_ATTEMPTS:
+        raise ReportRenderFailed(path.name)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    lock_path = path.with_suffix('.lock')
+    try:
+        os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+    except FileExistsError:
+        # Someone is already rendering; take over only if that render died
+        try:
+            if time.time() - lock_path.stat().st_mtime < settings.REPORT_PDF_RENDER_TIMEOUT:
+                return None
+            os.remove(lock_path)
+        except FileNotFoundError:
+            pass
+        return path if path.exists() else None
+
+    if path.exists():
+        os.remove(lock_path)
+        return path
+    global _PDF_EXECUTOR
+    args = (build_pdf_payload(profile), str(path), str(lock_path))
+    try:
+        try:
+            future = _get_pdf_executor().submit(render_report_pdf, *args)
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM-killed); start a fresh pool once
+            _PDF_EXECUTOR = None
+            future = _get_pdf_executor().submit(render_report_pdf, *args)
+    except Exception:
+        os.remove(lock_path)
+        raise
+    future.add_done_callback(partial(_pdf_render_done, path, lock_path))
+    return None
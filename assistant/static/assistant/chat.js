@@ -0,0 +1,537 @@
+// Global variables
+const chatBox = document.getElementById('chatbox');
+const reportBox = document.getElementById('reportbox');
+const scrollAnchor = document.getElementById('scroll-anchor');
+const reportScrollAnchor = document.getElementById('report-scroll-anchor');
+const questionInput = document.getElementById('question');
+const loadingControls = document.getElementById('loading-controls');
+const micIcon = document.getElementById('mic-icon');
+const reportProgress = document.getElementById('report-progress');
+const progressBar = document.getElementById('progress-bar');
+const progressText = document.getElementById('progress-text');
+const downloadSection = document.getElementById('download-section');
+const downloadBtn = document.getElementById('download-btn');
+
+let abortController = null;
+let isRecording = false;
+let recognition = null;
+let detectedLanguage = 'en-US';
+let currentTab = 'chat';
+let currentProfileId = null;
+let reportQuestionFlow = false;
+let reportCurrentQuestion = 0;
+let reportTotalQuestions = 26;
+let assessmentComplete = false;
+
+// Model selection
+let availableModels = {};
+let selectedModel = null;
+let defaultModel = null;
+
+// Load Available Models
+async function loadModels() {
+    try {
+        const response = await fetch('/api/models/');
+        const data = await response.json();
+        availableModels = data.models;
+        defaultModel = data.default;
+        selectedModel = defaultModel;
+        
+        // Populate model list
+        const modelList = document.getElementById('model-list');
+        modelList.innerHTML = '';
+        
+        Object.keys(availableModels).forEach(modelKey => {
+            const model = availableModels[modelKey];
+            const isDefault = modelKey === defaultModel;
+            
+            const modelItem = document.createElement('div');
+            modelItem.className = `model-item p-3 rounded-lg cursor-pointer transition-all hover:bg-gray-50 border-2 ${isDefault ? 'border-blue-500 bg-blue-50' : 'border-transparent'}`;
+            modelItem.onclick = () => selectModel(modelKey);
+            
+            modelItem.innerHTML = `
+                <div class="flex items-start justify-between">
+                    <div class="flex-1">
+                        <div class="flex items-center gap-2">
+                            <span class="font-bold text-gray-800 text-sm">${model.name}</span>
+                            <span class="px-2 py-0.5 rounded-full text-xs font-semibold ${
+                                model.badge === 'Default' ? 'bg-blue-100 text-blue-700' :
+                                model.badge === 'Fast' ? 'bg-green-100 text-green-700' :
+                                'bg-purple-100 text-purple-700'
+                            }">${model.badge}</span>
+                        </div>
+                        <p class="text-xs text-gray-500 mt-1">${model.description}</p>
+                    </div>
+                    <span class="material-icons text-blue-600 ${isDefault ? '' : 'hidden'} ml-2">check_circle</span>
+                </div>
+            `;
+            
+            modelList.appendChild(modelItem);
+        });
+        
+        // Update button text
+        updateModelButtonText();
+        
+    } catch (error) {
+        console.error('Error loading models:', error);
+    }
+}
+
+// Toggle Model Selector Dropdown
+function toggleModelSelector() {
+    const dropdown = document.getElementById('model-dropdown');
+    dropdown.classList.toggle('hidden');
+}
+
+// Select Model
+function selectModel(modelKey) {
+    selectedModel = modelKey;
+    
+    // Update UI
+    document.querySelectorAll('.model-item').forEach(item => {
+        item.classList.remove('border-blue-500', 'bg-blue-50');
+        item.classList.add('border-transparent');
+        const checkIcon = item.querySelector('.material-icons');
+        if (checkIcon) checkIcon.classList.add('hidden');
+    });
+    
+    const selectedItem = event.currentTarget;
+    selectedItem.classList.remove('border-transparent');
+    selectedItem.classList.add('border-blue-500', 'bg-blue-50');
+    const checkIcon = selectedItem.querySelector('.material-icons');
+    if (checkIcon) checkIcon.classList.remove('hidden');
+    
+    updateModelButtonText();
+    toggleModelSelector();
+    
+    console.log('Model selected:', modelKey);
+}
+
+// Update Model Button Text
+function updateModelButtonText() {
+    if (selectedModel && availableModels[selectedModel]) {
+        const badge = availableModels[selectedModel].badge;
+        const name = availableModels[selectedModel].name;
+        document.getElementById('current-model-text').textContent = badge;
+        document.getElementById('footer-model-name').textContent = name;
+    }
+}
+
+// Close dropdown when clicking outside
+document.addEventListener('click', function(event) {
+    const dropdown = document.getElementById('model-dropdown');
+    const button = document.getElementById('model-selector-btn');
+    if (!dropdown.contains(event.target) && !button.contains(event.target)) {
+        dropdown.classList.add('hidden');
+    }
+});
+
+// Tab Switching
+function switchTab(tab) {
+    currentTab = tab;
+    document.querySelectorAll('.tab-button').forEach(btn => btn.classList.remove('active'));
+    document.querySelectorAll('.tab-content').forEach(content => content.classList.remove('active'));
+    
+    if (tab === 'chat') {
+        document.getElementById('tab-chat').classList.add('active');
+        document.getElementById('content-chat').classList.add('active');
+        questionInput.placeholder = "Ask a medical question...";
+    } else {
+        document.getElementById('tab-report').classList.add('active');
+        document.getElementById('content-report').classList.add('active');
+        questionInput.placeholder = "Answer the question...";
+    }
+}
+
+// Voice Recognition Setup
+if ('webkitSpeechRecognition' in window || 'SpeechRecognition' in window) {
+    const SpeechRecognition = window.SpeechRecognition || window.webkitSpeechRecognition;
+    recognition = new SpeechRecognition();
+    recognition.continuous = false;
+    recognition.interimResults = false;
+    recognition.lang = 'auto';
+
+    recognition.onstart = () => {
+        isRecording = true;
+        micIcon.textContent = 'mic_off';
+        micIcon.parentElement.classList.add('bg-red-100', 'text-red-600');
+        questionInput.placeholder = "Listening...";
+    };
+    recognition.onend = () => {
+        isRecording = false;
+        micIcon.textContent = 'mic';
+        micIcon.parentElement.classList.remove('bg-red-100', 'text-red-600');
+        questionInput.placeholder = currentTab === 'chat' ? "Ask a medical question..." : "Answer the question...";
+    };
+    recognition.onresult = (event) => {
+        const transcript = event.results[0][0].transcript;
+        const lang = event.results[0][0].lang || 'en-US';
+        detectedLanguage = lang;
+        questionInput.value = transcript;
+        questionInput.focus();
+    };
+} else {
+    document.getElementById('voice-btn').style.display = 'none';
+}
+
+function toggleVoice() {
+    if (!recognition) return;
+    if (isRecording) recognition.stop();
+    else recognition.start();
+}
+
+// Text To Speech
+function speakText(text, lang = 'en-US') {
+    if ('speechSynthesis' in window) {
+        let tempDiv = document.createElement("div");
+        tempDiv.innerHTML = text;
+        let cleanText = tempDiv.textContent || tempDiv.innerText || "";
+        const utterance = new SpeechSynthesisUtterance(cleanText);
+        const voices = window.speechSynthesis.getVoices();
+        const voice = voices.find(v => v.lang.startsWith(lang.substring(0, 2)));
+        if (voice) utterance.voice = voice;
+        else utterance.lang = lang;
+        window.speechSynthesis.cancel();
+        window.speechSynthesis.speak(utterance);
+    }
+}
+
+// Stop Generation
+function stopGeneration() {
+    if (abortController) {
+        abortController.abort();
+        abortController = null;
+        loadingControls.classList.add('hidden');
+        appendMessage(currentTab === 'chat' ? chatBox : reportBox, "System", "Generation stopped by user.", "text-red-500 italic");
+    }
+}
+
+function autoResize() {
+    questionInput.style.height = 'auto';
+    questionInput.style.height = (questionInput.scrollHeight) + 'px';
+}
+
+// Language Detection Function
+function detectLanguage(text) {
+    if (!text || !text.trim()) return 'en-US';
+    
+    // Check for Gujarati script (U+0A80 to U+0AFF)
+    if (text.match(/[\u0A80-\u0AFF]/)) {
+        return 'gu-IN';
+    }
+    
+    // Check for Hindi/Devanagari script (U+0900 to U+097F)
+    if (text.match(/[\u0900-\u097F]/)) {
+        return 'hi-IN';
+    }
+    
+    // Default to English
+    return 'en-US';
+}
+
+// Send Message
+async function sendMessage() {
+    const q = questionInput.value.trim();
+    if (!q) return;
+
+    // Prevent sending if assessment is complete
+    if (assessmentComplete && currentTab === 'report') {
+        alert('Assessment is complete. Click "Start New Assessment" to begin again.');
+        return;
+    }
+
+    // Detect language dynamically
+    detectedLanguage = detectLanguage(q);
+
+    document.querySelectorAll('.rec-container').forEach(e => e.style.display = 'none');
+
+    if (currentTab === 'chat') {
+        await sendChatMessage(q);
+    } else {
+        await sendReportMessage(q);
+    }
+
+    questionInput.value = '';
+    autoResize();
+}
+
+// Chat Message
+async function sendChatMessage(q) {
+    appendMessage(chatBox, 'You', q);
+    loadingControls.classList.remove('hidden');
+    scrollAnchor.scrollIntoView({ behavior: 'smooth' });
+
+    abortController = new AbortController();
+
+    try {
+        const response = await fetch('/api/chat/', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ 
+                question: q,
+                model: selectedModel || defaultModel
+            }),
+            signal: abortController.signal
+        });
+
+        if (!response.ok) throw new Error('Network error');
+        const data = await response.json();
+        
+        // Update detected language from server response if available
+        if (data.detected_language) {
+            const langMap = {'en': 'en-US', 'hi': 'hi-IN', 'gu': 'gu-IN'};
+            detectedLanguage = langMap[data.detected_language] || detectedLanguage;
+        }
+        
+        appendMessage(chatBox, 'Assistant', data.answer, 'text-gray-800', data.confidence, detectedLanguage, data.recommendations, false, 0, 0, data.model_used);
+
+    } catch (error) {
+        if (error.name !== 'AbortError') {
+            appendMessage(chatBox, 'Error', 'Something went wrong.', 'text-red-600');
+        }
+    } finally {
+        loadingControls.classList.add('hidden');
+        abortController = null;
+        scrollAnchor.scrollIntoView({ behavior: 'smooth' });
+    }
+}
+
+// Report Message
+async function sendReportMessage(q) {
+    appendMessage(reportBox, 'You', q);
+    loadingControls.classList.remove('hidden');
+    reportScrollAnchor.scrollIntoView({ behavior: 'smooth' });
+
+    abortController = new AbortController();
+
+    try {
+        const response = await fetch('/api/report/', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ answer: q }),
+            signal: abortController.signal
+        });
+
+        if (!response.ok) throw new Error('Network error');
+        const data = await response.json();
+
+        if (data.in_question_flow) {
+            reportQuestionFlow = true;
+            reportCurrentQuestion = data.question_number;
+            reportTotalQuestions = data.total_questions;
+            updateProgress(data.question_number, data.total_questions);
+            appendMessage(reportBox, 'Assistant', data.answer, 'text-gray-800', null, detectedLanguage, [], true, data.question_number, data.total_questions);
+        } else if (data.completed) {
+            reportQuestionFlow = false;
+            reportCurrentQuestion = 0;
+            assessmentComplete = true;
+            currentProfileId = data.profile_id;
+            updateProgress(100, 100);
+            appendMessage(reportBox, 'Assistant', data.answer, 'text-gray-800', null, detectedLanguage);
+            
+            // Show eligibility result
+            const statusClass = data.eligible ? 'text-green-600 bg-green-50 border-green-200' : 'text-red-600 bg-red-50 border-red-200';
+            const statusText = data.eligible ? '✓ Eligible' : '✗ Not Eligible';
+            let reasonsHtml = '<ul class="list-disc list-inside mt-2 space-y-1">';
+            data.reasons.forEach(reason => {
+                reasonsHtml += `<li class="text-sm">${reason}</li>`;
+            });
+            reasonsHtml += '</ul>';
+            
+            appendMessage(reportBox, 'System', 
+                `<div class="p-4 rounded-lg border-2 ${statusClass}">
+                    <h3 class="font-bold text-lg mb-2">${statusText}</h3>
+                    ${reasonsHtml}
+                </div>`, 
+                'text-gray-800');
+            
+            // Disable input and show reset button
+            disableInputField();
+            downloadSection.classList.remove('hidden');
+            reportScrollAnchor.scrollIntoView({ behavior: 'smooth' });
+        }
+
+    } catch (error) {
+        if (error.name !== 'AbortError') {
+            appendMessage(reportBox, 'Error', 'Something went wrong.', 'text-red-600');
+        }
+    } finally {
+        loadingControls.classList.add('hidden');
+        abortController = null;
+        reportScrollAnchor.scrollIntoView({ behavior: 'smooth' });
+    }
+}
+
+// Start Report
+function startReport() {
+    reportQuestionFlow = true;
+    reportCurrentQuestion = 0;
+    sendReportMessage('start');
+}
+
+// Download Report
+function downloadReport() {
+    if (currentProfileId) {
+        window.open(`/download-report/${currentProfileId}/`, '_blank');
+    }
+}
+
+// Reset Assessment
+async function resetAssessment() {
+    try {
+        const response = await fetch('/api/reset/', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' }
+        });
+
+        if (!response.ok) throw new Error('Failed to reset assessment');
+        const data = await response.json();
+
+        // Clear UI
+        reportBox.innerHTML = '';
+        downloadSection.classList.add('hidden');
+        reportProgress.classList.add('hidden');
+        assessmentComplete = false;
+        reportQuestionFlow = false;
+        reportCurrentQuestion = 0;
+        currentProfileId = null;
+
+        // Show welcome message
+        const welcomeHtml = `
+        <div class="flex gap-4">
+            <div class="w-12 h-12 rounded-2xl bg-gradient-to-br from-blue-500 to-blue-700 flex items-center justify-center shrink-0 shadow-lg">
+                <span class="material-icons text-white text-2xl">assignment</span>
+            </div>
+            <div class="bg-white p-6 rounded-2xl rounded-tl-none shadow-xl max-w-[80%] border-2 border-gray-100 hover:shadow-2xl transition-shadow">
+                <h3 class="text-lg font-bold text-gray-800 mb-2 flex items-center gap-2">
+                    <span class="material-icons text-blue-600">medical_information</span>
+                    Blood Donation Eligibility Assessment
+                </h3>
+                <p class="text-gray-700 text-sm leading-relaxed mb-4">I'll ask you a series of comprehensive questions to assess your eligibility for blood donation. This will help generate a detailed medical report.</p>
+                <div class="bg-blue-50 border border-blue-200 rounded-lg p-3 mb-4">
+                    <p class="text-xs text-blue-800 font-medium flex items-start gap-2">
+                        <span class="material-icons text-sm mt-0.5">info</span>
+                        <span>Please answer all questions accurately. The assessment takes approximately 3-5 minutes.</span>
+                    </p>
+                </div>
+                <button onclick="startReport()" 
+                    class="bg-gradient-to-r from-blue-600 to-blue-700 text-white px-8 py-3 rounded-xl hover:from-blue-700 hover:to-blue-800 hover:shadow-xl transition-all shadow-lg flex items-center gap-2 font-semibold">
+                    <span class="material-icons">play_arrow</span>
+                    Start Assessment
+                </button>
+            </div>
+        </div>
+        `;
+        reportBox.innerHTML = welcomeHtml;
+
+        // Re-enable input
+        enableInputField();
+
+        console.log('Assessment reset successfully');
+    } catch (error) {
+        console.error('Error resetting assessment:', error);
+        alert('Failed to reset assessment. Please try again.');
+    }
+}
+
+// Disable Input Field
+function disableInputField() {
+    questionInput.disabled = true;
+    questionInput.classList.add('opacity-50', 'cursor-not-allowed');
+    document.getElementById('send-btn').disabled = true;
+    document.getElementById('voice-btn').disabled = true;
+    document.getElementById('voice-btn').classList.add('opacity-50', 'cursor-not-allowed');
+}
+
+// Enable Input Field
+function enableInputField() {
+    questionInput.disabled = false;
+    questionInput.classList.remove('opacity-50', 'cursor-not-allowed');
+    document.getElementById('send-btn').disabled = false;
+    document.getElementById('voice-btn').disabled = false;
+    document.getElementById('voice-btn').classList.remove('opacity-50', 'cursor-not-allowed');
+    questionInput.focus();
+}
+
+// Update Progress
+function updateProgress(current, total) {
+    const percentage = (current / total) * 100;
+    progressBar.style.width = percentage + '%';
+    progressText.textContent = `Question ${current} of ${total} (${Math.round(percentage)}%)`;
+    reportProgress.classList.remove('hidden');
+}
+
+// Append Message
+function appendMessage(container, sender, text, colorClass = 'text-gray-800', confidence = null, lang = 'en-US', recommendations = [], inFlow = false, qNum = 0, totalQ = 10, modelUsed = null) {
+    const isUser = sender === 'You';
+    let html = '';
+
+    if (isUser) {
+        html = `
+        <div class="flex gap-4 justify-end group">
+            <div class="bg-gradient-to-r from-blue-600 to-blue-700 text-white p-4 rounded-2xl rounded-tr-none shadow-md max-w-[80%] relative">
+                <p>${text}</p>
+            </div>
+            <div class="w-10 h-10 rounded-full bg-blue-100 flex items-center justify-center shrink-0 text-xs font-bold text-blue-600">ME</div>
+        </div>`;
+    } else {
+        const questionIndicator = inFlow && qNum > 0 ? `
+            <div class="mb-2 text-xs font-semibold text-blue-600 bg-blue-50 px-3 py-1 rounded-full inline-block">
+                Question ${qNum} of ${totalQ}
+            </div>
+        ` : '';
+        
+        const modelBadge = modelUsed && container === chatBox ? `
+            <span class="text-xs text-gray-400 flex items-center gap-1">
+                <span class="material-icons text-xs">smart_toy</span>
+                ${modelUsed}
+            </span>
+        ` : '';
+        
+        html = `
+        <div class="flex gap-4">
+            <div class="w-10 h-10 rounded-full ${container === chatBox ? 'bg-red-100' : 'bg-blue-100'} flex items-center justify-center shrink-0">
+                <span class="material-icons ${container === chatBox ? 'text-red-600' : 'text-blue-600'}">${container === chatBox ? 'smart_toy' : 'assignment'}</span>
+            </div>
+            <div class="max-w-[85%]">
+                <div class="bg-white p-4 rounded-2xl rounded-tl-none shadow-md border border-gray-100">
+                    ${questionIndicator}
+                    <div class="${colorClass} message-text">${text}</div>
+                    <div class="flex justify-between items-center mt-2 pt-2 border-t border-gray-50">
+                        <button onclick="speakText(this.closest('.bg-white').querySelector('.message-text').textContent, '${lang}')" class="text-gray-400 hover:text-red-500 flex items-center gap-1 text-xs transition-colors">
+                            <span class="material-icons text-sm">volume_up</span> Listen
+                        </button>
+                        <div class="flex items-center gap-3">
+                            ${modelBadge}
+                            ${confidence ? `<div class="text-xs text-gray-300">${(confidence * 100).toFixed(0)}%</div>` : ''}
+                        </div>
+                    </div>
+                </div>
+                ${recommendations && recommendations.length > 0 ? `
+                <div class="flex flex-wrap gap-2 mt-3 ml-1 rec-container">
+                    ${recommendations.map(rec => `
+                        <button onclick="questionInput.value='${rec.replace(/'/g, "\\'")}'; sendMessage();" 
+                            class="bg-white border border-blue-200 text-blue-600 text-xs px-3 py-2 rounded-full hover:bg-blue-50 hover:border-blue-300 transition-colors shadow-sm">
+                            ${rec}
+                        </button>
+                    `).join('')}
+                </div>` : ''}
+            </div>
+        </div>`;
+    }
+    container.insertAdjacentHTML('beforeend', html);
+}
+
+// Event Listeners
+questionInput.addEventListener('input', autoResize);
+questionInput.addEventListener('keydown', (e) => {
+    if (e.key === 'Enter' && !e.shiftKey) {
+        e.preventDefault();
+        sendMessage();
+    }
+});
+
+// Initialize on page load
+window.addEventListener('DOMContentLoaded', () => {
+    loadModels();
+});
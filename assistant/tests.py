@@ -1,3 +1,970 @@
-from django.test import TestCase
+from concurrent.futures import Future
+from unittest import mock
+from datetime import timedelta
+from importlib import import_module
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from types import SimpleNamespace
+import asyncio
+import csv
+import io
+import json
+import threading
+import time
+import zipfile
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from .analytics import record_assessment_result, record_assessment_started
+from .benchmarks import SAMPLE_REPORT_ANSWERS, benchmark_prompts, latency_summary, percentile
+from .fakes import FakeGenerator, FakeSearchClient, FakeTranslator
+from .generation import (
+    DEADLINE_HITS, AssistedGenerator, CompiledGenerator, Deadline, DeadlineExceeded, cpu_compile_config, generate_many,
+    generate_within,
+)
+from .management.commands.benchmark_languages import tokenizer_cost
+from .management.commands.build_answer_bank import read_corpus
+from .management.commands.benchmark_models import summarize_run
+from .management.commands.check_import_time import measure_imports
+from .management.commands.loadtest import parse_mix
+from .management.commands.measure_page_weight import ASSET_PATTERN, is_cacheable
+from .models import DailyAssessmentRollup, Translation, UserHealthProfile
+from . import answer_bank, cascade, cpu_plan, inference, metrics, model_server, model_store, reports, throttling, translation, views
+from .reports import report_version
+from .views import (
+    REPORT_FLOW_COOKIE, check_eligibility, detect_language, intent_label, language_model, trim_partial_answer,
+)
+
+
+def post_json(client, url, data):
+    return client.post(url, json.dumps(data), content_type='application/json')
+
+
+def make_profile(session_id, days_old=0, **fields):
+    """A profile whose updated_at is days_old days in the past"""
+    profile = UserHealthProfile.objects.create(session_id=session_id, **fields)
+    if days_old:
+        UserHealthProfile.objects.filter(pk=profile.pk).update(updated_at=timezone.now() - timedelta(days=days_old))
+    return profile
+
+
+class PurgeAssessmentsTests(TestCase):
+    def purge(self, *args):
+        call_command('purge_assessments', *args, stdout=io.StringIO())
+
+    def test_deletes_only_old_incomplete_anonymous_profiles(self):
+        user = User.objects.create_user('donor', password='x')
+        make_profile('old-anonymous', days_old=60)
+        make_profile('old-registered', days_old=60, user=user)
+        make_profile('old-completed', days_old=60, completed=True)
+        make_profile('recent', days_old=1)
+
+        self.purge('--batch-size', '1')
+
+        self.assertEqual(
+            set(UserHealthProfile.objects.values_list('session_id', flat=True)),
+            {'old-registered', 'old-completed', 'recent'},
+        )
+
+    def test_dry_run_deletes_nothing(self):
+        make_profile('old-anonymous', days_old=60)
+        self.purge('--dry-run')
+        self.assertEqual(UserHealthProfile.objects.count(), 1)
+
+    def test_expired_sessions_take_their_anonymous_profiles(self):
+        user = User.objects.create_user('donor', password='x')
+        make_profile('expired-anonymous')
+        make_profile('expired-registered', user=user)
+        store_class = import_module(settings.SESSION_ENGINE).SessionStore
+        for profile_id in ('expired-anonymous', 'expired-registered'):
+            store = store_class()
+            store['health_profile_id'] = profile_id
+            store.create()
+            Session.objects.filter(pk=store.session_key).update(expire_date=timezone.now() - timedelta(days=1))
+
+        self.purge()
+
+        self.assertFalse(Session.objects.exists())
+        self.assertEqual(list(UserHealthProfile.objects.values_list('session_id', flat=True)), ['expired-registered'])
+
+
+class ReportFlowCursorTests(TestCase):
+    def answer(self, text):
+        return post_json(self.client, '/api/report/', {'answer': text}).json()
+
+    def test_cursor_advances_in_signed_cookie(self):
+        start = self.answer('')
+        self.assertEqual(start['question_number'], 1)
+        self.assertIn(REPORT_FLOW_COOKIE, self.client.cookies)
+
+        second = self.answer('Asha Patel')
+        self.assertEqual(second['question_number'], 2)
+        self.assertEqual(UserHealthProfile.objects.get().name, 'Asha Patel')
+
+    def test_tampered_cookie_restarts_the_flow(self):
+        self.answer('')
+        self.client.cookies[REPORT_FLOW_COOKIE] = self.client.cookies[REPORT_FLOW_COOKIE].value + 'x'
+        response = self.answer('Asha Patel')
+        self.assertEqual(response['question_number'], 1)
+        self.assertFalse(UserHealthProfile.objects.filter(name='Asha Patel').exists())
+
+    def test_cursor_from_before_a_reset_is_rejected(self):
+        self.answer('')
+        self.answer('Asha Patel')
+        old_cursor = self.client.cookies[REPORT_FLOW_COOKIE].value
+        self.client.post('/api/reset/')
+        self.client.cookies[REPORT_FLOW_COOKIE] = old_cursor
+        self.assertEqual(self.answer('29')['question_number'], 1)
+
+
+class ReportDownloadTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.profile = make_profile('report', name='Asha', age=29, weight=58, completed=True)
+        self.url = f'/download-report/{self.profile.pk}/'
+
+    def test_html_report_is_cached_and_revalidated_with_etag(self):
+        first = self.client.get(self.url)
+        self.assertEqual(first.status_code, 200)
+        self.assertIn(b'Asha', first.content)
+        self.profile.refresh_from_db()  # check_eligibility saved a result
+        self.assertIsNotNone(cache.get(f"report-html:{report_version(self.profile)}"))
+
+        again = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again['ETag'], first['ETag'])
+
+    def test_changed_profile_gets_a_new_etag(self):
+        first = self.client.get(self.url)
+        self.profile.refresh_from_db()
+        self.profile.name = 'Asha Patel'
+        self.profile.save()
+        second = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 200)
+        self.assertNotEqual(second['ETag'], first['ETag'])
+
+    def test_missing_profile_is_404(self):
+        self.assertEqual(self.client.get('/download-report/999999/').status_code, 404)
+
+
+class ReportPdfTests(TestCase):
+    def setUp(self):
+        tmp = TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.enterContext(override_settings(REPORT_PDF_CACHE_DIR=tmp.name, REPORT_PDF_MAX_ATTEMPTS=2))
+        self.profile = make_profile('pdf', name='Asha', age=29, weight=58, completed=True,
+                                    eligibility_status='Eligible')
+        self.url = f'/download-report/{self.profile.pk}/?format=pdf'
+
+    def fail_render(self, path):
+        lock_path = path.with_suffix('.lock')
+        lock_path.touch()
+        future = Future()
+        future.set_exception(RuntimeError('font missing'))
+        with self.assertLogs('assistant.reports', 'ERROR'):
+            reports._pdf_render_done(path, lock_path, future)
+        self.assertFalse(lock_path.exists())
+
+    def test_render_writes_pdf_and_releases_lock(self):
+        path = reports.report_pdf_path(self.profile)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        lock_path = path.with_suffix('.lock')
+        lock_path.touch()
+        reports.render_report_pdf(reports.build_pdf_payload(self.profile), path, lock_path)
+        self.assertTrue(path.read_bytes().startswith(b'%PDF'))
+        self.assertFalse(lock_path.exists())
+
+    def test_repeated_failures_return_an_error_instead_of_pending(self):
+        path = reports.report_pdf_path(self.profile)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.fail_render(path)
+        self.fail_render(path)
+        self.assertEqual(reports.failed_attempts(path), 2)
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(response.json()['status'], 'failed')
+
+    def test_purge_removes_pdfs_of_deleted_profiles(self):
+        stale = make_profile('stale', days_old=60)
+        directory = Path(settings.REPORT_PDF_CACHE_DIR)
+        for name in (f'{stale.pk}-abc.pdf', f'{stale.pk}-abc.failed', f'{self.profile.pk}-abc.pdf'):
+            (directory / name).touch()
+
+        call_command('purge_assessments', stdout=io.StringIO())
+
+        self.assertEqual([entry.name for entry in directory.iterdir()], [f'{self.profile.pk}-abc.pdf'])
+
+    def test_reset_removes_the_profile_pdfs(self):
+        session = self.client.session
+        session['health_profile_id'] = self.profile.session_id
+        session.save()
+        (Path(settings.REPORT_PDF_CACHE_DIR) / f'{self.profile.pk}-abc.pdf').touch()
+
+        self.client.post('/api/reset/')
+
+        self.assertFalse(UserHealthProfile.objects.exists())
+        self.assertEqual(list(Path(settings.REPORT_PDF_CACHE_DIR).iterdir()), [])
+
+    def test_rendering_a_new_version_prunes_the_old_ones(self):
+        other = make_profile('other')
+        path = reports.report_pdf_path(self.profile)
+        directory = path.parent
+        names = [path.name, f'{self.profile.pk}-old.pdf', f'{self.profile.pk}-old.failed',
+                 f'{self.profile.pk}-newer.lock', f'{other.pk}-old.pdf']
+        for name in names:
+            (directory / name).touch()
+        future = Future()
+        future.set_result(str(path))
+
+        reports._pdf_render_done(path, path.with_suffix('.lock'), future)
+
+        self.assertEqual({entry.name for entry in directory.iterdir()},
+                         {path.name, f'{self.profile.pk}-newer.lock', f'{other.pk}-old.pdf'})
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        staff = User.objects.create_user('organizer', password='x', is_staff=True)
+        self.client.force_login(staff)
+        self.done = make_profile('done', name='Asha', age=29, completed=True, eligibility_status='Eligible')
+        self.open = make_profile('open', name='Ravi')
+
+    def export(self, **params):
+        response = self.client.get('/api/export/', params)
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content)
+
+    def test_export_is_staff_only(self):
+        self.client.logout()
+        self.assertEqual(self.client.get('/api/export/').status_code, 403)
+
+    def test_csv_streams_one_row_per_profile(self):
+        rows = list(csv.DictReader(io.StringIO(self.export(format='csv').decode())))
+        self.assertEqual([row['name'] for row in rows], ['Asha', 'Ravi'])
+        self.assertNotIn('session_id', rows[0])
+
+    def test_jsonl_filters_by_completion(self):
+        lines = self.export(format='jsonl', completed='1').decode().splitlines()
+        self.assertEqual([json.loads(line)['name'] for line in lines], ['Asha'])
+
+    def test_zip_holds_a_rendered_report_per_profile(self):
+        archive = zipfile.ZipFile(io.BytesIO(self.export(format='zip', status='Eligible')))
+        [name] = archive.namelist()
+        self.assertTrue(name.startswith(f'eligibility_report_{self.done.pk}_'))
+        self.assertIn(b'Asha', archive.read(name))
+
+    def test_date_range_filters_and_rejects_bad_dates(self):
+        today = timezone.localdate()
+        self.assertEqual(self.export(format='jsonl', start=str(today + timedelta(days=1))), b'')
+        self.assertEqual(self.client.get('/api/export/', {'start': 'yesterday'}).status_code, 400)
+
+    def test_command_writes_the_same_export(self):
+        out = io.StringIO()
+        call_command('export_reports', '--format', 'jsonl', '--chunk-size', '1', stdout=out)
+        self.assertEqual(len(out.getvalue().splitlines()), 2)
+
+
+class AnalyticsTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_user('organizer', password='x', is_staff=True))
+
+    def rollup(self, dimension, value):
+        row = DailyAssessmentRollup.objects.filter(dimension=dimension, value=value).first()
+        return row.count if row else 0
+
+    def test_completed_assessment_updates_rollups_once(self):
+        profile = make_profile('done', age=29, weight=58, completed=True, blood_category='O+')
+        self.client.get(f'/download-report/{profile.pk}/')  # runs check_eligibility
+        profile.refresh_from_db()
+        self.assertTrue(profile.in_rollups)
+
+        totals = self.client.get('/api/analytics/').json()['totals']
+        self.assertEqual((totals['eligible'], totals['blood_category']), (1, {'O+': 1}))
+
+        profile.age = 15
+        check_eligibility(profile)
+        self.assertEqual(self.rollup('eligibility', 'Eligible'), 0)
+        self.assertEqual(self.rollup('eligibility', 'Not Eligible'), 1)
+        self.assertEqual(self.rollup('deferral_reason', 'age_under_18'), 1)
+        self.assertEqual(self.rollup('blood_category', 'O+'), 1)
+
+    def test_rescoring_never_drives_counts_negative(self):
+        profile = make_profile('done', completed=True, in_rollups=True, blood_category='A+',
+                               eligibility_status='Eligible', eligibility_reasons='')
+        profile.eligibility_status = 'Not Eligible'
+        record_assessment_result(profile)  # the previous result was never counted
+        self.assertEqual(self.rollup('eligibility', 'Eligible'), 0)
+        self.assertEqual(self.rollup('eligibility', 'Not Eligible'), 1)
+
+    def rollup_counts(self):
+        return set(DailyAssessmentRollup.objects.filter(count__gt=0).values_list('dimension', 'value', 'count'))
+
+    def test_deleted_assessments_leave_the_rollups_and_backfill_in_agreement(self):
+        kept = make_profile('kept', age=29, weight=58, completed=True, blood_category='O+')
+        check_eligibility(kept)
+        record_assessment_started(kept)
+        post_json(self.client, '/api/report/', {'answer': ''})
+        post_json(self.client, '/api/report/', {'answer': 'Ravi'})
+        post_json(self.client, '/api/report/', {'answer': '15'})  # ends early, counted as Not Eligible
+        self.assertEqual(self.rollup('assessments', 'started'), 2)
+
+        self.client.post('/api/reset/')
+        record_assessment_started(make_profile('abandoned', days_old=60))
+        call_command('purge_assessments', stdout=io.StringIO())
+
+        counts = self.rollup_counts()
+        self.assertEqual(self.rollup('assessments', 'started'), 1)
+        self.assertEqual(self.rollup('eligibility', 'Not Eligible'), 0)
+        call_command('backfill_rollups', stdout=io.StringIO())
+        self.assertEqual(self.rollup_counts(), counts)
+
+    def test_bad_dates_are_rejected(self):
+        for params in ({'end': 'foo'}, {'start': 'foo'}, {'start': '2026-02-01', 'end': '2026-01-01'}):
+            self.assertEqual(self.client.get('/api/analytics/', params).status_code, 400, params)
+
+    def test_analytics_is_staff_only(self):
+        self.client.logout()
+        self.assertEqual(self.client.get('/api/analytics/').status_code, 403)
+
+
+class InferenceExecutorTests(TestCase):
+    def test_runs_on_the_pool_and_releases_the_slot(self):
+        result = asyncio.run(inference.run_inference(sum, [1, 2, 3]))
+        self.assertEqual(result, 6)
+        self.assertEqual(inference.queue_depth(), 0)
+
+    def test_full_queue_fails_fast_with_retry_after(self):
+        with mock.patch.object(inference, 'queue_capacity', return_value=0):
+            with self.assertRaises(inference.InferenceQueueFull) as raised:
+                asyncio.run(inference.run_inference(sum, [1]))
+        self.assertGreaterEqual(raised.exception.retry_after, 1)
+        self.assertEqual(inference.queue_depth(), 0)
+
+    def test_async_endpoint_returns_503_when_busy(self):
+        with mock.patch.object(inference, 'queue_capacity', return_value=0):
+            response = post_json(self.client, '/api/chat/async/', {'question': 'hi'})
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], str(response.json()['retry_after']))
+
+
+@override_settings(COMPILED_GENERATION=False)
+class ModelRegistryTests(TestCase):
+    def test_loaded_models_are_served_while_another_loads(self):
+        release = threading.Event()
+
+        def load_pipeline(model_name):
+            if model_name == 'slow':
+                release.wait(5)
+            return lambda inputs, **kwargs: [{'generated_text': f'{model_name}: {inputs}'}]
+
+        registry = model_server.ModelRegistry()
+        with mock.patch.object(model_server, 'load_pipeline', side_effect=load_pipeline) as load:
+            registry.get('fast')
+            slow = threading.Thread(target=registry.get, args=('slow',))
+            slow.start()
+            try:
+                # Would wait for the slow load if the registry held one lock for every model
+                done = threading.Thread(target=registry.generate, args=('fast', 'q', {}))
+                done.start()
+                done.join(2)
+                self.assertFalse(done.is_alive())
+            finally:
+                release.set()
+                slow.join()
+            registry.get('slow')
+        self.assertEqual([call.args[0] for call in load.call_args_list], ['fast', 'slow'])
+
+    @override_settings(DEADLINE_MIN_GENERATION_SECONDS=0.1)
+    def test_time_spent_queueing_comes_off_the_budget(self):
+        calls = []
+        registry = model_server.ModelRegistry()
+        with mock.patch.object(model_server, 'load_pipeline', return_value=lambda inputs, **kwargs: calls.append(kwargs)):
+            registry.generate('fast', 'q', {'max_time': 5.0}, sent_at=time.time() - 2)
+            self.assertLess(calls[0]['max_time'], 3.01)
+            with self.assertRaises(DeadlineExceeded):
+                registry.generate('fast', 'q', {'max_time': 5.0}, sent_at=time.time() - 5)
+        self.assertEqual(len(calls), 1)
+
+    def test_spent_budget_counts_as_a_skipped_call(self):
+        def generator(inputs, **kwargs):
+            raise DeadlineExceeded('queued too long')
+
+        before = DEADLINE_HITS.value(stage='test', outcome='skipped')
+        self.assertEqual(generate_within(Deadline(5), 'test', generator, 'q'), (None, True))
+        self.assertEqual(DEADLINE_HITS.value(stage='test', outcome='skipped'), before + 1)
+
+
+class MetricsTests(TestCase):
+    def test_span_records_labels_set_inside_the_block(self):
+        histogram = metrics.Histogram('test_span_seconds', 'Test.', metrics.STAGE_LABELS)
+        self.addCleanup(metrics.REGISTRY.remove, histogram)
+        with mock.patch.object(metrics, 'STAGE_SECONDS', histogram):
+            with metrics.span('kb_lookup', lang='hi') as labels:
+                labels['cache'] = 'hit'
+        rendered = histogram.render()
+        self.assertIn('test_span_seconds_count{stage="kb_lookup",lang="hi",intent="",model="",cache="hit"} 1',
+                      rendered)
+
+    def test_router_output_is_normalized_to_a_few_intents(self):
+        self.assertEqual(intent_label('SEARCH.'), 'SEARCH')
+        self.assertEqual(intent_label('EXPLAIN'), 'EXPLAIN')
+        self.assertEqual(intent_label('WHERE CAN I DONATE'), 'other')
+
+    def test_metrics_endpoint_exposes_prometheus_text(self):
+        response = self.client.get('/metrics')
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        self.assertIn(b'# TYPE assistant_stage_seconds histogram', response.content)
+        self.assertIn(b'# TYPE assistant_search_results_total counter', response.content)
+
+
+class LoadTestTests(TestCase):
+    def test_fake_generator_routes_like_the_router_prompt(self):
+        generator = FakeGenerator('fake', latency=0)
+        route = 'Classify user intent.\nQuestion: "{}"\nIntent:'
+        self.assertEqual(generator(route.format('Find a blood bank near me'))[0]['generated_text'], 'SEARCH')
+        self.assertEqual(generator(route.format('Is donating safe?'))[0]['generated_text'], 'EXPLAIN')
+
+    def test_fake_generator_is_cut_short_by_max_time(self):
+        generator = FakeGenerator('fake', latency=0.02)
+        full = generator('Question: "Why donate?"')[0]['generated_text']
+        short = generator('Question: "Why donate?"', max_time=0.01)[0]['generated_text']
+        self.assertTrue(full.startswith(short))
+        self.assertLess(len(short), len(full))
+
+    def test_fake_search_has_banks_and_camps(self):
+        titles = [result['title'] for result in FakeSearchClient(latency=0).search('Surat')['results']]
+        self.assertTrue(any('Bank' in title for title in titles))
+        self.assertTrue(any('Camp' in title for title in titles))
+
+    def test_mix_and_latency_summary(self):
+        self.assertEqual(parse_mix('kb=2,report'), {'kb': 2.0, 'report': 1.0})
+        with self.assertRaises(CommandError):
+            parse_mix('dance=1')
+        summary = latency_summary([0.1] * 99 + [1.0])
+        self.assertEqual((summary['count'], summary['p50_ms'], summary['p95_ms']), (100, 100.0, 100.0))
+        self.assertEqual(latency_summary([]), {'count': 0})
+
+    def test_sample_answers_complete_an_assessment(self):
+        data = post_json(self.client, '/api/report/', {'answer': ''}).json()
+        for answer in SAMPLE_REPORT_ANSWERS:
+            data = post_json(self.client, '/api/report/', {'answer': answer}).json()
+            if data.get('completed'):
+                break
+        self.assertTrue(data.get('completed'))
+        self.assertTrue(UserHealthProfile.objects.get().completed)
+
+
+class ModelBenchmarkTests(TestCase):
+    def test_prompts_cover_every_template_and_language(self):
+        prompts = benchmark_prompts()
+        self.assertEqual({(item['kind'], item['lang']) for item in prompts},
+                         {(kind, lang) for kind in ('router', 'explain', 'recommendations') for lang in ('en', 'hi', 'gu')})
+        self.assertTrue(all(item['settings'] for item in prompts))
+
+    def test_run_summary(self):
+        self.assertEqual(percentile([3, 1, 2], 50), 2)
+        run = summarize_run(4, [('router/en', 0.5, 2), ('explain/en', 1.5, 30)])
+        self.assertEqual(run['tokens_per_second'], 16.0)
+        self.assertEqual(sorted(run['by_prompt']), ['explain/en', 'router/en'])
+
+    def test_models_endpoint_surfaces_the_results_file(self):
+        with TemporaryDirectory() as tmp:
+            path = Path(tmp) / 'benchmarks.json'
+            with override_settings(MODEL_BENCHMARK_FILE=path):
+                self.assertEqual(self.client.get('/api/models/').json()['benchmarks'], {})
+                path.write_text(json.dumps({'summary': {'google/flan-t5-base': {'tokens_per_second': 12.5}}}))
+                benchmarks = self.client.get('/api/models/').json()['benchmarks']
+        self.assertEqual(benchmarks, {'google/flan-t5-base': {'tokens_per_second': 12.5}})
+
+
+@override_settings(THROTTLE_ENABLED=True, THROTTLE_PROXY_HEADER=None,
+                   CHAT_RATE_LIMITS={'ip': {'capacity': 10, 'rate': 1.0}},
+                   CHAT_REQUEST_COSTS={'kb': 2, 'generation': 6, 'system': 1})
+class ThrottlingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.request = RequestFactory().post('/api/chat/', REMOTE_ADDR='10.0.0.1')
+        clock = mock.patch.object(throttling.time, 'time', return_value=1000.0)
+        self.clock = clock.start()
+        self.addCleanup(clock.stop)
+
+    def test_generations_cost_more_than_kb_answers(self):
+        throttling.check_rate_limit(self.request, 'chat', 'generation')
+        throttling.check_rate_limit(self.request, 'chat', 'kb')
+        throttling.check_rate_limit(self.request, 'chat', 'kb')
+        with self.assertRaises(throttling.Throttled) as raised:
+            throttling.check_rate_limit(self.request, 'chat', 'generation')
+        self.assertEqual((raised.exception.scope, raised.exception.retry_after), ('ip', 6))
+
+    def test_rejected_request_is_not_charged_and_bucket_refills(self):
+        throttling.check_rate_limit(self.request, 'chat', 'generation')
+        with self.assertRaises(throttling.Throttled):
+            throttling.check_rate_limit(self.request, 'chat', 'generation')
+        throttling.check_rate_limit(self.request, 'chat', 'kb', count=2)  # the 4 tokens left
+        self.clock.return_value += 6
+        throttling.check_rate_limit(self.request, 'chat', 'generation')
+
+    def test_charge_is_capped_at_the_bucket_capacity(self):
+        throttling.check_rate_limit(self.request, 'chat', 'generation', count=5)  # 30 tokens, charged 10
+        with self.assertRaises(throttling.Throttled):
+            throttling.check_rate_limit(self.request, 'chat', 'kb')
+        self.clock.return_value += 10
+        throttling.check_rate_limit(self.request, 'chat', 'generation', count=5)
+
+    def test_buckets_are_per_client(self):
+        throttling.check_rate_limit(self.request, 'chat', 'generation')
+        other = RequestFactory().post('/api/chat/', REMOTE_ADDR='10.0.0.2')
+        throttling.check_rate_limit(other, 'chat', 'generation')
+
+    @override_settings(CHAT_RATE_LIMITS={'ip': {'capacity': 0, 'rate': 0.5}})
+    def test_chat_endpoint_answers_429_with_retry_after(self):
+        response = post_json(self.client, '/api/chat/', {'question': 'hi'})
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '2')
+        self.assertEqual(response.json()['retry_after'], 2)
+
+
+class ImportTimeTests(TestCase):
+    def test_startup_does_not_import_the_model_or_search_stacks(self):
+        modules = measure_imports()
+        self.assertIn('assistant.views', modules)
+        for name in settings.IMPORT_FORBIDDEN_MODULES:
+            self.assertNotIn(name, modules)
+
+
+# The manifest storage needs collectstatic, which tests don't run
+@override_settings(STORAGES={**settings.STORAGES, 'staticfiles': {
+    'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'}})
+class ChatPageTests(TestCase):
+    def test_page_links_its_static_assets_instead_of_inlining_them(self):
+        content = self.client.get('/').content.decode()
+        self.assertNotIn('<style', content)
+        assets = ASSET_PATTERN.findall(content)
+        self.assertIn('/static/assistant/chat.css', assets)
+        self.assertIn('/static/assistant/chat.js', assets)
+
+    def test_page_is_compressed_and_revalidated(self):
+        first = self.client.get('/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(first['Content-Encoding'], 'gzip')
+        self.assertFalse(is_cacheable(first))
+        again = self.client.get('/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(again.status_code, 304)
+
+    def test_cacheable_headers(self):
+        self.assertTrue(is_cacheable({'Cache-Control': 'max-age=315360000, public, immutable'}))
+        self.assertFalse(is_cacheable({'Cache-Control': 'no-cache'}))
+        self.assertFalse(is_cacheable({}))
+
+
+class StubPipeline:
+    """Records the keyword arguments of each call, like a text2text pipeline"""
+    def __init__(self, name):
+        self.name = name
+        self.model = f'{name} weights'
+        self.calls = []
+
+    def __call__(self, inputs, **kwargs):
+        self.calls.append(kwargs)
+        return [{'generated_text': f'{self.name}: {inputs}'}]
+
+
+@override_settings(LOADTEST_MODE=False, MODEL_SERVER_SOCKET=None, COMPILED_GENERATION=False)
+class AssistedDecodingTests(TestCase):
+    def setUp(self):
+        self.enterContext(mock.patch.dict(views.MODEL_CACHE, clear=True))
+        self.enterContext(mock.patch.object(views, 'load_pipeline', side_effect=StubPipeline))
+
+    @override_settings(ASSISTED_DECODING=True)
+    def test_large_model_drafts_with_base(self):
+        generator = views.load_model_if_needed('google/flan-t5-large')
+        self.assertIsInstance(generator, AssistedGenerator)
+        self.assertIs(generator.draft, views.MODEL_CACHE['google/flan-t5-base'])
+
+        self.assertEqual(generator('q', max_length=8), [{'generated_text': 'google/flan-t5-large: q'}])
+        self.assertEqual(generator.generator.calls,
+                         [{'assistant_model': 'google/flan-t5-base weights', 'max_length': 8}])
+        self.assertEqual(generator.name, 'google/flan-t5-large')  # attributes pass through
+
+    @override_settings(ASSISTED_DECODING=False)
+    def test_assisted_decoding_can_be_turned_off(self):
+        generator = views.load_model_if_needed('google/flan-t5-large')
+        self.assertIsInstance(generator, StubPipeline)
+        self.assertNotIn('google/flan-t5-base', views.MODEL_CACHE)
+
+
+@override_settings(MODEL_CASCADE=['small', 'medium', 'large'], CASCADE_SIMPLE_MAX_WORDS=4,
+                   CASCADE_BUSY_DEPTH=2, CASCADE_SATURATED_DEPTH=4)
+class CascadeTests(TestCase):
+    def route(self, question, depth=1, **kwargs):
+        with mock.patch.object(inference, 'queue_depth', return_value=depth):
+            return cascade.choose_route(question, **kwargs)
+
+    def test_simple_and_complex_questions_start_on_different_tiers(self):
+        self.assertEqual(self.route('What is plasma?'),
+                         {'model': 'small', 'escalate_to': 'medium', 'kb_only': False, 'decision': 'simple'})
+        route = self.route('Why do hospitals need so many platelets every week?')
+        self.assertEqual((route['model'], route['escalate_to']), ('medium', 'large'))
+
+    def test_load_keeps_to_the_smallest_tier_then_kb_only(self):
+        busy = self.route('Why do hospitals need so many platelets every week?', depth=3)
+        self.assertEqual((busy['model'], busy['escalate_to'], busy['decision']), ('small', None, 'busy'))
+        saturated = self.route('What is plasma?', depth=5, requested='large')
+        self.assertTrue(saturated['kb_only'])
+
+    def test_requested_and_language_models_skip_the_tiers(self):
+        self.assertEqual(self.route('What is plasma?', requested='large')['model'], 'large')
+        self.assertEqual(self.route('What is plasma?', language_model='mt0')['decision'], 'language')
+
+
+@override_settings(DEADLINE_MIN_GENERATION_SECONDS=0.01)
+class DeadlineTests(TestCase):
+    def test_call_is_skipped_once_the_deadline_has_passed(self):
+        before = DEADLINE_HITS.value(stage='test', outcome='skipped')
+        self.assertEqual(generate_within(Deadline(0), 'test', FakeGenerator('fake', latency=0), 'q'), (None, True))
+        self.assertEqual(DEADLINE_HITS.value(stage='test', outcome='skipped'), before + 1)
+
+    def test_decoding_stops_at_the_deadline_with_a_partial_answer(self):
+        prompt = 'Question: "Why donate?"'
+        full = FakeGenerator('fake', latency=0)(prompt)[0]['generated_text']
+        results, hit = generate_within(Deadline(0.05), 'test', FakeGenerator('fake', latency=0.5), prompt)
+        self.assertTrue(hit)
+        self.assertLess(len(results[0]['generated_text']), len(full))
+
+    def test_call_stopped_just_short_of_max_time_counts_as_truncated(self):
+        def generator(inputs, max_time, **kwargs):
+            time.sleep(max_time - 0.02)  # MaxTimeCriteria checks between decoding steps
+            return [{'generated_text': 'partial'}]
+
+        before = DEADLINE_HITS.value(stage='test', outcome='truncated')
+        self.assertTrue(generate_within(Deadline(0.2), 'test', generator, 'q')[1])
+        self.assertEqual(DEADLINE_HITS.value(stage='test', outcome='truncated'), before + 1)
+        self.assertFalse(generate_within(Deadline(5), 'test', FakeGenerator('fake', latency=0), 'q')[1])
+
+    def test_generate_many_skips_calls_after_the_deadline(self):
+        generator = FakeGenerator('fake', latency=0.03)
+        texts, hit = generate_many(Deadline(0.05), 'test', generator, ['Question: "a"', 'Question: "b"', 'Question: "c"'])
+        self.assertTrue(hit)
+        self.assertIsNotNone(texts[0])
+        self.assertIsNone(texts[-1])
+
+    def test_partial_answer_is_cut_back_to_a_full_sentence(self):
+        self.assertEqual(trim_partial_answer('Plasma is the liquid part. It carr'), 'Plasma is the liquid part.')
+        self.assertEqual(trim_partial_answer('रक्त जीवन है। यह'), 'रक्त जीवन है।')
+        self.assertEqual(trim_partial_answer('No sentence yet'), '')
+
+
+class CompiledGenerationTests(TestCase):
+    def test_compile_config_compiles_on_cpu(self):
+        config = cpu_compile_config(fullgraph=True, dynamic=False)
+        self.assertTrue(config._compile_all_devices)
+        self.assertNotIn('_compile_all_devices', config.to_dict())
+
+    def test_transformers_without_cpu_compile_is_reported(self):
+        class OldCompileConfig:
+            def __init__(self, **kwargs):
+                pass
+
+        with mock.patch('transformers.CompileConfig', OldCompileConfig):
+            with self.assertRaisesMessage(RuntimeError, 'transformers>=4.49'):
+                cpu_compile_config()
+
+    def test_inputs_are_padded_to_a_bucket(self):
+        pipeline = SimpleNamespace(model=SimpleNamespace(generation_config=SimpleNamespace()))
+        with mock.patch.dict('os.environ'):
+            generator = CompiledGenerator(pipeline, buckets=[128, 64])
+        self.assertEqual(pipeline.model.generation_config.cache_implementation, 'static')
+        self.assertEqual([generator.bucket_for(n) for n in (10, 64, 65, 900)], [64, 64, 128, 128])
+
+
+class ModelStoreTests(TestCase):
+    def setUp(self):
+        tmp = TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.store = Path(tmp.name)
+        self.enterContext(override_settings(MODEL_STORE_DIR=self.store, MODEL_PATHS={}, MODEL_STORE_REQUIRED=False))
+
+    def add_to_store(self, model_name):
+        path = model_store.store_path(model_name)
+        path.mkdir(parents=True)
+        (path / 'config.json').write_text('{}')
+        (path / 'model.safetensors').write_bytes(b'')
+        return path
+
+    def test_store_layout(self):
+        self.assertEqual(model_store.store_path('google/flan-t5-base'), self.store / 'google--flan-t5-base')
+        self.assertFalse(model_store.is_stored('google/flan-t5-base'))
+        self.add_to_store('google/flan-t5-base')
+        self.assertTrue(model_store.is_stored('google/flan-t5-base'))
+        self.assertTrue(model_store.is_local('google/flan-t5-base'))
+
+    def test_a_half_written_entry_is_not_used(self):
+        path = model_store.store_path('google/flan-t5-base')
+        path.mkdir(parents=True)
+        (path / 'config.json').write_text('{}')
+        self.assertEqual(model_store.model_source('google/flan-t5-base'), 'google/flan-t5-base')
+
+    def test_model_source_prefers_model_paths_then_the_store(self):
+        path = self.add_to_store('google/flan-t5-base')
+        self.assertEqual(model_store.model_source('google/flan-t5-base'), str(path))
+        with override_settings(MODEL_PATHS={'google/flan-t5-base': '/models/flan'}):
+            self.assertEqual(model_store.model_source('google/flan-t5-base'), '/models/flan')
+
+    @override_settings(MODEL_STORE_REQUIRED=True)
+    def test_required_store_refuses_the_hub(self):
+        with self.assertRaises(FileNotFoundError):
+            model_store.model_source('google/flan-t5-xl')
+
+
+@override_settings(INFERENCE_WORKERS=None, THREAD_PLAN_PIN=False)
+class ThreadPlanTests(TestCase):
+    def plan(self, cores, **kwargs):
+        topology = [[2 * core, 2 * core + 1] for core in range(cores)]  # two hyperthreads per core
+        with mock.patch.object(cpu_plan, 'physical_cores', return_value=topology):
+            return cpu_plan.plan_threads(cpus=[], **kwargs)
+
+    def test_cores_are_split_between_workers(self):
+        plan = self.plan(8, workers=2)
+        self.assertEqual((plan['cpus'], plan['concurrency'], plan['intra_op_threads']), (16, 1, 4))
+        self.assertEqual(plan['core_sets'], [list(range(0, 8)), list(range(8, 16))])
+
+    def test_concurrency_defaults_to_one_generation_per_four_cores(self):
+        plan = self.plan(16, workers=1)
+        self.assertEqual((plan['concurrency'], plan['intra_op_threads']), (4, 4))
+        with override_settings(INFERENCE_WORKERS=2):
+            self.assertEqual(self.plan(16, workers=1)['concurrency'], 2)
+
+    def test_more_workers_than_cores_share_them(self):
+        plan = self.plan(2, workers=3)
+        self.assertEqual(plan['intra_op_threads'], 1)
+        self.assertEqual(plan['core_sets'], [[0, 1], [2, 3], [0, 1]])
+
+    def test_executor_is_sized_like_the_plan(self):
+        self.assertEqual(inference.INFERENCE_WORKERS, cpu_plan.plan_threads()['concurrency'])
+
+    def test_startup_plan_is_logged_not_printed(self):
+        with mock.patch.object(cpu_plan, 'apply_thread_plan'), mock.patch('sys.stderr', new=io.StringIO()) as stderr:
+            with self.assertLogs('assistant.cpu_plan', 'INFO') as logs:
+                cpu_plan.apply_startup_plan(worker_index=0)
+        self.assertIn('Thread plan:', logs.output[0])
+        self.assertEqual(stderr.getvalue(), '')
+
+
+class TranslationCacheTests(TestCase):
+    def setUp(self):
+        self.enterContext(mock.patch.dict(translation._memory, clear=True))
+        self.translator = mock.Mock(wraps=FakeTranslator(latency=0))
+        self.enterContext(mock.patch.object(translation, '_translator', self.translator))
+
+    def test_texts_differing_in_case_or_spacing_share_a_translation(self):
+        result = translation.translate_many(['Drink water.', 'drink  WATER.', ' ', 'Rest.'], 'en', 'hi')
+        self.assertEqual(result, ['[hin_Deva] Drink water.', '[hin_Deva] Drink water.', ' ', '[hin_Deva] Rest.'])
+        self.assertEqual(self.translator.call_args.args[0], ['Drink water.', 'Rest.'])
+        self.assertEqual(Translation.objects.count(), 2)
+
+    def test_each_text_is_machine_translated_once(self):
+        translation.translate('Drink water.', 'en', 'gu')
+        translation.translate('Drink water.', 'en', 'gu')  # memory
+        translation._memory.clear()
+        self.assertEqual(translation.translate('drink water.', 'en', 'gu'), '[guj_Gujr] Drink water.')  # table
+        self.assertEqual(self.translator.call_count, 1)
+
+    def test_same_language_is_not_translated(self):
+        self.assertEqual(translation.translate_many(['Rest.'], 'hi', 'hi'), ['Rest.'])
+        self.translator.assert_not_called()
+
+
+class LanguageRoutingTests(TestCase):
+    def test_detects_script(self):
+        self.assertEqual(detect_language('રક્તદાન કોણ કરી શકે?'), 'gu')
+        self.assertEqual(detect_language('रक्तदान कौन कर सकता है?'), 'hi')
+        self.assertEqual(detect_language('Who can donate?'), 'en')
+
+    def setUp(self):
+        self.enterContext(mock.patch.dict(views.LOCAL_MODELS, clear=True))
+
+    def test_language_model_only_when_its_checkpoint_is_local(self):
+        with TemporaryDirectory() as tmp:
+            with override_settings(MODEL_PATHS={'bigscience/mt0-base': tmp}):
+                self.assertEqual(language_model('hi'), 'bigscience/mt0-base')
+                self.assertEqual(language_model('gu'), 'bigscience/mt0-base')
+                self.assertIsNone(language_model('en'))
+            views.LOCAL_MODELS.clear()
+            with override_settings(MODEL_PATHS={'bigscience/mt0-base': f'{tmp}/missing'}, MODEL_STORE_DIR=tmp):
+                self.assertIsNone(language_model('hi'))
+
+    def test_availability_is_checked_once_per_process(self):
+        with mock.patch.object(views, 'is_local', return_value=False) as is_local:
+            language_model('hi')
+            language_model('gu')
+        self.assertEqual(is_local.call_count, 1)
+
+    def test_models_not_stored_locally_are_not_offered(self):
+        with mock.patch.object(views, 'is_local', return_value=False):
+            models = self.client.get('/api/models/').json()['models']
+            self.assertIn('google/flan-t5-base', models)
+            self.assertNotIn('bigscience/mt0-base', models)
+            with mock.patch.object(views, 'choose_route', side_effect=RuntimeError('routed')) as route:
+                post_json(self.client, '/api/chat/', {'question': 'Why donate platelets?', 'model': 'bigscience/mt0-base'})
+        self.assertIsNone(route.call_args.args[1])  # left to the cascade
+
+    def test_tokenizer_cost(self):
+        class CharTokenizer:
+            unk_token_id = 0
+
+            def __call__(self, text, add_special_tokens=False):
+                return {'input_ids': [0 if char == '?' else 1 for char in text]}
+
+        self.assertEqual(tokenizer_cost(CharTokenizer(), ['ab?', 'c']), {'tokens_per_char': 1.0, 'unk_rate': 0.25})
+
+
+@override_settings(ANSWER_BANK_ENABLED=True)
+class AnswerBankTests(TestCase):
+    def setUp(self):
+        answer_bank.store_answer('What is plasma used for?', 'en', 'Plasma carries proteins.', ['Who needs plasma?'],
+                                 'google/flan-t5-base')
+
+    def test_questions_match_as_asked_or_normalized(self):
+        self.assertEqual(answer_bank.normalize_question('  What is PLASMA, used for?? '), 'what is plasma used for')
+        self.assertEqual(answer_bank.match_answer('What is plasma used for?', 'en')[1], 'exact')
+        entry, match = answer_bank.match_answer('what is plasma used for', 'en')
+        self.assertEqual((entry.answer, match), ('Plasma carries proteins.', 'normalized'))
+        self.assertEqual(answer_bank.match_answer('What is plasma used for?', 'hi'), (None, 'miss'))
+
+    def test_storing_again_replaces_the_entry(self):
+        answer_bank.store_answer('What is plasma used for?', 'en', 'Plasma heals.', [], 'google/flan-t5-large')
+        self.assertEqual(answer_bank.find_answer('What is plasma used for?', 'en').answer, 'Plasma heals.')
+
+    def test_lookups_are_counted_once_per_chat_question(self):
+        before = answer_bank.ANSWER_BANK_LOOKUPS.value(match='normalized')
+        answer_bank.find_answer('what is plasma used for', 'en')
+        self.assertEqual(answer_bank.ANSWER_BANK_LOOKUPS.value(match='normalized'), before + 1)
+
+    @override_settings(THROTTLE_ENABLED=True)
+    def test_chat_request_looks_the_question_up_once(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = post_json(self.client, '/api/chat/', {'question': 'What is plasma used for?'})
+        self.assertEqual(response.json()['answer'], 'Plasma carries proteins.')
+        bank_queries = [query for query in queries if 'assistant_precomputedanswer' in query['sql']]
+        self.assertEqual(len(bank_queries), 1)  # priced and answered from the same lookup
+
+    @override_settings(ANSWER_BANK_ENABLED=False)
+    def test_bank_can_be_turned_off(self):
+        self.assertIsNone(answer_bank.find_answer('What is plasma used for?', 'en'))
+
+    def test_corpus_reading(self):
+        with TemporaryDirectory() as tmp:
+            path = Path(tmp) / 'corpus.txt'
+            path.write_text('# comment\nWhat is plasma?\n\nhi\tरक्तदान क्या है?\nWhat is plasma?\n', encoding='utf-8')
+            self.assertEqual(read_corpus(path), [('en', 'What is plasma?'), ('hi', 'रक्तदान क्या है?')])
+
+
+# The async view answers on an inference pool thread, which needs committed data
+@override_settings(ANSWER_BANK_ENABLED=True, THROTTLE_ENABLED=True)
+class AsyncChatTests(TransactionTestCase):
+    def test_banked_question_is_answered_by_the_async_endpoint(self):
+        answer_bank.store_answer('What is plasma used for?', 'en', 'Plasma carries proteins.', [],
+                                 'google/flan-t5-base')
+        response = post_json(self.client, '/api/chat/async/', {'question': 'what is plasma used for'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['answer'], 'Plasma carries proteins.')
+        self.assertTrue(response.json()['precomputed'])
+
+
+@override_settings(LOADTEST_MODE=True, FAKE_GENERATION_SECONDS=0, FAKE_SEARCH_SECONDS=0, PIVOT_TRANSLATION=False,
+                   ANSWER_BANK_ENABLED=True, THROTTLE_ENABLED=False, CHAT_BATCH_MAX_QUESTIONS=5)
+class BatchChatTests(TestCase):
+    def setUp(self):
+        self.enterContext(mock.patch.dict(views.MODEL_CACHE, clear=True))
+        answer_bank.store_answer('What is plasma used for?', 'en', 'Plasma carries proteins.', [],
+                                 'google/flan-t5-base')
+
+    def batch(self, questions, **body):
+        return post_json(self.client, '/api/chat/batch/', {'questions': questions, **body})
+
+    def test_results_come_back_in_input_order(self):
+        questions = ['Why do hospitals need platelets?', 'What is plasma used for?', 'Blood banks in Surat', 42]
+        response = self.batch(questions, model='google/flan-t5-base')
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+        self.assertEqual(len(results), 4)
+        self.assertIn('placeholder answer', results[0]['answer'])
+        self.assertEqual(results[1]['answer'], 'Plasma carries proteins.')
+        self.assertIn('Surat', json.dumps(results[2]))
+        self.assertIn('error', results[3])  # one bad item does not fail the batch
+
+    def test_answers_survive_a_later_generation_failure(self):
+        class FailingGenerator(FakeGenerator):
+            def __call__(self, inputs, **kwargs):
+                outputs = super().__call__(inputs, **kwargs)
+                if 'placeholder answer' in outputs[0]['generated_text']:
+                    raise RuntimeError('out of memory')
+                return outputs
+
+        generator = FailingGenerator('google/flan-t5-base', latency=0)
+        with mock.patch.object(views, 'load_model_if_needed', return_value=generator):
+            results = self.batch(['Blood banks in Surat', 'Why do hospitals need platelets?'],
+                                 model='google/flan-t5-base').json()['results']
+        self.assertNotIn('error', results[0])
+        self.assertIn('Surat', json.dumps(results[0]))
+        self.assertEqual(results[1]['error'], 'out of memory')
+
+    def test_batch_size_is_limited(self):
+        self.assertEqual(self.batch(['What is plasma?'] * 6).status_code, 400)
+        self.assertEqual(self.batch([]).status_code, 400)
+        self.assertEqual(post_json(self.client, '/api/chat/batch/', {'questions': 'What is plasma?'}).status_code, 400)
+
+
+@override_settings(ELIGIBILITY_EARLY_EXIT=True)
+class EarlyExitTests(TestCase):
+    def answer(self, text):
+        return post_json(self.client, '/api/report/', {'answer': text}).json()
+
+    def not_eligible_count(self):
+        row = DailyAssessmentRollup.objects.filter(dimension='eligibility', value='Not Eligible').first()
+        return row.count if row else 0
+
+    def test_hard_disqualifier_ends_the_questionnaire(self):
+        self.answer('')
+        self.answer('Ravi')
+        result = self.answer('15')
+        self.assertTrue(result['ended_early'])
+        self.assertFalse(result['eligible'])
+        self.assertIn("You must be at least 18 years old to donate blood.", result['reasons'])
+        self.assertNotIn(REPORT_FLOW_COOKIE, {name for name, cookie in self.client.cookies.items() if cookie.value})
+        self.assertEqual(self.not_eligible_count(), 1)
+
+    def test_restart_after_an_early_exit_starts_from_scratch(self):
+        self.answer('')
+        self.answer('Ravi')
+        first_id = self.answer('15')['profile_id']
+
+        self.answer('')
+        second = self.answer('Ravi')
+        self.assertEqual(second['question_number'], 2)
+        self.assertEqual(self.answer('30')['question_number'], 3)
+        self.assertEqual(UserHealthProfile.objects.count(), 2)
+        self.assertEqual(UserHealthProfile.objects.get(pk=first_id).age, 15)  # the earlier report is kept
+        self.assertEqual(self.not_eligible_count(), 1)
+
+    def test_restart_with_a_lost_cursor_discards_the_unfinished_profile(self):
+        self.answer('')
+        self.answer('Ravi')
+        del self.client.cookies[REPORT_FLOW_COOKIE]
+        self.assertEqual(self.answer('')['question_number'], 1)
+        self.assertFalse(UserHealthProfile.objects.exists())
+
+    @override_settings(ELIGIBILITY_EARLY_EXIT=False)
+    def test_full_questionnaire_when_turned_off(self):
+        self.answer('')
+        self.answer('Ravi')
+        self.assertEqual(self.answer('15')['question_number'], 3)
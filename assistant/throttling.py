@@ -0,0 +1,89 @@
+"""
+Token-bucket rate limiting for the inference endpoints.
+
+Each client has a bucket per session and per IP address, kept in the Django
+cache. A bucket holds up to `capacity` tokens and refills at `rate` tokens per
+second; a request is admitted only if every bucket can pay its cost, so cheap
+knowledge-base answers use up less of a client's allowance than generations.
+
+Buckets are updated under a process-local lock. With a shared cache (Redis) and
+several workers, concurrent requests from one client can occasionally both be
+admitted; the limiter errs on the side of letting requests through.
+"""
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .metrics import Counter
+
+THROTTLED = Counter(
+    'assistant_throttled_total', 'Requests rejected by the rate limiter.', ('endpoint', 'scope'),
+)
+TOKENS_CHARGED = Counter(
+    'assistant_throttle_tokens_total', 'Rate limiter tokens charged to admitted requests.', ('endpoint', 'cost'),
+)
+
+_lock = threading.Lock()
+
+
+class Throttled(Exception):
+    """Raised when a bucket cannot pay for the request; carries a Retry-After hint in seconds"""
+    def __init__(self, scope, retry_after):
+        super().__init__(f"Rate limited by {scope} bucket, retry after {retry_after}s")
+        self.scope = scope
+        self.retry_after = retry_after
+
+
+def client_ip(request):
+    if settings.THROTTLE_PROXY_HEADER:
+        forwarded = request.META.get(settings.THROTTLE_PROXY_HEADER, '')
+        if forwarded:
+            return forwarded.split(',')[0].strip()
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def _buckets(request):
+    buckets = []
+    session_key = request.session.session_key if hasattr(request, 'session') else None
+    if session_key and 'session' in settings.CHAT_RATE_LIMITS:
+        buckets.append(('session', session_key))
+    if 'ip' in settings.CHAT_RATE_LIMITS:
+        buckets.append(('ip', client_ip(request)))
+    return buckets
+
+
+def check_rate_limit(request, endpoint, cost, count=1):
+    """
+    Charge the request's buckets `CHAT_REQUEST_COSTS[cost]` tokens (times count,
+    for batch requests), or raise Throttled without charging anything if any
+    bucket is short. The charge is capped at the smallest bucket's capacity, so
+    a batch is never too big to ever be admitted.
+    """
+    if not settings.THROTTLE_ENABLED:
+        return
+    buckets = _buckets(request)
+    amount = settings.CHAT_REQUEST_COSTS[cost] * count
+    # A bucket with no capacity stays closed
+    capacities = [settings.CHAT_RATE_LIMITS[scope]['capacity'] for scope, _ in buckets]
+    if any(capacities):
+        amount = min(amount, *filter(None, capacities))
+    now = time.time()
+    with _lock:
+        updates = []
+        for scope, ident in buckets:
+            limit = settings.CHAT_RATE_LIMITS[scope]
+            key = f"throttle:{scope}:{ident}"
+            tokens, updated = cache.get(key) or (limit['capacity'], now)
+            tokens = min(limit['capacity'], tokens + (now - updated) * limit['rate'])
+            if tokens < amount:
+                THROTTLED.inc(endpoint=endpoint, scope=scope)
+                raise Throttled(scope, max(1, math.ceil((amount - tokens) / limit['rate'])))
+            # Keep the entry only until the bucket would be full again
+            timeout = math.ceil(limit['capacity'] / limit['rate']) + 1
+            updates.append((key, (tokens - amount, now), timeout))
+        for key, state, timeout in updates:
+            cache.set(key, state, timeout)
+    TOKENS_CHARGED.inc(amount, endpoint=endpoint, cost=cost)
@@ -0,0 +1,144 @@
+"""
+Cached translation layer for the pivot chat mode (PIVOT_TRANSLATION): Hindi and
+Gujarati questions are answered in English, which the models handle far better,
+and translated. Lookups go memory -> Translation table -> translation model, and
+every model translation is stored, so each text is machine-translated once.
+"""
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError
+
+from .metrics import Counter
+from .models import Translation
+
+TRANSLATIONS = Counter(
+    'assistant_translations_total', 'Texts translated for pivot mode, by where the translation came from.',
+    ('source',),
+)
+
+_memory = OrderedDict()
+_lock = threading.Lock()
+_translator = None
+
+# Translated sentence by sentence, so long answers stay within the model's length limit
+SENTENCE_END = re.compile(r'(?<=[.!?।])\s+')
+
+
+def normalize(text):
+    return ' '.join(text.split()).lower()
+
+
+def text_hash(text):
+    return hashlib.sha1(normalize(text).encode('utf-8')).hexdigest()
+
+
+def get_translator():
+    global _translator
+    with _lock:
+        if _translator is None:
+            if settings.LOADTEST_MODE:
+                from .fakes import FakeTranslator
+                _translator = FakeTranslator()
+            else:
+                from transformers import pipeline
+
+                from .model_store import model_source
+                print(f"Loading translation model: {settings.TRANSLATION_MODEL}...")
+                _translator = pipeline("translation", model=model_source(settings.TRANSLATION_MODEL))
+    return _translator
+
+
+def machine_translate(texts, source, target):
+    """Translate a list of texts with the model, one batch of sentences for all of them"""
+    pieces = [SENTENCE_END.split(text.strip()) for text in texts]
+    sentences = [sentence for sentence_list in pieces for sentence in sentence_list]
+    outputs = get_translator()(
+        sentences, src_lang=settings.TRANSLATION_LANG_CODES[source],
+        tgt_lang=settings.TRANSLATION_LANG_CODES[target], max_length=400,
+    )
+    translated = iter(output['translation_text'] for output in outputs)
+    return [' '.join(next(translated) for _ in sentence_list) for sentence_list in pieces]
+
+
+def _remember(key, text):
+    with _lock:
+        _memory[key] = text
+        _memory.move_to_end(key)
+        while len(_memory) > settings.TRANSLATION_MEMORY_SIZE:
+            _memory.popitem(last=False)
+
+
+def store_translation(source_text, text, source, target, origin):
+    """Save one translation to the table, replacing an existing one for the same text"""
+    Translation.objects.update_or_create(
+        source_lang=source, target_lang=target, source_hash=text_hash(source_text),
+        defaults={'source_text': source_text, 'text': text, 'origin': origin},
+    )
+    _remember((source, target, text_hash(source_text)), text)
+
+
+def translate_many(texts, source, target):
+    """
+    Translate texts from source to target language, through the caches. Texts
+    that differ only in case or spacing share one translation.
+    """
+    if source == target:
+        return list(texts)
+    hashes = [text_hash(text) for text in texts]
+    results = {}  # text hash -> translation
+    missing = {}  # text hash -> first text with that hash
+    for text, digest in zip(texts, hashes):
+        if digest in results or digest in missing or not text.strip():
+            continue
+        with _lock:
+            cached = _memory.get((source, target, digest))
+        if cached is not None:
+            TRANSLATIONS.inc(source='memory')
+            results[digest] = cached
+        else:
+            missing[digest] = text
+
+    if missing:
+        for row in Translation.objects.filter(source_lang=source, target_lang=target, source_hash__in=missing):
+            TRANSLATIONS.inc(source='table')
+            del missing[row.source_hash]
+            results[row.source_hash] = row.text
+            _remember((source, target, row.source_hash), row.text)
+
+    if missing:
+        sources = list(missing.items())
+        translated = machine_translate([source_text for _, source_text in sources], source, target)
+        for (digest, source_text), text in zip(sources, translated):
+            TRANSLATIONS.inc(source='model')
+            results[digest] = text
+            try:
+                Translation.objects.create(
+                    source_lang=source, target_lang=target, source_hash=digest,
+                    source_text=source_text, text=text, origin='runtime',
+                )
+            except IntegrityError:
+                pass  # translated concurrently by another request
+            _remember((source, target, digest), text)
+    return [results[digest] if text.strip() else text for text, digest in zip(texts, hashes)]
+
+
+def translate(text, source, target):
+    return translate_many([text], source, target)[0]
+
+
+def pivot_cache_key(question, lang):
+    return f"pivot-answer:{lang}:{text_hash(question)}"
+
+
+def get_pivot_answer(question, lang):
+    """A previously translated answer to this question, or None"""
+    return cache.get(pivot_cache_key(question, lang))
+
+
+def set_pivot_answer(question, lang, answer):
+    cache.set(pivot_cache_key(question, lang), answer, settings.PIVOT_ANSWER_CACHE_SECONDS)
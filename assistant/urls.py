@@ -4,10 +4,15 @@ from . import views
 urlpatterns = [
     path('', views.chat_page, name='home'), 
     path('api/chat/', views.chat_api, name='chat_api'),
+    path('api/chat/async/', views.chat_api_async, name='chat_api_async'),
+    path('api/chat/batch/', views.chat_batch_api, name='chat_batch_api'),
     path('api/report/', views.report_api, name='report_api'),
     path('api/reset/', views.reset_assessment, name='reset_assessment'),
     path('api/models/', views.get_models, name='get_models'),
     path('download-report/<int:profile_id>/', views.download_report, name='download_report'),
+    path('api/export/', views.export_profiles, name='export_profiles'),
+    path('api/analytics/', views.analytics_api, name='analytics_api'),
+    path('metrics', views.metrics_view, name='metrics'),
     path('register/', views.register_view, name='register'),
     path("get-response/", views.get_response, name="get_response"),
 ]
@@ -1,30 +1,55 @@
 from django.shortcuts import render, redirect
+from django.conf import settings
+from django.core import signing
 from django.contrib.auth import login
 from django.contrib.auth.forms import UserCreationForm
+from django.db import transaction
+from django.views.decorators.cache import cache_control
 from django.views.decorators.csrf import csrf_exempt
-from django.http import JsonResponse, HttpResponse
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import condition
+from django.http import JsonResponse, HttpResponse, FileResponse, StreamingHttpResponse
 from django.template.loader import render_to_string
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.utils.http import parse_etags
+import hashlib
 import json
-import requests
+from asgiref.sync import sync_to_async
 import re
 import random
 import uuid
-from datetime import datetime
-from transformers import pipeline
-from tavily import TavilyClient
+from datetime import timedelta
 from .models import UserHealthProfile
+from .benchmarks import load_model_benchmarks
+from .answer_bank import find_answer
+from .analytics import delete_assessments, record_assessment_result, record_assessment_started, summarize_rollups
+from .cascade import AUTO_MODEL, CASCADE_ESCALATIONS, choose_route
+from .inference import InferenceQueueFull, run_inference, sync_generation
+from .throttling import Throttled, check_rate_limit
+from .translation import get_pivot_answer, set_pivot_answer, translate, translate_many
+from .metrics import Counter, render_metrics, span, timed_request
+from .model_server import RemoteGenerator
+from .model_store import is_local, load_pipeline
+from .fakes import FakeGenerator, FakeSearchClient
+from .generation import AssistedGenerator, CompiledGenerator, Deadline, generate_many, generate_within
+from .exports import EXPORT_FORMATS, filter_profiles, iter_export
+from .reports import (
+    ReportRenderFailed, delete_report_pdfs, get_report_pdf, render_report_html, report_etag, report_filename,
+)
 
 # --- 1. CONFIGURATION ---
 TAVILY_API_KEY = "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" 
-TAVILY_CLIENT = TavilyClient(api_key=TAVILY_API_KEY)
 IRCS_GUJ_CAMPS_URL = "https://www.indianredcross.org/gujarat"
 
 # Available AI Models Configuration
+# draft_model: smaller model with the same tokenizer used for assisted decoding
 AVAILABLE_MODELS = {
     "google/flan-t5-large": {
         "name": "Flan-T5 Large",
         "description": "Balanced - Best for most tasks",
-        "badge": "Default"
+        "badge": "Default",
+        "draft_model": "google/flan-t5-base"
     },
     "google/flan-t5-base": {
         "name": "Flan-T5 Base",
@@ -34,14 +59,40 @@ AVAILABLE_MODELS = {
     "google/flan-t5-xl": {
         "name": "Flan-T5 XL",
         "description": "Powerful - Most accurate",
-        "badge": "Advanced"
+        "badge": "Advanced",
+        "draft_model": "google/flan-t5-base"
+    },
+    "bigscience/mt0-base": {
+        "name": "mT0 Base",
+        "description": "Multilingual - Hindi and Gujarati",
+        "badge": "Indic",
+        "languages": ["hi", "gu"]
     }
 }
 
+# Lets the server pick a model per question and load (see assistant/cascade.py)
+AUTO_MODEL_INFO = {
+    "name": "Auto",
+    "description": "Picks a model for each question and current load",
+    "badge": "Smart"
+}
+
 # Cache for loaded models
 MODEL_CACHE = {}
+# Whether each model's checkpoint is local; checked once per process, since the
+# model store is built before the workers start
+LOCAL_MODELS = {}
 DEFAULT_MODEL = "google/flan-t5-large"
 
+# Generation settings for each kind of model call (also used by benchmark_models).
+# num_beams is explicit because newer transformers pipelines default to 4 beams,
+# which is 4x the decoding work and rules out assisted decoding.
+GENERATION_SETTINGS = {
+    'router': {'max_length': 5, 'do_sample': False, 'num_beams': 1},
+    'explain': {'max_length': 512, 'do_sample': True, 'temperature': 0.7, 'top_p': 0.9, 'num_return_sequences': 1, 'num_beams': 1},
+    'recommendations': {'max_length': 100, 'do_sample': True, 'temperature': 0.95, 'num_beams': 1},
+}
+
 # --- 2. HELPER FUNCTIONS ---
 
 def detect_language(text):
@@ -77,15 +128,18 @@ def get_language_response_templates(lang):
     templates = {
         'en': {
             'contextless': "I need a little more detail. What specific topic would you like me to explain more about? (e.g., 'Explain more about age limits')",
-            'recommendations': ["Who can donate blood?", "What are the risks?", "Locations near me"]
+            'recommendations': ["Who can donate blood?", "What are the risks?", "Locations near me"],
+            'busy': "The assistant is very busy right now, so I can only answer common questions at the moment. Please try again in a minute."
         },
         'hi': {
             'contextless': "मुझे थोड़ा और विवरण चाहिए। आप किस विशिष्ट विषय के बारे में अधिक जानना चाहेंगे? (उदाहरण: 'उम्र सीमा के बारे में अधिक बताएं')",
-            'recommendations': ["रक्तदान कौन कर सकता है?", "जोखिम क्या हैं?", "मेरे पास स्थान"]
+            'recommendations': ["रक्तदान कौन कर सकता है?", "जोखिम क्या हैं?", "मेरे पास स्थान"],
+            'busy': "सहायक अभी बहुत व्यस्त है, इसलिए इस समय मैं केवल सामान्य प्रश्नों के उत्तर दे सकता हूं। कृपया एक मिनट बाद फिर से प्रयास करें।"
         },
         'gu': {
             'contextless': "મને થોડી વધુ વિગતો જોઈએ છે. તમે કયા ચોક્કસ વિષય વિશે વધુ સમજાવવા માંગો છો? (ઉદાહરણ: 'ઉંમર મર્યાદા વિશે વધુ સમજાવો')",
-            'recommendations': ["રક્તદાન કોણ કરી શકે છે?", "જોખમો શું છે?", "મારી નજીકના સ્થાનો"]
+            'recommendations': ["રક્તદાન કોણ કરી શકે છે?", "જોખમો શું છે?", "મારી નજીકના સ્થાનો"],
+            'busy': "સહાયક અત્યારે ખૂબ વ્યસ્ત છે, તેથી આ સમયે હું ફક્ત સામાન્ય પ્રશ્નોના જવાબ આપી શકું છું. કૃપા કરીને એક મિનિટ પછી ફરી પ્રયાસ કરો."
         }
     }
     return templates.get(lang, templates['en'])
@@ -194,9 +248,28 @@ def load_model_if_needed(model_name=None):
         print(f"Using cached model: {model_name}")
         return MODEL_CACHE[model_name]
     
+    # Load-test mode: deterministic fake, no model download
+    if settings.LOADTEST_MODE:
+        generator = FakeGenerator(model_name)
+        MODEL_CACHE[model_name] = generator
+        return generator
+
+    # Shared model server: this worker only holds a thin client
+    if settings.MODEL_SERVER_SOCKET:
+        generator = RemoteGenerator(model_name)
+        MODEL_CACHE[model_name] = generator
+        return generator
+    
     print(f"Loading Generative Model: {model_name}...")
     try:
-        generator = pipeline("text2text-generation", model=model_name, max_length=512)
+        generator = load_pipeline(model_name)
+        draft_name = AVAILABLE_MODELS[model_name].get('draft_model')
+        if settings.COMPILED_GENERATION:
+            # Static-cache compiled decoding; not combined with assisted decoding
+            generator = CompiledGenerator(generator)
+        elif draft_name and settings.ASSISTED_DECODING:
+            print(f"Using {draft_name} as draft model for {model_name}")
+            generator = AssistedGenerator(generator, load_model_if_needed(draft_name))
         MODEL_CACHE[model_name] = generator
         return generator
     except Exception as e:
@@ -207,14 +280,97 @@ def load_model_if_needed(model_name=None):
             return MODEL_CACHE[DEFAULT_MODEL]
         raise e
 
-def generate_ai_recommendations(topic_text, generator, lang='en'):
-    """Generates 3 SPECIFIC follow-up questions based on the answer text."""
-    try:
-        short_context = topic_text[:400]
-        
-        # Language-specific prompts
-        prompts = {
-            'en': f"""
+def model_is_local(model_name):
+    """is_local, cached in LOCAL_MODELS so the filesystem is not checked on every request"""
+    if model_name not in LOCAL_MODELS:
+        LOCAL_MODELS[model_name] = is_local(model_name)
+    return LOCAL_MODELS[model_name]
+
+def offered_models():
+    """
+    The AVAILABLE_MODELS clients may pick. Language models are only offered when
+    their checkpoint is local, so picking one never downloads it inside a request.
+    """
+    return {model_name: config for model_name, config in AVAILABLE_MODELS.items()
+            if not config.get('languages') or model_is_local(model_name)}
+
+def language_model(lang):
+    """The model configured for `lang` in AVAILABLE_MODELS, if its checkpoint is available locally"""
+    for model_name, config in AVAILABLE_MODELS.items():
+        if lang in config.get('languages', ()) and model_is_local(model_name):
+            return model_name
+    return None
+
+# Prompt templates, shared by the views and the benchmark commands
+
+def build_router_prompt(question, lang='en'):
+    """Few-shot SEARCH/EXPLAIN classification prompt"""
+    router_examples = {
+        'en': [
+            '"Find blood bank" -> SEARCH',
+            '"Locations in Surat" -> SEARCH',
+            '"Donate near me" -> SEARCH',
+            '"Blood donation camps" -> SEARCH',
+            '"What is hemoglobin?" -> EXPLAIN',
+            '"Max age for donation" -> EXPLAIN'
+        ],
+        'hi': [
+            '"रक्त बैंक खोजें" -> SEARCH',
+            '"सूरत में स्थान" -> SEARCH',
+            '"मेरे पास दान करें" -> SEARCH',
+            '"रक्तदान शिविर" -> SEARCH',
+            '"हीमोग्लोबिन क्या है?" -> EXPLAIN',
+            '"दान की अधिकतम उम्र" -> EXPLAIN'
+        ],
+        'gu': [
+            '"રક્ત બેંક શોધો" -> SEARCH',
+            '"સુરતમાં સ્થાનો" -> SEARCH',
+            '"મારી નજીક દાન કરો" -> SEARCH',
+            '"રક્તદાન શિબિર" -> SEARCH',
+            '"હીમોગ્લોબિન શું છે?" -> EXPLAIN',
+            '"દાન માટે મહત્તમ ઉંમર" -> EXPLAIN'
+        ]
+    }
+    
+    examples = router_examples.get(lang, router_examples['en'])
+    router_prompt = f"""
+                Classify user intent.
+                {chr(10).join(examples)}
+                
+                Question: "{question}"
+                Answer (SEARCH or EXPLAIN):
+                """
+    return router_prompt
+
+def build_explain_prompt(question, lang='en'):
+    """Prompt for a generated answer when the knowledge base has none"""
+    explain_prompts = {
+        'en': f"""Answer this question about blood donation in English clearly and accurately.
+
+Question: "{question}"
+
+Answer in English:""",
+        'hi': f"""रक्तदान के बारे में इस प्रश्न का उत्तर हिंदी में स्पष्ट और सटीक रूप से दें।
+
+प्रश्न: "{question}"
+
+हिंदी में उत्तर दें:""",
+        'gu': f"""રક્તદાન વિશે આ પ્રશ્નનો જવાબ ગુજરાતીમાં સ્પષ્ટ અને સચોટ રીતે આપો.
+
+પ્રશ્ન: "{question}"
+
+ગુજરાતીમાં જવાબ આપો:"""
+    }
+    
+    return explain_prompts.get(lang, explain_prompts['en'])
+
+def build_recommendation_prompt(topic_text, lang='en'):
+    """Prompt asking for 3 follow-up questions about topic_text"""
+    short_context = topic_text[:400]
+    
+    # Language-specific prompts
+    prompts = {
+        'en': f"""
         Read this medical text: "{short_context}"
         
         Task: Create 3 specific follow-up questions a user might ask. 
@@ -226,7 +382,7 @@ def generate_ai_recommendations(topic_text, generator, lang='en'):
         
         Output Format: Q1? Q2? Q3?
         """,
-            'hi': f"""
+        'hi': f"""
         इस चिकित्सा पाठ को पढ़ें: "{short_context}"
         
         कार्य: उपयोगकर्ता द्वारा पूछे जा सकने वाले 3 विशिष्ट अनुवर्ती प्रश्न बनाएं।
@@ -238,7 +394,7 @@ def generate_ai_recommendations(topic_text, generator, lang='en'):
         
         आउटपुट प्रारूप: Q1? Q2? Q3?
         """,
-            'gu': f"""
+        'gu': f"""
         આ તબીબી ટેક્સ્ટ વાંચો: "{short_context}"
         
         કાર્ય: વપરાશકર્તા પૂછી શકે તેવા 3 ચોક્કસ અનુવર્તી પ્રશ્નો બનાવો.
@@ -250,41 +406,53 @@ def generate_ai_recommendations(topic_text, generator, lang='en'):
         
         આઉટપુટ ફોર્મેટ: Q1? Q2? Q3?
         """
-        }
-        
-        prompt = prompts.get(lang, prompts['en'])
-        results = generator(prompt, max_length=100, do_sample=True, temperature=0.95)
-        raw_text = results[0]['generated_text'].strip()
-        
-        parts = raw_text.split('?')
-        clean_recs = []
-        for p in parts:
-            clean_q = re.sub(r'^[0-9\.\-\s]+', '', p).strip()
-            if len(clean_q) > 10:
-                # Language-specific generic phrase checks
-                generic_phrases = {
-                    'en': ["tell me more", "explain"],
-                    'hi': ["और बताओ", "समझाओ"],
-                    'gu': ["વધુ કહો", "સમજાવો"]
-                }
-                phrases = generic_phrases.get(lang, generic_phrases['en'])
-                if not any(phrase in clean_q.lower() for phrase in phrases):
-                    clean_recs.append(clean_q + "?")
-        
-        clean_recs = list(set(clean_recs))
-        
-        # Language-specific fallback recommendations
-        fallbacks = {
-            'en': ["What are the benefits?", "Are there any side effects?", "Who can donate?"],
-            'hi': ["लाभ क्या हैं?", "क्या कोई दुष्प्रभाव हैं?", "रक्तदान कौन कर सकता है?"],
-            'gu': ["લાભો શું છે?", "શું કોઈ આડઅસરો છે?", "રક્તદાન કોણ કરી શકે છે?"]
-        }
+    }
+    return prompts.get(lang, prompts['en'])
+
+def parse_recommendations(raw_text, lang='en'):
+    """Split generated text into up to 3 specific questions, topped up with fallbacks"""
+    parts = raw_text.split('?')
+    clean_recs = []
+    for p in parts:
+        clean_q = re.sub(r'^[0-9\.\-\s]+', '', p).strip()
+        if len(clean_q) > 10:
+            # Language-specific generic phrase checks
+            generic_phrases = {
+                'en': ["tell me more", "explain"],
+                'hi': ["और बताओ", "समझाओ"],
+                'gu': ["વધુ કહો", "સમજાવો"]
+            }
+            phrases = generic_phrases.get(lang, generic_phrases['en'])
+            if not any(phrase in clean_q.lower() for phrase in phrases):
+                clean_recs.append(clean_q + "?")
+
+    clean_recs = list(set(clean_recs))
+
+    # Language-specific fallback recommendations
+    fallbacks = {
+        'en': ["What are the benefits?", "Are there any side effects?", "Who can donate?"],
+        'hi': ["लाभ क्या हैं?", "क्या कोई दुष्प्रभाव हैं?", "रक्तदान कौन कर सकता है?"],
+        'gu': ["લાભો શું છે?", "શું કોઈ આડઅસરો છે?", "રક્તદાન કોણ કરી શકે છે?"]
+    }
+
+    if len(clean_recs) < 3:
+        fallback = fallbacks.get(lang, fallbacks['en'])
+        clean_recs.extend(fallback)
+
+    return clean_recs[:3]
+
+def generate_ai_recommendations(topic_text, generator, lang='en', deadline=None):
+    """Generates 3 SPECIFIC follow-up questions based on the answer text."""
+    try:
+        prompt = build_recommendation_prompt(topic_text, lang)
+        results, deadline_hit = generate_within(deadline or Deadline(), 'recommendations', generator, prompt,
+                                                **GENERATION_SETTINGS['recommendations'])
+        raw_text = results[0]['generated_text'].strip() if results else ''
+        if deadline_hit:
+            # Drop the question that was cut off mid-way
+            raw_text = raw_text[:raw_text.rfind('?') + 1]
         
-        if len(clean_recs) < 3:
-            fallback = fallbacks.get(lang, fallbacks['en'])
-            clean_recs.extend(fallback)
-            
-        return clean_recs[:3]
+        return parse_recommendations(raw_text, lang)
     except Exception as e:
         print(f"Rec Gen Error: {e}")
         # Language-specific default recommendations
@@ -295,6 +463,20 @@ def generate_ai_recommendations(topic_text, generator, lang='en'):
         }
         return defaults.get(lang, defaults['en'])
 
+SEARCH_RESULTS = Counter(
+    'assistant_search_results_total', 'Blood bank searches, by whether any blood bank was found.', ('found',),
+)
+
+_tavily_client = None
+
+def get_tavily_client():
+    """Search client, created on first use"""
+    global _tavily_client
+    if _tavily_client is None:
+        from tavily import TavilyClient
+        _tavily_client = TavilyClient(api_key=TAVILY_API_KEY)
+    return _tavily_client
+
 def get_blood_data_dynamic(city):
     banks = []
     camps = []
@@ -303,7 +485,8 @@ def get_blood_data_dynamic(city):
 
     try:
         query = f"Official blood banks, donation centers, and upcoming camps in {city}, Gujarat"
-        response = TAVILY_CLIENT.search(query=query, search_depth="basic", max_results=7)
+        client = FakeSearchClient() if settings.LOADTEST_MODE else get_tavily_client()
+        response = client.search(query=query, search_depth="basic", max_results=7)
 
         for result in response['results']:
             title = result['title'].lower()
@@ -335,15 +518,33 @@ def get_blood_data_dynamic(city):
 
 # --- 3. VIEWS ---
 def home(request): return render(request, 'assistant/home.html')
-def chat_page(request): return render(request, 'assistant/chat.html')
+
+_chat_page = None
+
+def get_chat_page():
+    """Rendered chat page and its ETag. It has no per-user content, so it is rendered once per process"""
+    global _chat_page
+    if _chat_page is None or settings.DEBUG:
+        content = render_to_string('assistant/chat.html')
+        _chat_page = (content, hashlib.sha1(content.encode('utf-8')).hexdigest())
+    return _chat_page
+
+# The page is revalidated on each visit (its static URLs change on deploy);
+# the hashed CSS/JS it links to are cached for good by WhiteNoise.
+@gzip_page
+@cache_control(no_cache=True)
+@condition(etag_func=lambda request: get_chat_page()[1])
+def chat_page(request): return HttpResponse(get_chat_page()[0])
+
 def get_response(request): return JsonResponse({"msg": "Use POST /api/chat"})
 
 @csrf_exempt
 def get_models(request):
     """Get available AI models"""
     return JsonResponse({
-        'models': AVAILABLE_MODELS,
-        'default': DEFAULT_MODEL
+        'models': {AUTO_MODEL: AUTO_MODEL_INFO, **offered_models()},
+        'default': AUTO_MODEL,
+        'benchmarks': load_model_benchmarks(settings.MODEL_BENCHMARK_FILE)
     })
 
 def register_view(request):
@@ -388,21 +589,118 @@ ELIGIBILITY_QUESTIONS = [
     "If yes, please specify:"
 ]
 
-def get_or_create_profile(request):
-    """Get or create user health profile"""
+# Average questions per outcome = questions_asked_total / assessments_total
+ASSESSMENTS_FINISHED = Counter(
+    'assistant_eligibility_assessments_total',
+    'Finished eligibility questionnaires, by outcome (ended_early: stopped at a hard disqualifier).',
+    ('outcome',),
+)
+ASSESSMENT_QUESTIONS = Counter(
+    'assistant_eligibility_questions_asked_total',
+    'Questions asked in finished eligibility questionnaires (skipped follow-ups not counted), by outcome.',
+    ('outcome',),
+)
+
+def should_skip_question(question_num, profile):
+    """True if the flow skips this question given the answers so far"""
+    # Skip pregnancy/breastfeeding questions for males or other genders
+    if question_num in (23, 24):  # Pregnancy, Breastfeeding
+        if profile.gender and 'male' in profile.gender.lower():
+            return True
+
+    # Skip "If yes, specify..." questions when previous answer was effectively "No"
+    follow_ups = {
+        12: profile.has_allergies,           # Q11 -> Q12 (allergies)
+        14: profile.taking_medications,      # Q13 -> Q14 (medications)
+        16: profile.donated_before,          # Q15 -> Q16 (donated before)
+        18: profile.has_chronic_diseases,    # Q17 -> Q18 (chronic diseases)
+        20: profile.has_infectious_disease,  # Q19 -> Q20 (infectious diseases)
+        22: profile.has_tattoo_piercing,     # Q21 -> Q22 (tattoo/piercing)
+        26: profile.has_surgery_recently,    # Q25 -> Q26 (surgery)
+    }
+    return question_num in follow_ups and follow_ups[question_num] is False
+
+def questions_asked(profile, last_question):
+    """How many of questions 1..last_question the flow asked this profile"""
+    return sum(1 for question_num in range(1, last_question + 1) if not should_skip_question(question_num, profile))
+
+def get_profile_session_id(request):
+    """Return the health profile key for this session, creating one if needed"""
     session_id = request.session.get('health_profile_id')
     if not session_id:
         session_id = str(uuid.uuid4())
         request.session['health_profile_id'] = session_id
+    return session_id
+
+def get_or_create_profile(request):
+    """Get or create user health profile"""
+    session_id = get_profile_session_id(request)
     
     profile, created = UserHealthProfile.objects.get_or_create(
         session_id=session_id,
         defaults={'user': request.user if request.user.is_authenticated else None}
     )
+    if created:
+        record_assessment_started(profile)
     return profile
 
-def save_answer_to_profile(profile, question_num, answer):
-    """Save answer to profile based on question number"""
+def discard_profiles(profiles):
+    """Delete profiles along with their rollup counts and cached PDF reports"""
+    pks = list(profiles.values_list('pk', flat=True))
+    delete_assessments(UserHealthProfile.objects.filter(pk__in=pks))
+    delete_report_pdfs(pks)
+
+def start_new_assessment(request):
+    """
+    Detach the session from its current profile so the next answer creates a new
+    one. An unfinished profile is deleted; a completed one is kept (and stays
+    counted in the rollups) as the record of that earlier assessment.
+    """
+    old_session_id = request.session.pop('health_profile_id', None)
+    if old_session_id:
+        discard_profiles(UserHealthProfile.objects.filter(session_id=old_session_id, completed=False))
+
+# The question-flow cursor travels in a small signed cookie instead of the
+# session, so answering a question does not rewrite the session row.
+REPORT_FLOW_COOKIE = 'report_flow'
+REPORT_FLOW_SALT = 'assistant.report_flow'
+
+def get_report_flow(request):
+    """Return the current question number from the flow cookie, or 0 if no flow is active"""
+    token = request.COOKIES.get(REPORT_FLOW_COOKIE)
+    if not token:
+        return 0
+    try:
+        state = signing.loads(token, salt=REPORT_FLOW_SALT, max_age=settings.SESSION_COOKIE_AGE)
+    except signing.BadSignature:
+        return 0
+    # The cursor is only valid for the profile it was issued for (reset issues a new one)
+    if state.get('p') != request.session.get('health_profile_id'):
+        return 0
+    return state.get('q', 0)
+
+def set_report_flow(response, request, current_question):
+    """Store the question-flow cursor on the response"""
+    token = signing.dumps(
+        {'p': get_profile_session_id(request), 'q': current_question},
+        salt=REPORT_FLOW_SALT,
+    )
+    response.set_cookie(
+        REPORT_FLOW_COOKIE, token,
+        max_age=settings.SESSION_COOKIE_AGE,
+        httponly=True,
+        samesite='Lax',
+        secure=settings.SESSION_COOKIE_SECURE,
+    )
+    return response
+
+def clear_report_flow(response):
+    """End the question flow"""
+    response.delete_cookie(REPORT_FLOW_COOKIE, samesite='Lax')
+    return response
+
+def save_answer_to_profile(profile, question_num, answer, save=True):
+    """Save answer to profile based on question number (save=False only sets the fields)"""
     answer_lower = answer.lower().strip()
     
     if question_num == 1:  # Name
@@ -424,9 +722,9 @@ def save_answer_to_profile(profile, question_num, answer):
     elif question_num == 4:  # Gender
         profile.gender = answer
     elif question_num == 5:  # Blood Category
-        blood_match = re.search(r'\b([ABO][+-]?|AB[+-]?)\b', answer.upper())
+        blood_match = re.search(r'\b(AB|A|B|O)\s*([+-]?)(?!\w)', answer.upper())
         if blood_match:
-            profile.blood_category = blood_match.group(1)
+            profile.blood_category = blood_match.group(1) + blood_match.group(2)
         else:
             profile.blood_category = answer
     elif question_num == 6:  # Diabetes
@@ -473,7 +771,8 @@ def save_answer_to_profile(profile, question_num, answer):
         profile.surgery_details = answer
         profile.completed = True
     
-    profile.save()
+    if save:
+        profile.save()
 
 
 def is_uncertain_answer(answer: str) -> bool:
@@ -573,8 +872,12 @@ def validate_answer(question_num: int, answer: str, profile: UserHealthProfile):
     # All other questions: current generic rules (uncertain answer check) are enough
     return True, None
 
-def check_eligibility(profile):
-    """Check blood donation eligibility based on profile"""
+def evaluate_eligibility(profile):
+    """
+    Apply the eligibility rules to the answers given so far, without saving.
+    Rules only ever rule a donor out, so Not Eligible here is final even
+    before the questionnaire is finished.
+    """
     reasons = []
     eligible = True
     
@@ -652,6 +955,12 @@ def check_eligibility(profile):
     if profile.taking_medications:
         reasons.append("Note: Some medications may affect eligibility. Please consult with a medical professional.")
     
+    return eligible, reasons
+
+def check_eligibility(profile):
+    """Check blood donation eligibility based on profile"""
+    eligible, reasons = evaluate_eligibility(profile)
+
     # Update profile
     if eligible:
         profile.eligibility_status = "Eligible"
@@ -661,271 +970,612 @@ def check_eligibility(profile):
         profile.eligibility_status = "Not Eligible"
     
     profile.eligibility_reasons = "\n".join(reasons)
-    profile.save()
+    # The rollups and the stored result change together or not at all
+    with transaction.atomic():
+        record_assessment_result(profile)
+        profile.save()
     
     return eligible, reasons
 
 # --- 5. CHAT API (No question flow) ---
-@csrf_exempt
-def chat_api(request):
-    """Chat API - only answers questions, no question flow"""
-    if request.method == 'POST':
-        try:
-            body = json.loads(request.body)
-            question = body.get('question', '').strip()
-            model_name = body.get('model', DEFAULT_MODEL)
-            
-            if not question: return JsonResponse({'error': 'Empty'}, status=400)
+def trim_partial_answer(answer_text):
+    """Cut an answer stopped at the deadline back to its last complete sentence"""
+    cut = max(answer_text.rfind(mark) for mark in ('.', '!', '?', '।'))
+    return answer_text[:cut + 1] if cut > 0 else ''
+
+def clean_generated_answer(answer_text, lang):
+    """Strip prompt remnants (Answer:, उत्तर: ...) from the start of a generated answer"""
+    if lang == 'hi':
+        # Remove common Hindi prompt artifacts
+        answer_text = re.sub(r'^(उत्तर|जवाब|Answer|answer|प्रश्न|Question)[:\s]*', '', answer_text, flags=re.IGNORECASE)
+        answer_text = re.sub(r'^[:\s]*', '', answer_text)
+    elif lang == 'gu':
+        # Remove common Gujarati prompt artifacts
+        answer_text = re.sub(r'^(જવાબ|Answer|answer|પ્રશ્ન|Question)[:\s]*', '', answer_text, flags=re.IGNORECASE)
+        answer_text = re.sub(r'^[:\s]*', '', answer_text)
+    else:
+        # Remove common English prompt artifacts
+        answer_text = re.sub(r'^(Answer|answer|Question)[:\s]*', '', answer_text, flags=re.IGNORECASE)
+        answer_text = re.sub(r'^[:\s]*', '', answer_text)
+    
+    return answer_text
+
+def generate_explanation(question, lang, generator, model_name, deadline):
+    """Generate an EXPLAIN answer within the deadline and strip prompt remnants from it"""
+    explain_prompt = build_explain_prompt(question, lang)
+
+    with span('generate', lang=lang, intent='EXPLAIN', model=model_name, cache='miss'):
+        res, deadline_hit = generate_within(deadline, 'explain', generator, explain_prompt,
+                                            **GENERATION_SETTINGS['explain'])
+
+    if res is None:
+        return ''
+    answer_text = res[0]['generated_text'].strip()
+    if deadline_hit:
+        answer_text = trim_partial_answer(answer_text)
+
+    return clean_generated_answer(answer_text, lang)
+
+def is_poor_answer(answer_text):
+    """The quality check for generated answers: empty or too short to be useful"""
+    return not answer_text or len(answer_text.strip()) < 10
+
+def kb_only_answer(question, lang):
+    """Answer without any model work, used when the inference queue is saturated"""
+    lang_templates = get_language_response_templates(lang)
+    kb_answer = get_knowledge_base_answer(question, lang)
+    return {
+        'answer': kb_answer or lang_templates['busy'],
+        'source': 'Knowledge Base',
+        'confidence': 1.0 if kb_answer else 0.0,
+        'recommendations': lang_templates['recommendations'],
+        'degraded': True,
+        'detected_language': lang
+    }
 
-            # Detect language of the question
-            detected_lang = detect_language(question)
-            lang_instruction = get_language_instruction(detected_lang)
-            lang_templates = get_language_response_templates(detected_lang)
-            
-            # Load the selected model
-            generator = load_model_if_needed(model_name)
-            
-            q_lower = question.lower()
-            intent = "UNKNOWN"
-
-            # Check for "Contextless" inputs (language-aware)
-            contextless_phrases = {
-                'en': ["tell me more", "explain", "explain more", "yes", "no"],
-                'hi': ["और बताओ", "समझाओ", "हाँ", "नहीं", "हां"],
-                'gu': ["વધુ કહો", "સમજાવો", "હા", "ના"]
-            }
-            
-            is_contextless = len(question) < 5
-            if not is_contextless:
-                phrases = contextless_phrases.get(detected_lang, contextless_phrases['en'])
-                is_contextless = any(phrase in q_lower for phrase in phrases)
-            
-            if is_contextless:
-                return JsonResponse({
-                    'answer': lang_templates['contextless'], 
-                    'source': 'System', 
-                    'confidence': 1.0,
-                    'recommendations': lang_templates['recommendations'],
-                    'detected_language': detected_lang
-                })
+def kb_only_response(question, lang):
+    return JsonResponse(kb_only_answer(question, lang))
+
+def contextless_answer(lang):
+    lang_templates = get_language_response_templates(lang)
+    return {
+        'answer': lang_templates['contextless'], 
+        'source': 'System', 
+        'confidence': 1.0,
+        'recommendations': lang_templates['recommendations'],
+        'detected_language': lang
+    }
 
-            # STRICT CONCEPT FILTER (language-aware keywords)
-            concept_keywords = {
-                'en': ["what", "why", "how", "who", "risk", "benefit", "safe", "eligible", 
-                       "age", "limit", "weight", "process", "procedure", "explain", "define", 
-                       "can i", "should i", "maximum", "minimum"],
-                'hi': ["क्या", "क्यों", "कैसे", "कौन", "जोखिम", "लाभ", "सुरक्षित", "योग्य",
-                       "उम्र", "सीमा", "वजन", "प्रक्रिया", "समझाओ", "परिभाषा", "कर सकता", 
-                       "अधिकतम", "न्यूनतम"],
-                'gu': ["શું", "શા માટે", "કેવી રીતે", "કોણ", "જોખમ", "લાભ", "સુરક્ષિત", "યોગ્ય",
-                       "ઉંમર", "મર્યાદા", "વજન", "પ્રક્રિયા", "સમજાવો", "વ્યાખ્યા", "કરી શકું",
-                       "મહત્તમ", "ન્યૂનતમ"]
-            }
-            
-            keywords = concept_keywords.get(detected_lang, concept_keywords['en'])
-            if any(word in q_lower for word in keywords):
-                intent = "EXPLAIN"
-            
-            # AI ROUTER (language-aware)
-            if intent == "UNKNOWN":
-                router_examples = {
-                    'en': [
-                        '"Find blood bank" -> SEARCH',
-                        '"Locations in Surat" -> SEARCH',
-                        '"Donate near me" -> SEARCH',
-                        '"Blood donation camps" -> SEARCH',
-                        '"What is hemoglobin?" -> EXPLAIN',
-                        '"Max age for donation" -> EXPLAIN'
-                    ],
-                    'hi': [
-                        '"रक्त बैंक खोजें" -> SEARCH',
-                        '"सूरत में स्थान" -> SEARCH',
-                        '"मेरे पास दान करें" -> SEARCH',
-                        '"रक्तदान शिविर" -> SEARCH',
-                        '"हीमोग्लोबिन क्या है?" -> EXPLAIN',
-                        '"दान की अधिकतम उम्र" -> EXPLAIN'
-                    ],
-                    'gu': [
-                        '"રક્ત બેંક શોધો" -> SEARCH',
-                        '"સુરતમાં સ્થાનો" -> SEARCH',
-                        '"મારી નજીક દાન કરો" -> SEARCH',
-                        '"રક્તદાન શિબિર" -> SEARCH',
-                        '"હીમોગ્લોબિન શું છે?" -> EXPLAIN',
-                        '"દાન માટે મહત્તમ ઉંમર" -> EXPLAIN'
-                    ]
-                }
-                
-                examples = router_examples.get(detected_lang, router_examples['en'])
-                router_prompt = f"""
-                Classify user intent.
-                {chr(10).join(examples)}
-                
-                Question: "{question}"
-                Answer (SEARCH or EXPLAIN):
-                """
-                router_out = generator(router_prompt, max_length=5, do_sample=False)
-                intent = router_out[0]['generated_text'].strip().upper()
-            
-            print(f"User: {question} | Language: {detected_lang} | Intent: {intent} | Model: {model_name}")
-
-            # PATH A: SEARCH
-            if "SEARCH" in intent:
-                city = "Ahmedabad"
-                city_keywords = {
-                    'en': {'surat': 'Surat', 'vadodara': 'Vadodara'},
-                    'hi': {'सूरत': 'Surat', 'वडोदरा': 'Vadodara'},
-                    'gu': {'સુરત': 'Surat', 'વડોદરા': 'Vadodara'}
-                }
-                
-                keywords = city_keywords.get(detected_lang, city_keywords['en'])
-                for keyword, city_name in keywords.items():
-                    if keyword.lower() in q_lower:
-                        city = city_name
-                        break
-                
-                banks, camps = get_blood_data_dynamic(city)
-                rec_context = f"Blood banks in {city}: " + (banks[0]['name'] if banks else "General info")
-                recommendations = generate_ai_recommendations(rec_context, generator, detected_lang)
-
-                # Language-specific labels
-                labels = {
-                    'en': {
-                        'title': f'Latest locations in <b>{city.title()}</b>.',
-                        'banks': '🏥 Blood Banks',
-                        'camps': '📅 Camps',
-                        'visit': 'Visit Link',
-                        'details': 'Details'
-                    },
-                    'hi': {
-                        'title': f'<b>{city.title()}</b> में नवीनतम स्थान।',
-                        'banks': '🏥 रक्त बैंक',
-                        'camps': '📅 शिविर',
-                        'visit': 'लिंक देखें',
-                        'details': 'विवरण'
-                    },
-                    'gu': {
-                        'title': f'<b>{city.title()}</b> માં નવીનતમ સ્થાનો।',
-                        'banks': '🏥 રક્ત બેંકો',
-                        'camps': '📅 શિબિરો',
-                        'visit': 'લિંક જુઓ',
-                        'details': 'વિગતો'
-                    }
-                }
-                
-                lang_labels = labels.get(detected_lang, labels['en'])
-                html = f"""<div class="space-y-4"><div class="text-sm text-gray-600 mb-2">{lang_labels['title']}</div>"""
-                
-                if banks:
-                    html += f'<div class="font-bold text-gray-800 border-b pb-1 mb-2">{lang_labels["banks"]}</div>'
-                    for i, b in enumerate(banks):
-                        html += f'<div class="bg-white p-3 mb-2 border rounded shadow-sm"><b>{i+1}. {b["name"]}</b><br><span class="text-xs">{b["snippet"][:120]}...</span><br><a href="{b["source_link"]}" target="_blank" class="text-xs text-blue-600 underline">{lang_labels["visit"]}</a></div>'
-                
-                if camps:
-                    html += f'<div class="font-bold text-gray-800 border-b pb-1 mt-4 mb-2">{lang_labels["camps"]}</div>'
-                    for i, c in enumerate(camps):
-                        html += f'<div class="bg-red-50 p-3 mb-2 border border-red-100 rounded"><b>{i+1}. {c["name"]}</b><br><span class="text-xs">{c["snippet"][:120]}...</span><br><a href="{c["source_link"]}" target="_blank" class="text-xs text-red-600 underline">{lang_labels["details"]}</a></div>'
-                html += "</div>"
-                
-                return JsonResponse({
-                    'answer': html,
-                    'source': 'Tavily Search',
-                    'confidence': 1.0,
-                    'recommendations': recommendations,
-                    'model_used': AVAILABLE_MODELS[model_name]['name'],
-                    'detected_language': detected_lang
-                })
+def bank_answer(entry, lang):
+    """Response for a question answered from the precomputed answer bank"""
+    return {
+        'answer': entry.answer,
+        'source': 'Generative AI',
+        'confidence': 1.0,
+        'recommendations': entry.recommendations,
+        'model_used': AVAILABLE_MODELS.get(entry.model_name, {}).get('name', entry.model_name),
+        'precomputed': True,
+        'detected_language': lang
+    }
 
-            # PATH B: EXPLAIN
-            else:
-                # First, check knowledge base for common questions
-                kb_answer = get_knowledge_base_answer(question, detected_lang)
-                
-                if kb_answer:
-                    # Use knowledge base answer
-                    answer_text = kb_answer
-                    recommendations = generate_ai_recommendations(answer_text, generator, detected_lang)
-                else:
-                    # Use AI generation with improved prompts
-                    explain_prompts = {
-                        'en': f"""Answer this question about blood donation in English clearly and accurately.
+def intent_label(intent):
+    """SEARCH, EXPLAIN or other: the router's raw output would give every typo its own series"""
+    if 'SEARCH' in intent:
+        return 'SEARCH'
+    return 'EXPLAIN' if 'EXPLAIN' in intent else 'other'
+
+def fallback_answer(question, lang):
+    """Knowledge-base or canned text for when generation gave no usable answer"""
+    if 'benefit' in question.lower() or 'लाभ' in question or 'લાભ' in question:
+        return BLOOD_DONATION_KB.get(lang, BLOOD_DONATION_KB['en']).get('benefits', '')
+    if 'side effect' in question.lower() or 'दुष्प्रभाव' in question or 'આડઅસર' in question:
+        return BLOOD_DONATION_KB.get(lang, BLOOD_DONATION_KB['en']).get('side effects', '')
+    fallback_answers = {
+        'en': "I understand your question about blood donation. Could you please provide more specific details so I can give you a more accurate answer?",
+        'hi': "मैं रक्तदान के बारे में आपके प्रश्न को समझता हूं। कृपया अधिक विशिष्ट विवरण प्रदान करें ताकि मैं आपको अधिक सटीक उत्तर दे सकूं?",
+        'gu': "હું રક્તદાન વિશે તમારો પ્રશ્ન સમજું છું. કૃપા કરીને વધુ ચોક્કસ વિગતો પ્રદાન કરો જેથી હું તમને વધુ સચોટ જવાબ આપી શકું?"
+    }
+    return fallback_answers.get(lang, fallback_answers['en'])
+
+def search_answer(question, detected_lang, generator, model_name, deadline):
+    """SEARCH path: blood banks and camps in the city named in the question (default Ahmedabad)"""
+    q_lower = question.lower()
+    city = "Ahmedabad"
+    city_keywords = {
+        'en': {'surat': 'Surat', 'vadodara': 'Vadodara'},
+        'hi': {'सूरत': 'Surat', 'वडोदरा': 'Vadodara'},
+        'gu': {'સુરત': 'Surat', 'વડોદરા': 'Vadodara'}
+    }
 
-Question: "{question}"
+    keywords = city_keywords.get(detected_lang, city_keywords['en'])
+    for keyword, city_name in keywords.items():
+        if keyword.lower() in q_lower:
+            city = city_name
+            break
+
+    # Searches are never cached, so the span has no cache label
+    with span('search', lang=detected_lang, intent='SEARCH'):
+        banks, camps = get_blood_data_dynamic(city)
+    SEARCH_RESULTS.inc(found='yes' if banks else 'no')
+    rec_context = f"Blood banks in {city}: " + (banks[0]['name'] if banks else "General info")
+    with span('recommendations', lang=detected_lang, intent='SEARCH', model=model_name):
+        recommendations = generate_ai_recommendations(rec_context, generator, detected_lang, deadline)
+
+    # Language-specific labels
+    labels = {
+        'en': {
+            'title': f'Latest locations in <b>{city.title()}</b>.',
+            'banks': '🏥 Blood Banks',
+            'camps': '📅 Camps',
+            'visit': 'Visit Link',
+            'details': 'Details'
+        },
+        'hi': {
+            'title': f'<b>{city.title()}</b> में नवीनतम स्थान।',
+            'banks': '🏥 रक्त बैंक',
+            'camps': '📅 शिविर',
+            'visit': 'लिंक देखें',
+            'details': 'विवरण'
+        },
+        'gu': {
+            'title': f'<b>{city.title()}</b> માં નવીનતમ સ્થાનો।',
+            'banks': '🏥 રક્ત બેંકો',
+            'camps': '📅 શિબિરો',
+            'visit': 'લિંક જુઓ',
+            'details': 'વિગતો'
+        }
+    }
 
-Answer in English:""",
-                        'hi': f"""रक्तदान के बारे में इस प्रश्न का उत्तर हिंदी में स्पष्ट और सटीक रूप से दें।
+    lang_labels = labels.get(detected_lang, labels['en'])
+    html = f"""<div class="space-y-4"><div class="text-sm text-gray-600 mb-2">{lang_labels['title']}</div>"""
+
+    if banks:
+        html += f'<div class="font-bold text-gray-800 border-b pb-1 mb-2">{lang_labels["banks"]}</div>'
+        for i, b in enumerate(banks):
+            html += f'<div class="bg-white p-3 mb-2 border rounded shadow-sm"><b>{i+1}. {b["name"]}</b><br><span class="text-xs">{b["snippet"][:120]}...</span><br><a href="{b["source_link"]}" target="_blank" class="text-xs text-blue-600 underline">{lang_labels["visit"]}</a></div>'
+
+    if camps:
+        html += f'<div class="font-bold text-gray-800 border-b pb-1 mt-4 mb-2">{lang_labels["camps"]}</div>'
+        for i, c in enumerate(camps):
+            html += f'<div class="bg-red-50 p-3 mb-2 border border-red-100 rounded"><b>{i+1}. {c["name"]}</b><br><span class="text-xs">{c["snippet"][:120]}...</span><br><a href="{c["source_link"]}" target="_blank" class="text-xs text-red-600 underline">{lang_labels["details"]}</a></div>'
+    html += "</div>"
+
+    return {
+        'answer': html,
+        'source': 'Tavily Search',
+        'confidence': 1.0,
+        'recommendations': recommendations,
+        'model_used': AVAILABLE_MODELS[model_name]['name'],
+        'detected_language': detected_lang
+    }
 
-प्रश्न: "{question}"
+def is_contextless_question(question, lang):
+    """Too short or only a follow-up ("tell me more", "yes") to answer on its own"""
+    contextless_phrases = {
+        'en': ["tell me more", "explain", "explain more", "yes", "no"],
+        'hi': ["और बताओ", "समझाओ", "हाँ", "नहीं", "हां"],
+        'gu': ["વધુ કહો", "સમજાવો", "હા", "ના"]
+    }
+    if len(question) < 5:
+        return True
+    phrases = contextless_phrases.get(lang, contextless_phrases['en'])
+    return any(phrase in question.lower() for phrase in phrases)
+
+def is_concept_question(question, lang):
+    """Asks about a concept (what/why/how, risks, limits...), so it is EXPLAIN without asking the router"""
+    concept_keywords = {
+        'en': ["what", "why", "how", "who", "risk", "benefit", "safe", "eligible", 
+               "age", "limit", "weight", "process", "procedure", "explain", "define", 
+               "can i", "should i", "maximum", "minimum"],
+        'hi': ["क्या", "क्यों", "कैसे", "कौन", "जोखिम", "लाभ", "सुरक्षित", "योग्य",
+               "उम्र", "सीमा", "वजन", "प्रक्रिया", "समझाओ", "परिभाषा", "कर सकता", 
+               "अधिकतम", "न्यूनतम"],
+        'gu': ["શું", "શા માટે", "કેવી રીતે", "કોણ", "જોખમ", "લાભ", "સુરક્ષિત", "યોગ્ય",
+               "ઉંમર", "મર્યાદા", "વજન", "પ્રક્રિયા", "સમજાવો", "વ્યાખ્યા", "કરી શકું",
+               "મહત્તમ", "ન્યૂનતમ"]
+    }
+    keywords = concept_keywords.get(lang, concept_keywords['en'])
+    return any(word in question.lower() for word in keywords)
 
-हिंदी में उत्तर दें:""",
-                        'gu': f"""રક્તદાન વિશે આ પ્રશ્નનો જવાબ ગુજરાતીમાં સ્પષ્ટ અને સચોટ રીતે આપો.
+def lookup_chat(question):
+    """
+    The lookups a chat question needs no model for: its language, its answer
+    bank entry and its knowledge-base answer. Done once per request; chat_cost
+    prices the request from them and answer_chat answers from them.
+    """
+    with span('detect_language'):
+        lang = detect_language(question)
+    lookup = {'lang': lang, 'banked': None, 'kb_answer': None}
+    if not question:
+        return lookup
+    with span('answer_bank', lang=lang) as labels:
+        lookup['banked'] = find_answer(question, lang)
+        labels['cache'] = 'hit' if lookup['banked'] else 'miss'
+    with span('kb_lookup', lang=lang) as labels:
+        lookup['kb_answer'] = get_knowledge_base_answer(question, lang)
+        labels['cache'] = 'hit' if lookup['kb_answer'] else 'miss'
+    return lookup
+
+def answer_chat(body, deadline=None, lookup=None):
+    """
+    Answer one chat request body; shared by the sync and async chat endpoints.
+    All generation shares one deadline (CHAT_DEADLINE_SECONDS by default).
+    lookup is the lookup_chat result for the question, if the caller has it.
+    """
+    deadline = deadline or Deadline()
+    question = body.get('question', '').strip()
+    # 'auto', no model or one that is not offered leaves the choice to the cascade
+    requested_model = body.get('model')
+    if requested_model not in offered_models():
+        requested_model = None
+    
+    if not question: return JsonResponse({'error': 'Empty'}, status=400)
 
-પ્રશ્ન: "{question}"
+    # Language, answer bank and knowledge base
+    lookup = lookup or lookup_chat(question)
+    detected_lang = lookup['lang']
+    lang_instruction = get_language_instruction(detected_lang)
+    
+    intent = "UNKNOWN"
+
+    # Check for "Contextless" inputs (language-aware)
+    if is_contextless_question(question, detected_lang):
+        return JsonResponse(contextless_answer(detected_lang))
+
+    # Precomputed answer bank (build_answer_bank): known questions need no model
+    if lookup['banked']:
+        return JsonResponse(bank_answer(lookup['banked'], detected_lang))
+
+    # Pivot mode: Hindi/Gujarati are answered in English and translated, and a
+    # question answered that way before is served from the cache
+    native_model = language_model(detected_lang)
+    pivot = settings.PIVOT_TRANSLATION and detected_lang != 'en' and not native_model
+    if pivot:
+        cached_answer = get_pivot_answer(question, detected_lang)
+        if cached_answer:
+            return JsonResponse(cached_answer)
+
+    # Pick the model (or knowledge-base only answers when saturated)
+    route = choose_route(question, requested_model, native_model)
+    if route['kb_only']:
+        return kb_only_response(question, detected_lang)
+
+    model_name = route['model']
+    with span('model_load', lang=detected_lang, model=model_name) as labels:
+        labels['cache'] = 'hit' if model_name in MODEL_CACHE else 'miss'
+        generator = load_model_if_needed(model_name)
+
+    # STRICT CONCEPT FILTER (language-aware keywords)
+    if is_concept_question(question, detected_lang):
+        intent = "EXPLAIN"
+    
+    # AI ROUTER (language-aware)
+    if intent == "UNKNOWN":
+        router_question, router_lang = question, detected_lang
+        if pivot:
+            with span('translate', lang=detected_lang):
+                router_question, router_lang = translate(question, detected_lang, 'en'), 'en'
+        router_prompt = build_router_prompt(router_question, router_lang)
+        with span('router', lang=detected_lang, model=model_name) as labels:
+            router_out, _ = generate_within(deadline, 'router', generator, router_prompt,
+                                            **GENERATION_SETTINGS['router'])
+            # Out of time: answer from the knowledge base / fallback instead of searching
+            intent = router_out[0]['generated_text'].strip().upper() if router_out else 'EXPLAIN'
+            labels['intent'] = intent_label(intent)
+    
+    print(f"User: {question} | Language: {detected_lang} | Intent: {intent} | Model: {model_name}")
 
-ગુજરાતીમાં જવાબ આપો:"""
-                    }
-                    
-                    # Use language-specific prompt
-                    explain_prompt = explain_prompts.get(detected_lang, explain_prompts['en'])
-
-                    res = generator(
-                        explain_prompt,
-                        max_length=512,
-                        do_sample=True,
-                        temperature=0.7,
-                        top_p=0.9,
-                        num_return_sequences=1
-                    )
-
-                    answer_text = res[0]['generated_text'].strip()
-                    
-                    # Clean up the answer - remove any prompt remnants
-                    if detected_lang == 'hi':
-                        # Remove common Hindi prompt artifacts
-                        answer_text = re.sub(r'^(उत्तर|जवाब|Answer|answer|प्रश्न|Question)[:\s]*', '', answer_text, flags=re.IGNORECASE)
-                        answer_text = re.sub(r'^[:\s]*', '', answer_text)
-                    elif detected_lang == 'gu':
-                        # Remove common Gujarati prompt artifacts
-                        answer_text = re.sub(r'^(જવાબ|Answer|answer|પ્રશ્ન|Question)[:\s]*', '', answer_text, flags=re.IGNORECASE)
-                        answer_text = re.sub(r'^[:\s]*', '', answer_text)
-                    else:
-                        # Remove common English prompt artifacts
-                        answer_text = re.sub(r'^(Answer|answer|Question)[:\s]*', '', answer_text, flags=re.IGNORECASE)
-                        answer_text = re.sub(r'^[:\s]*', '', answer_text)
-                    
-                    # If answer is still empty or too short, use knowledge base or fallback
-                    if not answer_text or len(answer_text.strip()) < 10:
-                        # Try to find a general answer from KB
-                        if 'benefit' in question.lower() or 'लाभ' in question or 'લાભ' in question:
-                            answer_text = BLOOD_DONATION_KB.get(detected_lang, BLOOD_DONATION_KB['en']).get('benefits', '')
-                        elif 'side effect' in question.lower() or 'दुष्प्रभाव' in question or 'આડઅસર' in question:
-                            answer_text = BLOOD_DONATION_KB.get(detected_lang, BLOOD_DONATION_KB['en']).get('side effects', '')
-                        else:
-                            fallback_answers = {
-                                'en': "I understand your question about blood donation. Could you please provide more specific details so I can give you a more accurate answer?",
-                                'hi': "मैं रक्तदान के बारे में आपके प्रश्न को समझता हूं। कृपया अधिक विशिष्ट विवरण प्रदान करें ताकि मैं आपको अधिक सटीक उत्तर दे सकूं?",
-                                'gu': "હું રક્તદાન વિશે તમારો પ્રશ્ન સમજું છું. કૃપા કરીને વધુ ચોક્કસ વિગતો પ્રદાન કરો જેથી હું તમને વધુ સચોટ જવાબ આપી શકું?"
-                            }
-                            answer_text = fallback_answers.get(detected_lang, fallback_answers['en'])
-                    
-                    recommendations = generate_ai_recommendations(answer_text, generator, detected_lang)
+    # PATH A: SEARCH
+    if "SEARCH" in intent:
+        return JsonResponse(search_answer(question, detected_lang, generator, model_name, deadline))
 
-                return JsonResponse({
-                    'answer': answer_text,
-                    'source': 'Generative AI',
-                    'confidence': 1.0,
-                    'recommendations': recommendations,
-                    'model_used': AVAILABLE_MODELS[model_name]['name'],
-                    'detected_language': detected_lang
-                })
+    # PATH B: EXPLAIN
+    else:
+        # First, check knowledge base for common questions
+        kb_answer = lookup['kb_answer']
+        if kb_answer:
+            # Use knowledge base answer
+            answer_text = kb_answer
+            with span('recommendations', lang=detected_lang, intent='EXPLAIN', model=model_name, cache='kb'):
+                if pivot:
+                    # From the English text of the entry (a precomputed translation)
+                    recommendations = translate_many(generate_ai_recommendations(
+                        translate(answer_text, detected_lang, 'en'), generator, 'en', deadline), 'en', detected_lang)
+                else:
+                    recommendations = generate_ai_recommendations(answer_text, generator, detected_lang, deadline)
+            pivoted = pivot
+        else:
+            # Use AI generation with improved prompts (in English in pivot mode)
+            answer_question, answer_lang = question, detected_lang
+            if pivot:
+                with span('translate', lang=detected_lang):
+                    answer_question, answer_lang = translate(question, detected_lang, 'en'), 'en'
+            answer_text = generate_explanation(answer_question, answer_lang, generator, model_name, deadline)
+
+            # Escalate one tier when the small model's answer fails the quality check
+            if is_poor_answer(answer_text) and route['escalate_to'] and not deadline.expired():
+                CASCADE_ESCALATIONS.inc(model=route['escalate_to'])
+                model_name = route['escalate_to']
+                generator = load_model_if_needed(model_name)
+                answer_text = generate_explanation(answer_question, answer_lang, generator, model_name, deadline)
+            pivoted = pivot and not is_poor_answer(answer_text)
+            
+            # If answer is still empty or too short, use knowledge base or fallback
+            if is_poor_answer(answer_text):
+                answer_text = fallback_answer(question, detected_lang)
+            
+            with span('recommendations', lang=detected_lang, intent='EXPLAIN', model=model_name, cache='miss'):
+                recommendations = generate_ai_recommendations(
+                    answer_text, generator, answer_lang if pivoted else detected_lang, deadline)
+
+            if pivoted:
+                with span('translate', lang=detected_lang):
+                    answer_text, *recommendations = translate_many(
+                        [answer_text, *recommendations], 'en', detected_lang)
+
+        response = {
+            'answer': answer_text,
+            'source': 'Generative AI',
+            'confidence': 1.0,
+            'recommendations': recommendations,
+            'model_used': AVAILABLE_MODELS[model_name]['name'],
+            'detected_language': detected_lang
+        }
+        if pivoted:
+            set_pivot_answer(question, detected_lang, response)
+        return JsonResponse(response)
 
+def answer_chat_batch(questions, requested_model=None, deadline=None):
+    """
+    Answer several chat questions at once, in input order (/api/chat/batch/).
+    Lookups (contextless, answer bank, pivot cache, knowledge base) run for every
+    question; the rest are routed and generated with batched calls per model.
+    A question that fails gets {'question', 'error'} instead of failing the batch.
+    """
+    deadline = deadline or Deadline(settings.CHAT_BATCH_DEADLINE_SECONDS)
+    results = [None] * len(questions)
+    by_model = {}
+    for index, question in enumerate(questions):
+        try:
+            if not isinstance(question, str) or not question.strip():
+                raise ValueError('Empty question')
+            question = question.strip()
+            lang = detect_language(question)
+            if is_contextless_question(question, lang):
+                results[index] = contextless_answer(lang)
+                continue
+            banked = find_answer(question, lang)
+            if banked:
+                results[index] = bank_answer(banked, lang)
+                continue
+            native_model = language_model(lang)
+            pivot = settings.PIVOT_TRANSLATION and lang != 'en' and not native_model
+            cached_answer = get_pivot_answer(question, lang) if pivot else None
+            if cached_answer:
+                results[index] = cached_answer
+                continue
+            route = choose_route(question, requested_model, native_model)
+            if route['kb_only']:
+                results[index] = kb_only_answer(question, lang)
+                continue
+            item = {'index': index, 'question': question, 'lang': lang, 'pivot': pivot,
+                    'intent': 'EXPLAIN' if is_concept_question(question, lang) else 'UNKNOWN'}
+            by_model.setdefault(route['model'], []).append(item)
         except Exception as e:
-            print(f"Error: {e}")
-            import traceback
-            traceback.print_exc()
-            return JsonResponse({'error': str(e)}, status=500)
+            results[index] = {'error': str(e)}
+
+    for model_name, items in by_model.items():
+        try:
+            generator = load_model_if_needed(model_name)
+            answer_batch_items(items, generator, model_name, deadline)
+        except Exception as e:
+            print(f"Batch Error ({model_name}): {e}")
+            # Items answered before the failure keep their response
+            for item in items:
+                if 'response' not in item:
+                    item.setdefault('error', str(e))
+        for item in items:
+            results[item['index']] = {'error': item['error']} if 'error' in item else item['response']
+
+    return [dict(result, question=question if isinstance(question, str) else None)
+            for question, result in zip(questions, results)]
+
+def answer_batch_items(items, generator, model_name, deadline):
+    """
+    The generation part of answer_chat for one model's batch items: router,
+    knowledge base, answers and recommendations, with the prompts of each stage
+    generated together. Sets item['response'] or item['error'].
+    """
+    # Pivot mode: the questions are routed and answered in English
+    for lang in {item['lang'] for item in items if item['pivot']}:
+        group = [item for item in items if item['pivot'] and item['lang'] == lang]
+        with span('translate', lang=lang):
+            for item, english in zip(group, translate_many([item['question'] for item in group], lang, 'en')):
+                item['prompt_question'] = english
+    for item in items:
+        item['answer_lang'] = 'en' if item['pivot'] else item['lang']
+        item.setdefault('prompt_question', item['question'])
+
+    unsure = [item for item in items if item['intent'] == 'UNKNOWN']
+    with span('router', model=model_name):
+        intents, _ = generate_many(deadline, 'router', generator, [
+            build_router_prompt(item['prompt_question'], item['answer_lang']) for item in unsure
+        ], **GENERATION_SETTINGS['router'])
+    for item, intent in zip(unsure, intents):
+        item['intent'] = intent.upper() if intent else 'EXPLAIN'
+
+    explain = []
+    for item in items:
+        try:
+            if 'SEARCH' in item['intent']:
+                item['response'] = search_answer(item['question'], item['lang'], generator, model_name, deadline)
+                continue
+            kb_answer = get_knowledge_base_answer(item['question'], item['lang'])
+            if kb_answer:
+                item['kb_answer'] = kb_answer
+                item['answer'] = translate(kb_answer, item['lang'], 'en') if item['pivot'] else kb_answer
+            explain.append(item)
+        except Exception as e:
+            item['error'] = str(e)
+
+    generate = [item for item in explain if 'kb_answer' not in item]
+    with span('generate', intent='EXPLAIN', model=model_name, cache='miss'):
+        texts, deadline_hit = generate_many(deadline, 'explain', generator, [
+            build_explain_prompt(item['prompt_question'], item['answer_lang']) for item in generate
+        ], **GENERATION_SETTINGS['explain'])
+    for item, text in zip(generate, texts):
+        text = trim_partial_answer(text or '') if deadline_hit else text or ''
+        item['answer'] = clean_generated_answer(text, item['answer_lang'])
+        if is_poor_answer(item['answer']):
+            item['pivot'] = False
+            item['answer_lang'] = item['lang']
+            item['answer'] = fallback_answer(item['question'], item['lang'])
+
+    with span('recommendations', intent='EXPLAIN', model=model_name):
+        texts, deadline_hit = generate_many(deadline, 'recommendations', generator, [
+            build_recommendation_prompt(item['answer'], item['answer_lang']) for item in explain
+        ], **GENERATION_SETTINGS['recommendations'])
+    for item, text in zip(explain, texts):
+        try:
+            text = text or ''
+            if deadline_hit:
+                text = text[:text.rfind('?') + 1]
+            recommendations = parse_recommendations(text, item['answer_lang'])
+            answer_text = item.get('kb_answer') or item['answer']
+            if item['pivot']:
+                if 'kb_answer' in item:
+                    recommendations = translate_many(recommendations, 'en', item['lang'])
+                else:
+                    answer_text, *recommendations = translate_many([answer_text, *recommendations], 'en', item['lang'])
+            item['response'] = {
+                'answer': answer_text,
+                'source': 'Generative AI',
+                'confidence': 1.0,
+                'recommendations': recommendations,
+                'model_used': AVAILABLE_MODELS[model_name]['name'],
+                'detected_language': item['lang']
+            }
+            if item['pivot']:
+                set_pivot_answer(item['question'], item['lang'], item['response'])
+        except Exception as e:
+            item['error'] = str(e)
+
+def chat_cost(question, lookup):
+    """Rate-limit cost class of a chat question, decided before any model work"""
+    if len(question) < 5:
+        return 'system'
+    if lookup['kb_answer'] or lookup['banked']:
+        return 'kb'
+    return 'generation'
+
+def charge_chat(request, endpoint, question):
+    """
+    Charge the client's rate-limit buckets for one chat question; raises
+    Throttled. Returns the lookup_chat result, for answer_chat.
+    """
+    lookup = lookup_chat(question)
+    check_rate_limit(request, endpoint, chat_cost(question, lookup))
+    return lookup
+
+def throttled_response(e):
+    response = JsonResponse({
+        'error': 'Too many requests. Please wait a moment before asking again.',
+        'retry_after': e.retry_after
+    }, status=429)
+    response['Retry-After'] = str(e.retry_after)
+    return response
+
+@csrf_exempt
+def chat_api(request):
+    """Chat API - only answers questions, no question flow"""
+    if request.method == 'POST':
+        with timed_request('chat') as result:
+            try:
+                body = json.loads(request.body)
+                lookup = charge_chat(request, 'chat', body.get('question', '').strip())
+                with sync_generation():
+                    response = answer_chat(body, lookup=lookup)
+            except Throttled as e:
+                response = throttled_response(e)
+            except Exception as e:
+                print(f"Error: {e}")
+                import traceback
+                traceback.print_exc()
+                response = JsonResponse({'error': str(e)}, status=500)
+            result['status'] = response.status_code
+        return response
     
     return JsonResponse({'error': 'Method Not Allowed'}, status=405)
 
+@csrf_exempt
+async def chat_api_async(request):
+    """
+    Async chat API for ASGI deployments. Generation runs on the bounded inference
+    executor; when its queue is full the request fails fast with 503 + Retry-After.
+    """
+    if request.method == 'POST':
+        with timed_request('chat_async') as result:
+            try:
+                body = json.loads(request.body)
+                # Time spent waiting for an inference worker counts against the deadline
+                deadline = Deadline()
+                # The lookups query the answer bank, so they run off the event loop too
+                lookup = await sync_to_async(charge_chat)(request, 'chat_async', body.get('question', '').strip())
+                response = await run_inference(answer_chat, body, deadline, lookup)
+            except Throttled as e:
+                response = throttled_response(e)
+            except InferenceQueueFull as e:
+                response = JsonResponse({
+                    'error': 'The assistant is busy right now. Please try again shortly.',
+                    'retry_after': e.retry_after
+                }, status=503)
+                response['Retry-After'] = str(e.retry_after)
+            except Exception as e:
+                print(f"Error: {e}")
+                import traceback
+                traceback.print_exc()
+                response = JsonResponse({'error': str(e)}, status=500)
+            result['status'] = response.status_code
+        return response
+    
+    return JsonResponse({'error': 'Method Not Allowed'}, status=405)
+
+@csrf_exempt
+def chat_batch_api(request):
+    """
+    Batch chat API for partner integrations (FAQ pages, IVR scripts):
+    {"questions": [...], "model": optional} -> {"results": [...]} in input order.
+    """
+    if request.method == 'POST':
+        with timed_request('chat_batch') as result:
+            try:
+                body = json.loads(request.body)
+                questions = body.get('questions')
+                requested_model = body.get('model')
+                if requested_model not in offered_models():
+                    requested_model = None
+                if not isinstance(questions, list) or not questions:
+                    response = JsonResponse({'error': 'questions must be a non-empty list'}, status=400)
+                elif len(questions) > settings.CHAT_BATCH_MAX_QUESTIONS:
+                    response = JsonResponse({
+                        'error': f'At most {settings.CHAT_BATCH_MAX_QUESTIONS} questions per batch'
+                    }, status=400)
+                else:
+                    check_rate_limit(request, 'chat_batch', 'batch_item', len(questions))
+                    with sync_generation():
+                        response = JsonResponse({'results': answer_chat_batch(questions, requested_model)})
+            except Throttled as e:
+                response = throttled_response(e)
+            except Exception as e:
+                print(f"Error: {e}")
+                import traceback
+                traceback.print_exc()
+                response = JsonResponse({'error': str(e)}, status=500)
+            result['status'] = response.status_code
+        return response
+
+    return JsonResponse({'error': 'Method Not Allowed'}, status=405)
+
 # --- 6. REPORT GENERATION API ---
 @csrf_exempt
 def report_api(request):
@@ -936,11 +1586,10 @@ def report_api(request):
             answer = body.get('answer', '').strip()
             
             # Check if we're in question flow
-            question_flow_active = request.session.get('report_question_flow', False)
-            current_question = request.session.get('report_current_question', 0)
+            current_question = get_report_flow(request)
             
             # If in question flow, handle the answer
-            if question_flow_active and current_question > 0:
+            if current_question > 0:
                 profile = get_or_create_profile(request)
 
                 # --- Validation: reject uncertain / bad answers and re-ask same question ---
@@ -973,77 +1622,60 @@ def report_api(request):
                         'total_questions': len(ELIGIBILITY_QUESTIONS)
                     })
 
-                save_answer_to_profile(profile, current_question, answer)
+                # One write per answer: the profile is saved below or by check_eligibility
+                save_answer_to_profile(profile, current_question, answer, save=False)
+
+                # End the flow at the first hard disqualifier instead of asking the rest
+                if (settings.ELIGIBILITY_EARLY_EXIT and current_question < len(ELIGIBILITY_QUESTIONS)
+                        and not evaluate_eligibility(profile)[0]):
+                    profile.completed = True
+                    eligible, reasons = check_eligibility(profile)
+                    ASSESSMENTS_FINISHED.inc(outcome='ended_early')
+                    ASSESSMENT_QUESTIONS.inc(questions_asked(profile, current_question), outcome='ended_early')
+
+                    response = JsonResponse({
+                        'answer': 'Based on your answers so far, you are not eligible to donate blood at this time, so the assessment ends here.',
+                        'in_question_flow': False,
+                        'completed': True,
+                        'ended_early': True,
+                        'question_number': current_question,
+                        'total_questions': len(ELIGIBILITY_QUESTIONS),
+                        'eligible': eligible,
+                        'reasons': reasons,
+                        'profile_id': profile.id
+                    })
+                    return clear_report_flow(response)
+                profile.save()
 
                 # Move to next question
                 current_question += 1
 
                 # --- Conditional skipping logic ---
-                # We loop in case multiple consecutive questions need to be skipped.
-                while current_question <= len(ELIGIBILITY_QUESTIONS):
-                    # Skip pregnancy/breastfeeding questions for males or other genders
-                    if current_question == 23:  # Pregnancy
-                        if profile.gender and 'male' in profile.gender.lower():
-                            current_question += 1
-                            continue
-                    if current_question == 24:  # Breastfeeding
-                        if profile.gender and 'male' in profile.gender.lower():
-                            current_question += 1
-                            continue
-
-                    # Skip "If yes, specify..." questions when previous answer was effectively "No"
-                    # Q11 -> Q12 (allergies)
-                    if current_question == 12 and profile.has_allergies is False:
-                        current_question += 1
-                        continue
-                    # Q13 -> Q14 (medications)
-                    if current_question == 14 and profile.taking_medications is False:
-                        current_question += 1
-                        continue
-                    # Q15 -> Q16 (donated before)
-                    if current_question == 16 and profile.donated_before is False:
-                        current_question += 1
-                        continue
-                    # Q17 -> Q18 (chronic diseases)
-                    if current_question == 18 and profile.has_chronic_diseases is False:
-                        current_question += 1
-                        continue
-                    # Q19 -> Q20 (infectious diseases)
-                    if current_question == 20 and profile.has_infectious_disease is False:
-                        current_question += 1
-                        continue
-                    # Q21 -> Q22 (tattoo/piercing)
-                    if current_question == 22 and profile.has_tattoo_piercing is False:
-                        current_question += 1
-                        continue
-                    # Q25 -> Q26 (surgery)
-                    if current_question == 26 and profile.has_surgery_recently is False:
-                        current_question += 1
-                        continue
-
-                    # If no skipping rule applied, break out of loop
-                    break
-
-                request.session['report_current_question'] = current_question
+                while current_question <= len(ELIGIBILITY_QUESTIONS) and should_skip_question(current_question, profile):
+                    current_question += 1
 
                 if current_question <= len(ELIGIBILITY_QUESTIONS):
                     # Ask next question
                     next_question = ELIGIBILITY_QUESTIONS[current_question - 1]
-                    return JsonResponse({
+                    response = JsonResponse({
                         'answer': next_question,
                         'in_question_flow': True,
                         'question_number': current_question,
                         'total_questions': len(ELIGIBILITY_QUESTIONS)
                     })
+                    return set_report_flow(response, request, current_question)
                 else:
                     # All questions completed - generate report
-                    request.session['report_question_flow'] = False
-                    request.session['report_current_question'] = 0
+                    # (Q26 is skipped when there was no surgery, so mark completion here)
+                    profile.completed = True
 
                     # Check eligibility
                     eligible, reasons = check_eligibility(profile)
+                    outcome = 'eligible' if eligible else 'not_eligible'
+                    ASSESSMENTS_FINISHED.inc(outcome=outcome)
+                    ASSESSMENT_QUESTIONS.inc(questions_asked(profile, len(ELIGIBILITY_QUESTIONS)), outcome=outcome)
 
-                    return JsonResponse({
+                    response = JsonResponse({
                         'answer': f'Thank you for providing all the information! Your eligibility assessment is complete.',
                         'in_question_flow': False,
                         'completed': True,
@@ -1051,18 +1683,20 @@ def report_api(request):
                         'reasons': reasons,
                         'profile_id': profile.id
                     })
+                    return clear_report_flow(response)
             
-            # Start question flow
-            request.session['report_question_flow'] = True
-            request.session['report_current_question'] = 1
+            # Start question flow, on a fresh profile: answers from an earlier run
+            # must not be reused (the early exit would end the new run at once)
+            start_new_assessment(request)
             first_question = ELIGIBILITY_QUESTIONS[0]
             
-            return JsonResponse({
+            response = JsonResponse({
                 'answer': f'Great! I\'ll help you check your eligibility for blood donation. Let\'s start with a few questions.<br><br><b>{first_question}</b>',
                 'in_question_flow': True,
                 'question_number': 1,
                 'total_questions': len(ELIGIBILITY_QUESTIONS)
             })
+            return set_report_flow(response, request, 1)
 
         except Exception as e:
             print(f"Error: {e}")
@@ -1079,25 +1713,22 @@ def reset_assessment(request):
     if request.method == 'POST':
         try:
             # Clear all session data related to report
-            if 'report_question_flow' in request.session:
-                del request.session['report_question_flow']
-            if 'report_current_question' in request.session:
-                del request.session['report_current_question']
             if 'health_profile_id' in request.session:
                 old_session_id = request.session['health_profile_id']
                 del request.session['health_profile_id']
                 # Delete old profile from database
                 try:
-                    UserHealthProfile.objects.filter(session_id=old_session_id).delete()
+                    discard_profiles(UserHealthProfile.objects.filter(session_id=old_session_id))
                 except:
                     pass
             
             request.session.save()
             
-            return JsonResponse({
+            response = JsonResponse({
                 'status': 'success',
                 'message': 'Assessment reset. Ready to start fresh.'
             })
+            return clear_report_flow(response)
         except Exception as e:
             print(f"Error resetting assessment: {e}")
             return JsonResponse({'error': str(e)}, status=500)
@@ -1114,112 +1745,102 @@ def download_report(request, profile_id):
         if not profile.eligibility_status:
             check_eligibility(profile)
         
-        # Generate HTML report
-        html_content = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <title>Blood Donation Eligibility Report - {profile.name}</title>
-            <style>
-                body {{ font-family: Arial, sans-serif; margin: 40px; background: #f5f5f5; }}
-                .container {{ background: white; padding: 40px; border-radius: 10px; box-shadow: 0 2px 10px rgba(0,0,0,0.1); max-width: 800px; margin: 0 auto; }}
-                .header {{ text-align: center; border-bottom: 3px solid #dc2626; padding-bottom: 20px; margin-bottom: 30px; }}
-                .header h1 {{ color: #dc2626; margin: 0; }}
-                .section {{ margin: 25px 0; }}
-                .section h2 {{ color: #333; border-left: 4px solid #dc2626; padding-left: 10px; }}
-                .info-row {{ display: flex; justify-content: space-between; padding: 10px 0; border-bottom: 1px solid #eee; }}
-                .info-label {{ font-weight: bold; color: #666; }}
-                .status {{ padding: 15px; border-radius: 8px; margin: 20px 0; text-align: center; font-size: 18px; font-weight: bold; }}
-                .eligible {{ background: #d1fae5; color: #065f46; border: 2px solid #10b981; }}
-                .not-eligible {{ background: #fee2e2; color: #991b1b; border: 2px solid #ef4444; }}
-                .reasons {{ background: #f9fafb; padding: 15px; border-radius: 8px; margin: 15px 0; }}
-                .reasons ul {{ margin: 10px 0; padding-left: 20px; }}
-                .footer {{ text-align: center; margin-top: 40px; padding-top: 20px; border-top: 1px solid #eee; color: #666; font-size: 12px; }}
-            </style>
-        </head>
-        <body>
-            <div class="container">
-                <div class="header">
-                    <h1>🩸 Blood Donation Eligibility Report</h1>
-                    <p>Generated on {datetime.now().strftime('%B %d, %Y at %I:%M %p')}</p>
-                </div>
-                
-                <div class="section">
-                    <h2>Personal Information</h2>
-                    <div class="info-row">
-                        <span class="info-label">Name:</span>
-                        <span>{profile.name or 'Not provided'}</span>
-                    </div>
-                    <div class="info-row">
-                        <span class="info-label">Age:</span>
-                        <span>{profile.age or 'Not provided'} years</span>
-                    </div>
-                    <div class="info-row">
-                        <span class="info-label">Weight:</span>
-                        <span>{profile.weight or 'Not provided'} kg</span>
-                    </div>
-                    <div class="info-row">
-                        <span class="info-label">Gender:</span>
-                        <span>{profile.gender or 'Not provided'}</span>
-                    </div>
-                    <div class="info-row">
-                        <span class="info-label">Blood Group:</span>
-                        <span>{profile.blood_category or 'Not provided'}</span>
-                    </div>
-                </div>
-                
-                <div class="section">
-                    <h2>Health Information</h2>
-                    <div class="info-row">
-                        <span class="info-label">Blood Pressure:</span>
-                        <span>{profile.blood_pressure or 'Not provided'}</span>
-                    </div>
-                    <div class="info-row">
-                        <span class="info-label">Hemoglobin Level:</span>
-                        <span>{profile.hemoglobin_level or 'Not provided'}</span>
-                    </div>
-                    <div class="info-row">
-                        <span class="info-label">Diabetes:</span>
-                        <span>{'Yes' if profile.has_diabetes else 'No'}</span>
-                    </div>
-                    <div class="info-row">
-                        <span class="info-label">Anemia:</span>
-                        <span>{'Yes' if profile.has_anemia else 'No'}</span>
-                    </div>
-                    <div class="info-row">
-                        <span class="info-label">Previous COVID-19:</span>
-                        <span>{'Yes' if profile.had_corona else 'No'}</span>
-                    </div>
-                </div>
-                
-                <div class="section">
-                    <h2>Eligibility Status</h2>
-                    <div class="status {'eligible' if profile.eligibility_status == 'Eligible' else 'not-eligible'}">
-                        {profile.eligibility_status or 'Pending Assessment'}
-                    </div>
-                    <div class="reasons">
-                        <h3>Assessment Details:</h3>
-                        <ul>
-                            {''.join([f'<li>{reason}</li>' for reason in profile.eligibility_reasons.split('\\n') if reason])}
-                        </ul>
-                    </div>
-                </div>
-                
-                <div class="footer">
-                    <p>This report is generated for informational purposes only.</p>
-                    <p>Please consult with a medical professional before donating blood.</p>
-                    <p>Blood Assistant AI - {datetime.now().strftime('%Y')}</p>
-                </div>
-            </div>
-        </body>
-        </html>
-        """
+        # Unchanged report since the client's last download
+        report_format = 'pdf' if request.GET.get('format') == 'pdf' else 'html'
+        etag = report_etag(profile, report_format)
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = HttpResponse(status=304)
+            response['ETag'] = etag
+            return response
+        
+        if report_format == 'pdf':
+            # Rendered off the request worker; the client polls until it is ready
+            try:
+                pdf_path = get_report_pdf(profile)
+            except ReportRenderFailed:
+                return JsonResponse({
+                    'status': 'failed',
+                    'error': 'The PDF report could not be generated. Please download the HTML report instead.'
+                }, status=500)
+            if pdf_path is None:
+                response = JsonResponse({
+                    'status': 'pending',
+                    'retry_after': settings.REPORT_PDF_RETRY_AFTER
+                }, status=202)
+                response['Retry-After'] = str(settings.REPORT_PDF_RETRY_AFTER)
+                return response
+            response = FileResponse(
+                open(pdf_path, 'rb'),
+                as_attachment=True,
+                filename=report_filename(profile, 'pdf'),
+                content_type='application/pdf'
+            )
+            response['ETag'] = etag
+            response['Cache-Control'] = 'private, no-cache'
+            return response
+        
+        html_content = render_report_html(profile)
         
         response = HttpResponse(html_content, content_type='text/html')
-        response['Content-Disposition'] = f'attachment; filename="eligibility_report_{profile.name or "user"}_{datetime.now().strftime("%Y%m%d")}.html"'
+        response['Content-Disposition'] = f'attachment; filename="{report_filename(profile)}"'
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
         return response
         
     except UserHealthProfile.DoesNotExist:
         return HttpResponse("Report not found", status=404)
     except Exception as e:
         return HttpResponse(f"Error generating report: {str(e)}", status=500)
+
+# --- 9. BULK EXPORT ---
+def export_profiles(request):
+    """Stream profiles (CSV/JSONL) or rendered reports (ZIP) for a date range - staff only"""
+    if request.method != 'GET':
+        return JsonResponse({'error': 'Method Not Allowed'}, status=405)
+    if not request.user.is_staff:
+        return JsonResponse({'error': 'Forbidden'}, status=403)
+    
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return JsonResponse({'error': f"Unsupported format. Use one of: {', '.join(EXPORT_FORMATS)}"}, status=400)
+    
+    completed = request.GET.get('completed', '').lower()
+    completed = {'1': True, 'true': True, '0': False, 'false': False}.get(completed)
+    start = request.GET.get('start')
+    end = request.GET.get('end')
+    try:
+        queryset = filter_profiles(start, end, completed, request.GET.get('status'))
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    
+    content_type, extension = EXPORT_FORMATS[export_format]
+    response = StreamingHttpResponse(iter_export(queryset, export_format), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="profiles_{start or "all"}_{end or "all"}.{extension}"'
+    return response
+
+# --- 10. ANALYTICS ---
+def analytics_api(request):
+    """Daily assessment, eligibility, blood group and deferral statistics (from rollups only) - staff only"""
+    if request.method != 'GET':
+        return JsonResponse({'error': 'Method Not Allowed'}, status=405)
+    if not request.user.is_staff:
+        return JsonResponse({'error': 'Forbidden'}, status=403)
+    
+    try:
+        end = parse_date(request.GET['end']) if request.GET.get('end') else timezone.localdate()
+        start = None
+        if end is not None:
+            start = parse_date(request.GET['start']) if request.GET.get('start') else end - timedelta(days=29)
+    except ValueError:
+        start = end = None
+    if start is None or end is None or start > end:
+        return JsonResponse({'error': 'Use start/end dates as YYYY-MM-DD with start <= end.'}, status=400)
+    if (end - start).days > 366:
+        return JsonResponse({'error': 'Date range is limited to one year.'}, status=400)
+    
+    return JsonResponse(summarize_rollups(start, end))
+
+# --- 11. METRICS ---
+def metrics_view(request):
+    """Prometheus text exposition of this process's metrics"""
+    return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
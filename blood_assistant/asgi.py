@@ -5,6 +5,9 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+Serve /api/chat/async/ from here, e.g.
+    gunicorn blood_assistant.asgi:application -k uvicorn.workers.UvicornWorker
 """
 
 import os
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -47,6 +48,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -86,6 +88,34 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Set REDIS_URL so every web worker shares one cache; the local-memory
+# fallback is per process and only suitable for a single worker.
+
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'blood-assistant',
+        }
+    }
+
+
+# Sessions
+# Reads are served from the cache and fall back to the database; the
+# assessment question cursor lives in a signed cookie (see report_api).
+
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -121,8 +151,193 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/5.2/howto/static-files/
 
 STATIC_URL = 'static/'
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+# `collectstatic` writes content-hashed copies plus .gz/.br versions; WhiteNoise
+# serves the compressed variant the browser accepts, with immutable cache headers.
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage'},
+}
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# Assessment retention (see `python manage.py purge_assessments`)
+# Incomplete anonymous assessments untouched for this many days are deleted.
+
+ASSESSMENT_RETENTION_DAYS = 30
+ASSESSMENT_PURGE_BATCH_SIZE = 500
+
+# End the eligibility questionnaire as soon as the answers so far rule the donor
+# out (e.g. age 15), returning the reasons instead of asking the remaining questions.
+
+ELIGIBILITY_EARLY_EXIT = os.environ.get('ELIGIBILITY_EARLY_EXIT', '0') == '1'
+
+# Rendered eligibility reports are cached per profile version (see assistant/reports.py)
+
+REPORT_CACHE_TIMEOUT = 60 * 60 * 24
+
+# PDF reports are rendered by a process pool and kept on disk per profile version.
+# A render that fails REPORT_PDF_MAX_ATTEMPTS times is reported as an error (500).
+# Set REPORT_PDF_FONT to a TTF file (e.g. Noto Sans) to print non-Latin names.
+
+REPORT_PDF_WORKERS = 2
+REPORT_PDF_CACHE_DIR = BASE_DIR / 'report_cache'
+REPORT_PDF_RENDER_TIMEOUT = 60
+REPORT_PDF_RETRY_AFTER = 2
+REPORT_PDF_MAX_ATTEMPTS = 3
+REPORT_PDF_FONT = os.environ.get('REPORT_PDF_FONT')
+
+# Rows fetched per database round trip by the streaming exports
+
+EXPORT_CHUNK_SIZE = 500
+
+# Inference executor used by the async chat endpoint (ASGI).
+# INFERENCE_WORKERS generations run at once per web worker, by default one per 4
+# of the worker's physical cores (the thread plan below is sized for the same
+# number); requests beyond workers + INFERENCE_QUEUE_LIMIT are rejected with 503
+# and Retry-After.
+
+INFERENCE_WORKERS = int(os.environ.get('INFERENCE_WORKERS', 0)) or None
+INFERENCE_QUEUE_LIMIT = int(os.environ.get('INFERENCE_QUEUE_LIMIT', 8))
+
+# CPU thread plan (see assistant/cpu_plan.py and `python manage.py plan_threads`).
+# At startup each process sizes torch's thread pools to its share of the physical
+# cores: WEB_WORKERS processes (gunicorn's WEB_CONCURRENCY) each running up to
+# INFERENCE_WORKERS generations at once. THREAD_PLAN_PIN also binds each gunicorn
+# worker to its own cores (post_fork hook in gunicorn.conf.py).
+
+THREAD_PLAN_ENABLED = os.environ.get('THREAD_PLAN_ENABLED', '1') == '1'
+WEB_WORKERS = int(os.environ.get('WEB_CONCURRENCY', 1))
+THREAD_PLAN_PIN = os.environ.get('THREAD_PLAN_PIN', '0') == '1'
+
+# Token-bucket rate limits for the chat endpoints (see assistant/throttling.py).
+# A bucket holds `capacity` tokens and refills at `rate` tokens per second; each
+# request pays CHAT_REQUEST_COSTS from its session bucket and its IP bucket.
+# /api/chat/batch/ pays batch_item per question, so a full batch
+# (CHAT_BATCH_MAX_QUESTIONS) costs one session bucket; no request is charged
+# more than the smallest bucket's capacity.
+# Behind a reverse proxy, set THROTTLE_PROXY_HEADER (e.g. HTTP_X_FORWARDED_FOR).
+
+THROTTLE_ENABLED = os.environ.get('THROTTLE_ENABLED', '1') == '1'
+CHAT_RATE_LIMITS = {
+    'session': {'capacity': 30, 'rate': 1.0},
+    'ip': {'capacity': 120, 'rate': 4.0},
+}
+CHAT_REQUEST_COSTS = {'system': 1, 'kb': 2, 'generation': 6, 'batch_item': 3}
+THROTTLE_PROXY_HEADER = os.environ.get('THROTTLE_PROXY_HEADER')
+
+# Assisted decoding: models with a `draft_model` in AVAILABLE_MODELS generate with
+# it as the draft (see `python manage.py benchmark_assisted`). Set to 0 to disable.
+
+ASSISTED_DECODING = os.environ.get('ASSISTED_DECODING', '1') == '1'
+
+# Chat deadline: all generation for one chat request (router, answer, follow-up
+# questions) must finish within CHAT_DEADLINE_SECONDS. Decoding stops at the
+# deadline; a cut-off answer is trimmed to its last full sentence or replaced by
+# the knowledge-base / fallback text. Calls with less than
+# DEADLINE_MIN_GENERATION_SECONDS left are skipped. See assistant_deadline_hits_total.
+
+CHAT_DEADLINE_SECONDS = float(os.environ.get('CHAT_DEADLINE_SECONDS', 20))
+DEADLINE_MIN_GENERATION_SECONDS = 0.5
+
+# Batch chat (/api/chat/batch/, for partner integrations): up to
+# CHAT_BATCH_MAX_QUESTIONS questions per request, answered within
+# CHAT_BATCH_DEADLINE_SECONDS with CHAT_BATCH_GENERATION_SIZE prompts per
+# batched generator call.
+
+CHAT_BATCH_MAX_QUESTIONS = int(os.environ.get('CHAT_BATCH_MAX_QUESTIONS', 10))
+CHAT_BATCH_DEADLINE_SECONDS = float(os.environ.get('CHAT_BATCH_DEADLINE_SECONDS', 60))
+CHAT_BATCH_GENERATION_SIZE = 8
+
+# Pivot translation for Hindi and Gujarati chat (see assistant/translation.py).
+# Questions the knowledge base cannot answer are translated to English, answered
+# in English and the answer translated back with TRANSLATION_MODEL. Translations
+# are cached in memory and in the Translation table (filled ahead of time by
+# `python manage.py precompute_translations`); whole translated answers are
+# cached for PIVOT_ANSWER_CACHE_SECONDS, so a repeated question is not generated again.
+
+PIVOT_TRANSLATION = os.environ.get('PIVOT_TRANSLATION', '0') == '1'
+TRANSLATION_MODEL = os.environ.get('TRANSLATION_MODEL', 'facebook/nllb-200-distilled-600M')
+TRANSLATION_LANG_CODES = {'en': 'eng_Latn', 'hi': 'hin_Deva', 'gu': 'guj_Gujr'}
+TRANSLATION_MEMORY_SIZE = 2048
+PIVOT_ANSWER_CACHE_SECONDS = 7 * 24 * 3600
+
+# Precomputed answer bank (see assistant/answer_bank.py): answers to a question
+# corpus generated offline by `python manage.py build_answer_bank` and served by
+# chat for exact or normalized matches before any live generation.
+
+ANSWER_BANK_ENABLED = os.environ.get('ANSWER_BANK_ENABLED', '1') == '1'
+
+# Compiled generation (see assistant.generation.CompiledGenerator and
+# `python manage.py benchmark_compiled`): torch.compile'd decoding with a static
+# KV cache and inputs padded to COMPILE_INPUT_BUCKETS tokens. Compiled graphs are
+# kept in COMPILE_CACHE_DIR (TORCHINDUCTOR_CACHE_DIR) across restarts. Replaces
+# assisted decoding when enabled; needs a C++ compiler on the host.
+
+COMPILED_GENERATION = os.environ.get('COMPILED_GENERATION', '0') == '1'
+COMPILE_INPUT_BUCKETS = [64, 128, 256, 512]
+COMPILE_CACHE_DIR = Path(os.environ.get('COMPILE_CACHE_DIR', BASE_DIR / '.compile_cache'))
+
+# Model cascade for chat requests with model "auto" or none (see assistant/cascade.py).
+# Questions longer than CASCADE_SIMPLE_MAX_WORDS start on the second tier. With at
+# least CASCADE_BUSY_DEPTH other answers in progress (default: INFERENCE_WORKERS)
+# only the first tier is used; at CASCADE_SATURATED_DEPTH (default: workers plus
+# half the queue limit) chat falls back to knowledge-base answers. The depth is
+# counted per process, so these two limits only apply under ASGI or threaded
+# workers (gunicorn --threads); sync workers never see other requests in progress.
+
+MODEL_CASCADE = ['google/flan-t5-base', 'google/flan-t5-large', 'google/flan-t5-xl']
+CASCADE_SIMPLE_MAX_WORDS = 8
+CASCADE_BUSY_DEPTH = int(os.environ.get('CASCADE_BUSY_DEPTH', 0)) or None
+CASCADE_SATURATED_DEPTH = int(os.environ.get('CASCADE_SATURATED_DEPTH', 0)) or None
+
+# Optional shared model server (`python manage.py run_model_server`).
+# When MODEL_SERVER_SOCKET is set, web workers send generations to it
+# instead of loading their own copy of each model.
+
+MODEL_SERVER_SOCKET = os.environ.get('MODEL_SERVER_SOCKET')
+MODEL_SERVER_TIMEOUT = 120
+MODEL_SERVER_CONCURRENCY = int(os.environ.get('MODEL_SERVER_CONCURRENCY', 1))
+
+# Startup import budget checked by `python manage.py check_import_time`.
+# The model and search stacks must only be imported on first use.
+
+IMPORT_TIME_BUDGET_MS = 750
+IMPORT_FORBIDDEN_MODULES = ['torch', 'transformers', 'tavily', 'fpdf', 'huggingface_hub']
+
+# Output of `python manage.py benchmark_models`, shown by /api/models/ when present
+
+MODEL_BENCHMARK_FILE = BASE_DIR / 'model_benchmarks.json'
+
+# Model store (see assistant/model_store.py and `python manage.py build_model_store`):
+# safetensors copies of AVAILABLE_MODELS, loaded memory-mapped and without the hub.
+# Models not in the store load from the Hugging Face cache unless
+# MODEL_STORE_REQUIRED is set, which makes a missing model an error instead.
+
+MODEL_STORE_DIR = Path(os.environ.get('MODEL_STORE_DIR', BASE_DIR / 'model_store'))
+MODEL_STORE_REQUIRED = os.environ.get('MODEL_STORE_REQUIRED', '0') == '1'
+
+# Local checkpoint directories by model name, used before the store and the hub.
+# Models with `languages` in AVAILABLE_MODELS take chat in those languages
+# whenever they are available locally; INDIC_MODEL_PATH points the multilingual
+# mT0 model (Hindi, Gujarati) at a checkpoint (see `python manage.py benchmark_languages`).
+
+INDIC_MODEL_PATH = os.environ.get('INDIC_MODEL_PATH')
+MODEL_PATHS = {'bigscience/mt0-base': INDIC_MODEL_PATH} if INDIC_MODEL_PATH else {}
+
+# Load testing (see `python manage.py loadtest`). BLOOD_ASSISTANT_LOADTEST=1 swaps
+# the model and search backends for deterministic fakes with the latencies below
+# and adds an X-DB-Queries response header. Never enable this in production.
+# Set THROTTLE_ENABLED=0 as well unless the rate limits are what is being tested.
+
+LOADTEST_MODE = os.environ.get('BLOOD_ASSISTANT_LOADTEST') == '1'
+FAKE_GENERATION_SECONDS = float(os.environ.get('FAKE_GENERATION_SECONDS', 0.05))
+FAKE_SEARCH_SECONDS = float(os.environ.get('FAKE_SEARCH_SECONDS', 0.3))
+
+if LOADTEST_MODE:
+    MIDDLEWARE.insert(0, 'assistant.middleware.QueryCountMiddleware')
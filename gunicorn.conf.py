@@ -0,0 +1,28 @@
+"""
+Gunicorn settings, read automatically when gunicorn starts from this directory:
+
+    WEB_CONCURRENCY=4 THREAD_PLAN_PIN=1 gunicorn blood_assistant.wsgi
+
+Each worker gets a CPU slot, and its thread plan (assistant/cpu_plan.py) is
+applied right after the fork, before the app or torch is loaded.
+"""
+import os
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'blood_assistant.settings')
+
+workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+bind = os.environ.get('BIND', '0.0.0.0:8000')
+timeout = 120
+
+
+def pre_fork(server, worker):
+    """Give the new worker the lowest slot no live worker holds, so restarts reuse slots"""
+    taken = {getattr(w, 'cpu_slot', None) for w in server.WORKERS.values()}
+    worker.cpu_slot = next(slot for slot in range(len(taken) + 1) if slot not in taken)
+
+
+def post_fork(server, worker):
+    from assistant.cpu_plan import apply_startup_plan, describe_plan
+
+    plan = apply_startup_plan(worker.cpu_slot)
+    server.log.info(describe_plan(plan, worker.cpu_slot))